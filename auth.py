@@ -1,22 +1,84 @@
 """
 Simple local user authentication for the Pokémon PC Box simulator.
 Users are stored in data/users.json; each user's save is in data/saves/<username>.json
+
+Passwords are hashed with PBKDF2-SHA256 and a per-user salt, stored as
+"pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>". Entries written by older
+versions (one salted SHA-256 hex digest) still verify and are rehashed on the
+next successful login, as are entries with a different iteration count.
+
+The KDF is deliberately slow, so the GUI calls verify_user_async /
+register_user_async, which run on a small thread pool (hashlib releases the
+GIL while hashing) and return concurrent.futures.Future objects.
 """
+import hashlib
+import hmac
 import json
 import os
-import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import metrics
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 USERS_PATH = os.path.join(BASE_DIR, "data", "users.json")
 SAVES_DIR = os.path.join(BASE_DIR, "data", "saves")
 
+# Cost factor: PBKDF2 iterations for new and rehashed passwords.
+KDF_ITERATIONS = int(os.environ.get("POKEPC_KDF_ITERATIONS", "200000"))
+KDF_PREFIX = "pbkdf2_sha256"
+SALT_BYTES = 16
+# Threads used by the *_async functions.
+AUTH_WORKERS = int(os.environ.get("POKEPC_AUTH_WORKERS", "4"))
+
+_users_lock = threading.Lock()  # serialises read-modify-write of users.json
+_executor = None
+_executor_lock = threading.Lock()
+
 
-def _hash_password(password: str) -> str:
-    """Return SHA-256 hash of password (with a simple salt for slightly better security)."""
+def _legacy_hash(password: str) -> str:
+    """Hash format used before PBKDF2: salted SHA-256 hex digest."""
     salt = "pokemon_pc_box"
     return hashlib.sha256((salt + password).encode()).hexdigest()
 
 
+def _hash_password(password: str, iterations: int | None = None, salt: bytes | None = None) -> str:
+    """Return the PBKDF2 hash string for password with a fresh random salt."""
+    iterations = iterations or KDF_ITERATIONS
+    salt = salt or os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return f"{KDF_PREFIX}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def _check_password(stored: str, password: str) -> tuple[bool, bool]:
+    """
+    Compare password against a stored hash. Returns (matches, needs_rehash);
+    needs_rehash is True for legacy entries and ones hashed at a different cost.
+    """
+    if stored.startswith(KDF_PREFIX + "$"):
+        try:
+            _, iterations, salt, expected = stored.split("$")
+            iterations = int(iterations)
+            salt = bytes.fromhex(salt)
+        except ValueError:
+            return False, False
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations).hex()
+        return hmac.compare_digest(digest, expected), iterations != KDF_ITERATIONS
+    return hmac.compare_digest(_legacy_hash(password), stored), True
+
+
+def _rehash(stored_name: str, old_hash: str, password: str):
+    """Upgrade a user's stored hash to the current KDF settings."""
+    new_hash = _hash_password(password)
+    with _users_lock:
+        users = _load_users()
+        # skip if the entry changed while we were hashing
+        if users.get(stored_name) == old_hash:
+            users[stored_name] = new_hash
+            _save_users(users)
+    metrics.incr("auth.rehash")
+
+
 def _load_users() -> dict:
     """Load user map { username -> hashed_password }."""
     if not os.path.exists(USERS_PATH):
@@ -32,13 +94,16 @@ def _save_users(users: dict) -> bool:
     """Persist user map. Returns True on success."""
     os.makedirs(os.path.dirname(USERS_PATH), exist_ok=True)
     try:
-        with open(USERS_PATH, "w") as f:
+        tmp = USERS_PATH + ".tmp"
+        with open(tmp, "w") as f:
             json.dump(users, f, indent=2)
+        os.replace(tmp, USERS_PATH)
         return True
     except OSError:
         return False
 
 
+@metrics.timed("auth.register_user")
 def register_user(username: str, password: str) -> tuple[bool, str]:
     """
     Register a new user. Returns (success, message).
@@ -52,18 +117,23 @@ def register_user(username: str, password: str) -> tuple[bool, str]:
     if len(username) < 2:
         return False, "Username must be at least 2 characters."
 
-    users = _load_users()
-    key = username.lower()
-    if key in {k.lower(): k for k in users}:
+    if _find_user(_load_users(), username):
         return False, "That username is already taken."
 
-    users[username] = _hash_password(password)
-    if not _save_users(users):
-        return False, "Failed to save user data."
+    hashed = _hash_password(password)
+    with _users_lock:
+        # re-read under the lock: another registration may have finished while hashing
+        users = _load_users()
+        if _find_user(users, username):
+            return False, "That username is already taken."
+        users[username] = hashed
+        if not _save_users(users):
+            return False, "Failed to save user data."
     os.makedirs(SAVES_DIR, exist_ok=True)
     return True, "Account created! You can log in now."
 
 
+@metrics.timed("auth.verify_user")
 def verify_user(username: str, password: str) -> tuple[bool, str]:
     """
     Verify username and password. Returns (success, message).
@@ -74,20 +144,70 @@ def verify_user(username: str, password: str) -> tuple[bool, str]:
         return False, "Please enter username and password."
 
     users = _load_users()
+    stored_name = _find_user(users, username)
+    if stored_name is None:
+        return False, "No account found with that username."
+    hashed = users[stored_name]
+    ok, needs_rehash = _check_password(hashed, password)
+    if not ok:
+        return False, "Incorrect password."
+    if needs_rehash:
+        _rehash(stored_name, hashed, password)
+    return True, stored_name
+
+
+def _find_user(users: dict, username: str) -> str | None:
+    """Stored spelling of username (case-insensitive match), or None."""
     key_lower = username.lower()
-    for stored_name, hashed in users.items():
+    for stored_name in users:
         if stored_name.lower() == key_lower:
-            if hashed == _hash_password(password):
-                return True, stored_name
-            return False, "Incorrect password."
-    return False, "No account found with that username."
+            return stored_name
+    return None
+
+
+def find_user(username: str) -> str | None:
+    """Stored spelling of a registered username (case-insensitive), or None."""
+    return _find_user(_load_users(), username)
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="auth")
+        return _executor
+
+
+def verify_user_async(username: str, password: str) -> Future:
+    """verify_user on the auth worker pool. The future's result is (success, message)."""
+    return _pool().submit(verify_user, username, password)
+
+
+def register_user_async(username: str, password: str) -> Future:
+    """register_user on the auth worker pool. The future's result is (success, message)."""
+    return _pool().submit(register_user, username, password)
+
+
+def shutdown(wait: bool = True):
+    """Stop the worker pool (it is recreated on the next async call)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
 
 
 def get_save_path_for_user(username: str) -> str:
-    """Return the path to the save file for this user."""
+    """
+    Return the path to the save file for this user.
+    A converted <user>.pcbox save (see boxfile.py) takes precedence over <user>.json.
+    """
     os.makedirs(SAVES_DIR, exist_ok=True)
     # Sanitize filename: only allow alphanumeric and underscore
     safe = "".join(c if c.isalnum() or c in "._-" else "_" for c in username)
     if not safe:
         safe = "user"
+    mapped = os.path.join(SAVES_DIR, f"{safe}.pcbox")
+    if os.path.exists(mapped):
+        return mapped
     return os.path.join(SAVES_DIR, f"{safe}.json")
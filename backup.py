@@ -0,0 +1,426 @@
+"""
+Deduplicating backups of a save's history.
+
+A backup is a small manifest of content hashes: one chunk for the party and
+one per box. Chunks are stored once, by hash, as zlib-compressed JSON, so a
+box that did not change between backups costs nothing and all empty boxes
+share one chunk. The store sits next to the save:
+
+    <save>.backups/
+        objects/ab/ab12…                        chunk: a JSON list of slots
+        versions/20261018T140312-00000042.json  manifest (local time, save version)
+
+Backups listens to the Player (see models.player.PlayerListener) and keeps
+the hash of every box it has stored, so a backup only re-serialises boxes
+changed since the last one. Boxes of a .pcbox save that were never opened
+are chunked straight from their stored records without decoding them.
+
+Retention keeps every backup from the last KEEP_ALL_SECONDS, the newest one
+per hour for KEEP_HOURLY hours and the newest per day for KEEP_DAILY days;
+gc() then deletes the chunks no manifest refers to.
+
+    python backup.py list data/saves/maro.json
+    python backup.py restore data/saves/maro.json 20261017T210000-00000040 -o yesterday.json
+    python backup.py prune data/saves/maro.json
+"""
+import hashlib
+import json
+import os
+import sys
+import time
+import tkinter as tk
+import zlib
+from tkinter import messagebox
+
+import boxfile
+import storage
+from models.player import PlayerListener
+from savelock import SaveLock
+
+BACKUP_INTERVAL = float(os.environ.get("POKEPC_BACKUP_INTERVAL", "600"))  # seconds between automatic backups
+KEEP_ALL_SECONDS = 3600
+KEEP_HOURLY = 48
+KEEP_DAILY = 30
+STAMP = "%Y%m%dT%H%M%S"
+PARTY = "party"
+
+
+def backup_dir(save_path: str) -> str:
+    """Backup store kept next to a save file."""
+    return save_path + ".backups"
+
+
+def encode_slots(mons) -> bytes:
+    return b"[" + b",".join(boxfile.encode(mon) or b"null" for mon in mons) + b"]"
+
+
+def encode_payloads(payloads) -> bytes:
+    """Same bytes as encode_slots, from .pcbox records (see boxfile.encode)."""
+    return b"[" + b",".join(bytes(p) if p else b"null" for p in payloads) + b"]"
+
+
+def to_player(data: dict):
+    """A Player holding restored backup data, box names included."""
+    from models.player import Player
+
+    player = Player()
+    storage.apply_save(player, data)
+    for box, name in zip(player.boxes, data.get("box_names", [])):
+        box.name = name
+    return player
+
+
+def manifest_time(backup_id: str) -> float:
+    return time.mktime(time.strptime(backup_id.split("-")[0], STAMP))
+
+
+class BackupStore:
+    def __init__(self, root: str):
+        self.root = root
+        self.objects = os.path.join(root, "objects")
+        self.versions = os.path.join(root, "versions")
+
+    def lock(self):
+        """Held while backing up or collecting garbage, so gc never deletes a chunk being referenced."""
+        return SaveLock(os.path.join(self.root, "store"))
+
+    # ---------------- Chunks ----------------
+    def chunk_path(self, digest: str) -> str:
+        return os.path.join(self.objects, digest[:2], digest)
+
+    def put_chunk(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.chunk_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(zlib.compress(data))
+            os.replace(tmp, path)
+        return digest
+
+    def get_chunk(self, digest: str) -> list:
+        with open(self.chunk_path(digest), "rb") as f:
+            return json.loads(zlib.decompress(f.read()))
+
+    # ---------------- Manifests ----------------
+    def ids(self) -> list[str]:
+        """Backup ids, oldest first."""
+        if not os.path.isdir(self.versions):
+            return []
+        return sorted(f[:-5] for f in os.listdir(self.versions) if f.endswith(".json"))
+
+    def manifest(self, backup_id: str) -> dict:
+        with open(os.path.join(self.versions, backup_id + ".json"), "r") as f:
+            return json.load(f)
+
+    def write_manifest(self, manifest: dict):
+        os.makedirs(self.versions, exist_ok=True)
+        path = os.path.join(self.versions, manifest["id"] + ".json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(path + ".tmp", path)
+
+    def restore(self, backup_id: str) -> dict:
+        """Save data (as storage.apply_save takes it) for a backup, plus its box names."""
+        manifest = self.manifest(backup_id)
+        chunks = {}
+
+        def chunk(digest):
+            if digest not in chunks:
+                chunks[digest] = self.get_chunk(digest)
+            return [dict(slot) if slot else None for slot in chunks[digest]]
+
+        return {
+            "party": chunk(manifest["party"]),
+            "boxes": [chunk(digest) for digest in manifest["boxes"]],
+            "current_box": manifest.get("current_box", 0),
+            "box_names": manifest.get("names", []),
+            "smart_boxes": manifest.get("smart_boxes", []),
+        }
+
+    # ---------------- Retention ----------------
+    def prune(self, now: float | None = None) -> list[str]:
+        """Delete manifests the retention policy no longer keeps. Returns their ids."""
+        now = time.time() if now is None else now
+        ids = self.ids()
+        keep = set(ids[-1:])
+        buckets = set()
+        for backup_id in reversed(ids):
+            t = manifest_time(backup_id)
+            age = now - t
+            if age <= KEEP_ALL_SECONDS:
+                keep.add(backup_id)
+                continue
+            if age <= KEEP_HOURLY * 3600:
+                bucket = ("hour", int(t // 3600))
+            elif age <= KEEP_DAILY * 86400:
+                bucket = ("day", time.strftime("%Y%m%d", time.localtime(t)))
+            else:
+                continue
+            if bucket not in buckets:
+                buckets.add(bucket)
+                keep.add(backup_id)
+        removed = [backup_id for backup_id in ids if backup_id not in keep]
+        for backup_id in removed:
+            os.remove(os.path.join(self.versions, backup_id + ".json"))
+        return removed
+
+    def gc(self) -> tuple[int, int]:
+        """Delete chunks no manifest refers to. Returns (chunks deleted, bytes freed)."""
+        with self.lock():
+            referenced = set()
+            for backup_id in self.ids():
+                manifest = self.manifest(backup_id)
+                referenced.add(manifest["party"])
+                referenced.update(manifest["boxes"])
+            deleted = freed = 0
+            if not os.path.isdir(self.objects):
+                return 0, 0
+            for prefix in os.listdir(self.objects):
+                folder = os.path.join(self.objects, prefix)
+                for name in os.listdir(folder):
+                    if name not in referenced:
+                        path = os.path.join(folder, name)
+                        freed += os.path.getsize(path)
+                        os.remove(path)
+                        deleted += 1
+            return deleted, freed
+
+    def size(self) -> int:
+        """Bytes used by chunks and manifests."""
+        total = 0
+        for folder, _, files in os.walk(self.root):
+            total += sum(os.path.getsize(os.path.join(folder, f)) for f in files if not f.endswith(".lock"))
+        return total
+
+
+class Backups(PlayerListener):
+    """Automatic backups of one player's save; only boxes changed since the last backup are re-chunked."""
+
+    def __init__(self, player, store: BackupStore, interval: float = BACKUP_INTERVAL):
+        self.player = player
+        self.store = store
+        self.interval = interval
+        self.hashes = {}    # box index or PARTY -> (chunk hash, Pokémon count) as last stored
+        self.dirty = set()  # box indexes (or PARTY) changed since then
+        self.smart_boxes = None  # smart box definitions as last stored (they change without listener calls)
+        self.last_id = None
+        self.last_time = 0.0
+        player.listeners.append(self)
+
+    # ---------------- Change tracking ----------------
+    def slot_changed(self, loc, old, new):
+        self.dirty.add(PARTY if loc[0] == "party" else loc[1])
+
+    def pokemon_edited(self, mon, old, new):
+        if any(m is mon for m in self.player.party):
+            self.dirty.add(PARTY)
+            return
+        for index, box in _loaded_boxes(self.player):
+            if any(m is mon for m in box.pokemon):
+                self.dirty.add(index)
+                return
+        self.hashes.clear()
+
+    def box_switched(self, old, new):
+        self.dirty.add("current_box")
+
+    def reset(self, player):
+        """A save was loaded: reuse the newest backup's hashes if it is of this very save version."""
+        self.hashes.clear()
+        self.dirty.clear()
+        self.smart_boxes = None
+        ids = self.store.ids()
+        version = getattr(player, "save_version", None)
+        if not ids or not version:
+            return
+        manifest = self.store.manifest(ids[-1])
+        if manifest.get("save_version") == version and len(manifest["boxes"]) == len(player.boxes):
+            counts = manifest.get("counts") or [None] * (len(manifest["boxes"]) + 1)
+            self.hashes[PARTY] = (manifest["party"], counts[0])
+            for index, digest in enumerate(manifest["boxes"]):
+                self.hashes[index] = (digest, counts[index + 1])
+            self.smart_boxes = manifest.get("smart_boxes", [])
+            self.last_id = ids[-1]
+            self.last_time = manifest["time"]
+
+    # ---------------- Backing up ----------------
+    def _chunk(self, key) -> tuple[str, int]:
+        player = self.player
+        if key == PARTY:
+            mons = player.party
+        else:
+            boxes = player.boxes
+            if isinstance(boxes, boxfile.MappedBoxes) and not boxes.is_loaded(key):
+                payloads = boxes.save.read_box(key)[1]
+                return self.store.put_chunk(encode_payloads(payloads)), sum(1 for p in payloads if p)
+            mons = boxes[key].pokemon
+        return self.store.put_chunk(encode_slots(mons)), sum(1 for m in mons if m)
+
+    def snapshot(self, now: float | None = None, force: bool = False) -> str | None:
+        """
+        Back up the player's current state. Returns the new backup id, or None
+        when nothing changed since the last backup (unless force).
+        """
+        now = time.time() if now is None else now
+        player = self.player
+        keys = [PARTY] + list(range(len(player.boxes)))
+        changed = [k for k in keys if k in self.dirty or k not in self.hashes]
+        smart_boxes = [dict(d) for d in getattr(player, "smart_boxes", [])]
+        if not changed and "current_box" not in self.dirty and smart_boxes == self.smart_boxes and not force:
+            return None
+        with self.store.lock():
+            for key in changed:
+                self.hashes[key] = self._chunk(key)
+            backup_id = f"{time.strftime(STAMP, time.localtime(now))}-{getattr(player, 'save_version', None) or 0:08d}"
+            self.store.write_manifest({
+                "id": backup_id,
+                "time": now,
+                "save_version": getattr(player, "save_version", None),
+                "current_box": player.current_box,
+                "party": self.hashes[PARTY][0],
+                "boxes": [self.hashes[i][0] for i in range(len(player.boxes))],
+                "counts": [self.hashes[k][1] for k in keys],
+                "names": [_box_name(player.boxes, i) for i in range(len(player.boxes))],
+                "smart_boxes": smart_boxes,
+            })
+        self.dirty.clear()
+        self.smart_boxes = smart_boxes
+        self.last_id, self.last_time = backup_id, now
+        if self.store.prune(now):
+            self.store.gc()
+        return backup_id
+
+    def maybe_snapshot(self, now: float | None = None) -> str | None:
+        """Back up if the last backup is older than the interval (called after every save)."""
+        now = time.time() if now is None else now
+        if now - self.last_time < self.interval:
+            return None
+        return self.snapshot(now)
+
+
+def _loaded_boxes(player):
+    boxes = player.boxes
+    if isinstance(boxes, boxfile.MappedBoxes):
+        return boxes.loaded()
+    return enumerate(boxes)
+
+
+def _box_name(boxes, index):
+    if isinstance(boxes, boxfile.MappedBoxes) and not boxes.is_loaded(index):
+        return boxes.save.read_box_name(index)
+    return boxes[index].name
+
+
+def describe(store: BackupStore, backup_id: str) -> str:
+    manifest = store.manifest(backup_id)
+    when = time.strftime("%Y-%m-%d %H:%M", time.localtime(manifest["time"]))
+    total = sum(manifest.get("counts") or [])
+    return f"{when}  —  {total} Pokémon in {len(manifest['boxes'])} boxes  (save v{manifest.get('save_version') or 0})"
+
+
+class BackupsWindow(tk.Toplevel):
+    """List of backups of the open save, newest first, with restore."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.title("Backups")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.ids = []
+
+        self.listbox = tk.Listbox(self, width=70, height=18, font=("Arial", 10))
+        self.listbox.pack(fill="both", expand=True, padx=8, pady=(8, 0))
+        buttons = tk.Frame(self, padx=8, pady=6)
+        buttons.pack(fill="x")
+        tk.Button(buttons, text="Back up now", command=self.back_up).pack(side="left")
+        tk.Button(buttons, text="Restore selected", command=self.restore).pack(side="left", padx=6)
+        self.status_lbl = tk.Label(buttons, font=("Arial", 9))
+        self.status_lbl.pack(side="right")
+        self.refresh()
+
+    def refresh(self):
+        store = self.app.backups.store
+        self.ids = list(reversed(store.ids()))
+        self.listbox.delete(0, "end")
+        self.listbox.insert("end", *(describe(store, i) for i in self.ids))
+        self.status_lbl.config(text=f"{len(self.ids)} backups, {store.size() / 1024:.0f} KB")
+
+    def back_up(self):
+        self.app.save_game()
+        self.app.backups.snapshot(force=True)
+        self.refresh()
+
+    def restore(self):
+        picked = self.listbox.curselection()
+        if not picked:
+            return
+        backup_id = self.ids[picked[0]]
+        if not messagebox.askyesno(
+            "Restore backup",
+            f"Replace the collection with the backup from\n{describe(self.app.backups.store, backup_id)}?\n\n"
+            "The current state is backed up first.",
+            parent=self,
+        ):
+            return
+        self.app.restore_backup(backup_id)
+        self.refresh()
+
+    def close(self):
+        self.app.backups_window = None
+        self.destroy()
+
+
+def main(argv=None):
+    import argparse
+    from models.player import Player
+
+    parser = argparse.ArgumentParser(description="List, restore and prune save backups")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("list", "list backups, newest first"), ("snapshot", "back up the save now"),
+                            ("prune", "apply the retention policy and delete unreferenced chunks")):
+        sub.add_parser(name, help=help_text).add_argument("save")
+    r = sub.add_parser("restore", help="write a backup out (default: over the save, after backing it up)")
+    r.add_argument("save")
+    r.add_argument("id")
+    r.add_argument("-o", "--out", help="write here instead of over the save")
+    args = parser.parse_args(argv)
+
+    store = BackupStore(backup_dir(args.save))
+    if args.command == "list":
+        for backup_id in reversed(store.ids()):
+            print(f"{backup_id}  {describe(store, backup_id)}")
+        print(f"{len(store.ids())} backups, {store.size() / 1024:.0f} KB")
+        return 0
+    if args.command == "prune":
+        removed = store.prune()
+        deleted, freed = store.gc()
+        print(f"Removed {len(removed)} backups and {deleted} chunks ({freed / 1024:.0f} KB)")
+        return 0
+
+    player = Player()
+    if not storage.load_player(player, args.save) and args.command == "snapshot":
+        print(f"Nothing to back up in {args.save}")
+        return 1
+    backups = Backups(player, store)
+    backups.reset(player)
+    if args.command == "snapshot":
+        print(f"Backed up as {backups.snapshot(force=True)}")
+        storage.close_player(player)
+        return 0
+
+    if args.id not in store.ids():
+        print(f"No backup {args.id} (see: python backup.py list {args.save})")
+        return 1
+    restored = to_player(store.restore(args.id))
+    if not args.out:
+        backups.snapshot(force=True)
+    storage.close_player(player)
+    storage.save_player(restored, args.out or args.save)
+    print(f"Restored {args.id} into {args.out or args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""
+Benchmarks for the Pokémon PC Box simulator.
+Run `python -m benchmarks.run --help` from the project root.
+"""
@@ -0,0 +1,85 @@
+"""
+Login throughput (logins/sec) through auth.verify_user_async at several KDF
+cost settings and worker-pool sizes.
+
+    python -m benchmarks.auth_throughput --costs 10000,100000,200000 --workers 1,4 --logins 64
+
+Each run writes a users file of --users accounts hashed at that cost and
+submits --logins verifications round-robin across them; the rate is
+logins / wall time from the first submit to the last result.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import auth
+from benchmarks import synthetic
+
+
+def run_once(path: str, cost: int, workers: int, users: int, logins: int) -> dict:
+    auth.shutdown()
+    auth.KDF_ITERATIONS = cost
+    auth.AUTH_WORKERS = workers
+    synthetic.write_users(path, {f"trainer{i:07d}": auth._hash_password(f"pw{i}") for i in range(users)})
+
+    start = time.perf_counter()
+    futures = [auth.verify_user_async(f"trainer{i % users:07d}", f"pw{i % users}") for i in range(logins)]
+    results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+    if not all(ok for ok, _ in results):
+        raise RuntimeError("synthetic login failed")
+    return {
+        "cost": cost,
+        "workers": workers,
+        "logins": logins,
+        "seconds": elapsed,
+        "logins_per_sec": logins / elapsed,
+        "ms_per_login": elapsed / logins * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure login throughput at different KDF costs")
+    parser.add_argument("--costs", default="10000,100000,200000", help="comma-separated PBKDF2 iteration counts")
+    parser.add_argument("--workers", default="1,4", help="comma-separated worker-pool sizes")
+    parser.add_argument("--users", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--out", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    costs = [int(c) for c in args.costs.split(",")]
+    worker_counts = [int(w) for w in args.workers.split(",")]
+    path = os.path.join(tempfile.mkdtemp(prefix="pcbox-auth-"), "users.json")
+    old = auth.USERS_PATH, auth.KDF_ITERATIONS, auth.AUTH_WORKERS
+    auth.USERS_PATH = path
+    results = []
+    try:
+        for cost in costs:
+            for workers in worker_counts:
+                r = run_once(path, cost, workers, args.users, args.logins)
+                results.append(r)
+                print(
+                    f"cost {cost:>8}  workers {workers:>2}  "
+                    f"{r['logins_per_sec']:9.1f} logins/s  {r['ms_per_login']:8.2f} ms/login"
+                )
+    finally:
+        auth.shutdown()
+        auth.USERS_PATH, auth.KDF_ITERATIONS, auth.AUTH_WORKERS = old
+        if os.path.exists(path):
+            os.remove(path)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"cpus": os.cpu_count(), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Storage growth of the backup store (backup.py) over a simulated month.
+
+A synthetic collection is edited in a few sessions a day on a simulated
+clock; backups are taken the way the app takes them (at most one per
+BACKUP_INTERVAL while saving, and one when the session ends) and the
+retention policy prunes as it goes. Compared with keeping a full copy of the
+save for every backup kept, and for every backup ever taken.
+
+    python -m benchmarks.backup_growth --size 10000 --days 30 --out growth.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import backup
+import storage
+from benchmarks.synthetic import make_player, make_pokemon
+
+DAY = 86400
+SESSION_HOURS = (9, 14, 20)
+EDIT_SECONDS = 30
+
+
+def edit(player, rng):
+    box_count = len(player.boxes)
+    roll = rng.random()
+    a = ("box", rng.randrange(box_count), rng.randrange(30))
+    if roll < 0.55:
+        b = ("box", rng.randrange(box_count), rng.randrange(30)) if rng.random() < 0.3 else (a[0], a[1], rng.randrange(30))
+        player.swap_slots(a, b)
+    elif roll < 0.7:
+        player.set_slot(a, None if player.get_slot(a) else make_pokemon(rng))
+    elif roll < 0.8:
+        player.swap_slots(a, ("party", None, rng.randrange(6)))
+    else:
+        mon = player.get_slot(a)
+        if mon:
+            player.edit_pokemon(mon, {"level": rng.randint(1, 100)})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate a month of backups and measure store growth")
+    parser.add_argument("--size", type=int, default=10000, help="Pokémon in the collection")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--edits", type=int, default=120, help="edits per session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix="pcbox-backups-")
+    try:
+        player = make_player(args.size, seed=args.seed)
+        store = backup.BackupStore(os.path.join(workdir, "save.json.backups"))
+        backups = backup.Backups(player, store)
+        start = time.mktime((2026, 1, 1, 0, 0, 0, 0, 0, -1))
+        taken = 0
+        snapshot_times = []
+        rows = []
+        for day in range(args.days):
+            for hour in SESSION_HOURS:
+                now = start + day * DAY + hour * 3600
+                for _ in range(args.edits):
+                    edit(player, rng)
+                    player.save_version = (player.save_version or 0) + 1
+                    now += EDIT_SECONDS
+                    t = time.perf_counter()
+                    if backups.maybe_snapshot(now):
+                        snapshot_times.append(time.perf_counter() - t)
+                        taken += 1
+                t = time.perf_counter()
+                if backups.snapshot(now):
+                    snapshot_times.append(time.perf_counter() - t)
+                    taken += 1
+            save_size = len(json.dumps(storage.player_to_dict(player), indent=2))
+            kept = len(store.ids())
+            rows.append({
+                "day": day + 1, "backups_taken": taken, "backups_kept": kept,
+                "store_bytes": store.size(), "full_copies_kept_bytes": kept * save_size,
+                "full_copies_all_bytes": taken * save_size,
+            })
+            r = rows[-1]
+            print(f"day {day + 1:>3}: {kept:>4} kept / {taken:>5} taken, store {r['store_bytes'] / 1e6:7.2f} MB, "
+                  f"full copies {r['full_copies_kept_bytes'] / 1e6:8.2f} MB kept / {r['full_copies_all_bytes'] / 1e6:9.2f} MB all")
+
+        ids = store.ids()
+        restore_times = []
+        for backup_id in (ids[0], ids[len(ids) // 2], ids[-1]):
+            t = time.perf_counter()
+            data = store.restore(backup_id)
+            restore_times.append(time.perf_counter() - t)
+        current = storage.player_to_dict(player)
+        assert data["party"] == current["party"] and data["boxes"] == current["boxes"], "newest backup differs from the collection"
+
+        summary = {
+            "snapshot_median_ms": statistics.median(snapshot_times) * 1000,
+            "snapshot_max_ms": max(snapshot_times) * 1000,
+            "restore_max_ms": max(restore_times) * 1000,
+            "ratio_vs_kept_copies": rows[-1]["full_copies_kept_bytes"] / rows[-1]["store_bytes"],
+        }
+        print(f"backup: median {summary['snapshot_median_ms']:.1f} ms, max {summary['snapshot_max_ms']:.1f} ms; "
+              f"restore (oldest/middle/newest): max {summary['restore_max_ms']:.1f} ms; "
+              f"{summary['ratio_vs_kept_copies']:.1f}× smaller than full copies")
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump({"params": vars(args), "days": rows, "summary": summary}, f, indent=2)
+            print(f"Wrote {args.out}")
+        return 0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
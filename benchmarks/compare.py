@@ -0,0 +1,53 @@
+"""
+Compare two benchmark result files written by benchmarks.run.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.15
+
+Exits with status 1 if any benchmark's median got slower than the threshold allows.
+"""
+import argparse
+import json
+import sys
+
+
+def result_key(entry: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(entry.get("params", {}).items()))
+    return f"{entry['name']}[{params}]"
+
+
+def load_results(path: str) -> dict:
+    with open(path, "r") as f:
+        report = json.load(f)
+    return {result_key(e): e for e in report.get("results", []) if "median_s" in e}
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[tuple[str, float, float, float, bool]]:
+    """Return (key, old_s, new_s, ratio, regressed) for every benchmark present in both runs."""
+    rows = []
+    for key in sorted(baseline.keys() & current.keys()):
+        old = baseline[key]["median_s"]
+        new = current[key]["median_s"]
+        ratio = new / old if old else float("inf")
+        rows.append((key, old, new, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    rows = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+    regressions = 0
+    for key, old, new, ratio, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        regressions += regressed
+        print(f"{key:<48}{old * 1000:11.3f} ms{new * 1000:11.3f} ms{ratio:8.2f}x  {flag}")
+    print(f"{len(rows)} compared, {regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
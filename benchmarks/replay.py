@@ -0,0 +1,295 @@
+"""
+Replay a recorded session (see session.py) against a real PCApp and report
+per-action latency percentiles, Tk event-loop stalls and save counts.
+
+    python main.py --record heavy.jsonl                                  # record by hand, or:
+    python -m benchmarks.replay --synthetic 100000 --generate 500 -o heavy.jsonl
+    python -m benchmarks.replay heavy.jsonl --synthetic 100000 --out replay.json
+    python -m benchmarks.compare baseline-replay.json replay.json
+
+The save is copied (or generated) into a temp directory, so replays never
+touch real data. Steps run back to back unless --think is given, in which
+case the recorded gaps between actions are kept.
+
+Latency of a step is perform() plus update_idletasks(), i.e. until the
+window has redrawn. A heartbeat callback is scheduled every HEARTBEAT_MS;
+any gap longer than --stall-ms between heartbeats counts as a stall (the
+event loop could not react to input for that long).
+
+Needs a display. Without DISPLAY, Xvfb is started on a spare display
+number when it is installed.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import main as app_module
+import metrics
+import storage
+from benchmarks.synthetic import make_player, make_pokemon
+from models.player import Player
+from session import load_script, perform
+
+HEARTBEAT_MS = 5
+XVFB_DISPLAY = ":97"
+
+
+# ---------------- Scripts ----------------
+def generate_script(player, steps: int, seed: int = 0) -> list[dict]:
+    """
+    A random heavy session for player's collection: mostly drags and box
+    flips, with adds, edits, releases, batch moves and undo/redo mixed in.
+    """
+    rng = random.Random(seed)
+    box_count = len(player.boxes)
+    current = player.current_box
+    script = []
+    t = 0.0
+
+    def slot():
+        return ["party", rng.randrange(6)] if rng.random() < 0.15 else ["box", rng.randrange(30)]
+
+    for _ in range(steps):
+        t += round(rng.uniform(0.2, 1.5), 3)
+        roll = rng.random()
+        if roll < 0.40:
+            step = {"action": "drag", "from": slot(), "to": slot()}
+        elif roll < 0.60:
+            step = {"action": rng.choice(("next_box", "prev_box"))}
+            current = (current + (1 if step["action"] == "next_box" else -1)) % box_count
+        elif roll < 0.68:
+            fields = {k: v for k, v in make_pokemon(rng).__dict__.items() if k != "uid"}
+            step = {"action": "add", "at": slot(), "pokemon": fields}
+        elif roll < 0.78:
+            step = {"action": "edit", "at": slot(), "changes": {"level": rng.randint(1, 100)}}
+        elif roll < 0.83:
+            step = {"action": "remove", "at": slot()}
+        elif roll < 0.90:
+            locs = [["box", current, i] for i in sorted(rng.sample(range(30), rng.randint(2, 12)))]
+            step = {"action": "batch_move", "locs": locs, "box": rng.randrange(box_count), "start": 0, "area": "box"}
+        else:
+            step = {"action": rng.choice(("undo", "undo", "redo"))}
+        script.append({"t": t, **step})
+    return script
+
+
+def write_script(path: str, script: list[dict]):
+    with open(path, "w") as f:
+        for step in script:
+            f.write(json.dumps(step) + "\n")
+
+
+# ---------------- Display ----------------
+def ensure_display():
+    """Returns an Xvfb process to stop afterwards (or None), or raises RuntimeError."""
+    if os.environ.get("DISPLAY"):
+        return None
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        raise RuntimeError("DISPLAY is not set and Xvfb is not installed")
+    proc = subprocess.Popen([xvfb, XVFB_DISPLAY, "-nolisten", "tcp", "-screen", "0", "1280x1024x24"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = XVFB_DISPLAY
+    for _ in range(50):
+        try:
+            tk.Tk().destroy()
+            return proc
+        except tk.TclError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError(f"Xvfb did not come up on {XVFB_DISPLAY}")
+
+
+# ---------------- Replay ----------------
+class Replay:
+    def __init__(self, app, script: list[dict], think: bool, stall_ms: float):
+        self.app = app
+        self.script = script
+        self.think = think
+        self.stall_s = stall_ms / 1000
+        self.latencies = {}     # action -> [seconds]
+        self.saves = {}         # action -> saves triggered
+        self.errors = []
+        self.stalls = []
+        self.last_beat = None
+        self.done = False
+
+    def run(self) -> float:
+        start = time.perf_counter()
+        self.last_beat = start
+        self.app.after(HEARTBEAT_MS, self.heartbeat)
+        self.app.after(0, self.step, 0)
+        while not self.done:
+            self.app.update()
+        return time.perf_counter() - start
+
+    def heartbeat(self):
+        now = time.perf_counter()
+        gap = now - self.last_beat
+        if gap > self.stall_s:
+            self.stalls.append(gap)
+        self.last_beat = now
+        if not self.done:
+            self.app.after(HEARTBEAT_MS, self.heartbeat)
+
+    def step(self, i: int):
+        if i >= len(self.script):
+            self.done = True
+            return
+        entry = self.script[i]
+        action = entry["action"]
+        saves_before = save_count()
+        start = time.perf_counter()
+        try:
+            perform(self.app, entry)
+            self.app.update_idletasks()
+        except Exception as e:
+            self.errors.append(f"step {i + 1} ({action}): {e}")
+        self.latencies.setdefault(action, []).append(time.perf_counter() - start)
+        self.saves[action] = self.saves.get(action, 0) + save_count() - saves_before
+
+        delay = 1
+        if self.think and i + 1 < len(self.script):
+            delay = max(1, int((self.script[i + 1]["t"] - entry["t"]) * 1000))
+        self.app.after(delay, self.step, i + 1)
+
+
+def save_count() -> int:
+    return metrics.snapshot()["counters"].get("save.count", 0)
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def summarize(replay: Replay, params: dict) -> list[dict]:
+    """One entry per action, in the result format of benchmarks.run (readable by benchmarks.compare)."""
+    results = []
+    for action, times in sorted(replay.latencies.items()):
+        results.append({
+            "name": f"replay_{action}",
+            "params": params,
+            "count": len(times),
+            "median_s": statistics.median(times),
+            "p90_s": percentile(times, 90),
+            "p99_s": percentile(times, 99),
+            "max_s": max(times),
+            "saves": replay.saves.get(action, 0),
+        })
+    return results
+
+
+def prepare_save(args, workdir: str) -> str:
+    save_path = os.path.join(workdir, "save.json")
+    if args.save:
+        ext = ".pcbox" if storage.is_mapped_path(args.save) else ".json"
+        save_path = os.path.join(workdir, "save" + ext)
+        shutil.copyfile(args.save, save_path)
+    else:
+        storage.save_player(make_player(args.synthetic, seed=args.seed), save_path)
+    return save_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded PC Box session and measure UI latency")
+    parser.add_argument("script", nargs="?", help="session recorded with main.py --record")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--save", help="replay against a copy of this save")
+    source.add_argument("--synthetic", type=int, default=10000, help="replay against a synthetic save of N Pokémon")
+    parser.add_argument("--generate", type=int, metavar="N", help="write a random session of N steps and exit")
+    parser.add_argument("-o", "--output", help="where --generate writes the session")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--think", action="store_true", help="keep the recorded pauses between actions")
+    parser.add_argument("--stall-ms", type=float, default=50.0, help="event-loop gap that counts as a stall")
+    parser.add_argument("--out", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="pcbox-replay-")
+    try:
+        save_path = prepare_save(args, workdir)
+
+        if args.generate:
+            if not args.output:
+                parser.error("--generate needs -o/--output")
+            player = Player()
+            storage.load_player(player, save_path)
+            write_script(args.output, generate_script(player, args.generate, args.seed))
+            storage.close_player(player)
+            print(f"Wrote {args.generate} steps to {args.output}")
+            return 0
+        if not args.script:
+            parser.error("a script to replay is required (or --generate)")
+        script = load_script(args.script)
+
+        try:
+            xvfb = ensure_display()
+        except RuntimeError as e:
+            print(f"skipped: no display ({e})")
+            return 1
+        try:
+            metrics.enable()
+            metrics.reset()
+            app = app_module.PCApp(Player(), save_path=save_path)
+            app.load_assets()
+            app.update()
+            replay = Replay(app, script, args.think, args.stall_ms)
+            elapsed = replay.run()
+            app.on_close()
+        finally:
+            if xvfb:
+                xvfb.terminate()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    params = {"script": os.path.basename(args.script), "save": os.path.basename(args.save) if args.save else f"synthetic-{args.synthetic}"}
+    results = summarize(replay, params)
+    print(f"{'action':<12} {'n':>5} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'saves':>6}")
+    for r in results:
+        print(
+            f"{r['name'][len('replay_'):]:<12} {r['count']:>5} {r['median_s'] * 1000:>9.2f} {r['p90_s'] * 1000:>9.2f}"
+            f" {r['p99_s'] * 1000:>9.2f} {r['max_s'] * 1000:>9.2f} {r['saves']:>6}"
+        )
+    worst = max(replay.stalls, default=0)
+    print(f"{len(script)} steps in {elapsed:.1f}s, {len(replay.stalls)} stalls > {args.stall_ms:g} ms (worst {worst * 1000:.0f} ms), "
+          f"{sum(replay.saves.values())} saves")
+    for error in replay.errors:
+        print(f"⚠️ {error}")
+
+    if args.out:
+        report = {
+            "meta": {
+                "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "think": args.think,
+                "stall_ms": args.stall_ms,
+            },
+            "results": results,
+            "stalls": {"count": len(replay.stalls), "max_s": worst},
+            "errors": replay.errors,
+        }
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
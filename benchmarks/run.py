@@ -0,0 +1,284 @@
+"""
+Standalone benchmark runner.
+
+    python -m benchmarks.run --sizes 100,10000,100000 --users 1000,100000 --out results.json
+    python -m benchmarks.compare baseline.json results.json --threshold 0.15
+
+Every benchmark runs against synthetic data from benchmarks.synthetic with a fixed seed,
+so two runs on the same machine are directly comparable.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# Allow `python benchmarks/run.py` as well as `python -m benchmarks.run`
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import auth
+import boxfile
+import sprites
+import storage
+from models.player import Player
+from smartbox import SmartBoxes
+from benchmarks import synthetic
+
+DEPOSITS = 1000
+
+
+def measure(fn, repeat: int, setup=None) -> dict:
+    """Call fn() repeat times (after setup(), untimed) and return timing stats in seconds."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {
+        "runs": repeat,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+    }
+
+
+class Runner:
+    def __init__(self, repeat: int, seed: int, workdir: str, boxes: int | None = None):
+        self.repeat = repeat
+        self.boxes = boxes
+        self.seed = seed
+        self.workdir = workdir
+        self.results = []
+
+    def record(self, name: str, params: dict, stats: dict, **extra):
+        entry = {"name": name, "params": params, **stats}
+        if extra:
+            entry["extra"] = extra
+        self.results.append(entry)
+        label = ",".join(f"{k}={v}" for k, v in params.items())
+        print(f"  {name:<26}{label:<22}{stats['median_s'] * 1000:11.3f} ms  {extra or ''}")
+
+    def skip(self, name: str, params: dict, reason: str):
+        self.results.append({"name": name, "params": params, "skipped": reason})
+        print(f"  {name:<26}skipped: {reason}")
+
+    # ---------------- Collections ----------------
+    def bench_collection(self, total: int):
+        repeat = self.repeat if total <= 100_000 else 1
+        player = synthetic.make_player(total, boxes=self.boxes, seed=self.seed)
+        params = {"pokemon": total, "boxes": len(player.boxes)}
+        path = os.path.join(self.workdir, f"save_{total}.json")
+
+        stats = measure(lambda: storage.save_player(player, path), repeat)
+        self.record("save_game", params, stats, bytes=os.path.getsize(path))
+
+        stats = measure(lambda: storage.load_player(Player(), path), repeat)
+        self.record("load_game", params, stats)
+
+        # .pcbox: open + show the current box, then change one slot and save
+        mapped_path = os.path.join(self.workdir, f"save_{total}.pcbox")
+        boxfile.write_new(mapped_path, player)
+        mapped = Player()
+
+        def open_mapped():
+            storage.close_player(mapped)
+            storage.load_player(mapped, mapped_path)
+            mapped.get_current_box()
+
+        stats = measure(open_mapped, repeat)
+        self.record("load_mapped", params, stats, bytes=os.path.getsize(mapped_path))
+
+        def edit_mapped():
+            current = mapped.current_box
+            mapped.swap_slots(("box", current, 0), ("box", current, 1))
+            storage.save_player(mapped, mapped_path)
+
+        stats = measure(edit_mapped, repeat)
+        self.record("save_mapped", params, stats)
+        storage.close_player(mapped)
+        os.remove(mapped_path)
+
+        target = synthetic.SPECIES[0].lower()
+        stats = measure(
+            lambda: [m for *_, m in player.iter_pokemon() if m.name.lower() == target], repeat
+        )
+        self.record("search", params, stats)
+
+        stats = measure(
+            lambda: sorted((m for *_, m in player.iter_pokemon()), key=lambda m: (m.level, m.name)),
+            repeat,
+        )
+        self.record("sort", params, stats)
+        os.remove(path)
+
+        # deposit Pokémon one by one into the first free slot, then take them out
+        # again: free-slot index (Player.first_free_slot) vs. scanning the boxes
+        rng = random.Random(self.seed)
+        extra = [synthetic.make_pokemon(rng) for _ in range(DEPOSITS)]
+
+        def scan():
+            for b, box in enumerate(player.boxes):
+                for i, mon in enumerate(box.pokemon):
+                    if mon is None:
+                        return ("box", b, i)
+            return None
+
+        def deposit(find):
+            placed = []
+            for mon in extra:
+                loc = find()
+                if loc is None:
+                    break
+                player.set_slot(loc, mon)
+                placed.append(loc)
+            for loc in placed:
+                player.set_slot(loc, None)
+
+        self.record("deposit_index", params, measure(lambda: deposit(player.first_free_slot), repeat), deposits=DEPOSITS)
+        self.record("deposit_scan", params, measure(lambda: deposit(scan), repeat), deposits=DEPOSITS)
+
+        # smart box "Dragon types above level 50": first full pass, opening a
+        # page (vs. next_box on a real box) and keeping it up to date on edits
+        player.smart_boxes = [{"name": "Dragons", "query": "type:Dragon level>50"}]
+        smart = SmartBoxes(player)
+
+        def rebuild():
+            smart.dirty = True
+            smart.ensure()
+
+        self.record("smart_box_build", params, measure(rebuild, repeat), members=smart.count(0))
+
+        def next_box():
+            player.set_current_box((player.current_box + 1) % len(player.boxes))
+            return list(player.get_current_box().pokemon)
+
+        self.record("next_box", params, measure(next_box, self.repeat))
+        self.record("smart_box_open", params, measure(
+            lambda: [player.get_slot(loc) for loc in smart.page(0, smart.page_count(0) // 2)], self.repeat
+        ))
+        mons = [mon for *_, mon in player.iter_pokemon()][:DEPOSITS]
+        self.record("smart_box_edits", params, measure(
+            lambda: [player.edit_pokemon(mon, {"level": rng.randint(1, 100)}) for mon in mons], repeat
+        ), edits=len(mons))
+        player.listeners.remove(smart)
+
+    # ---------------- Auth ----------------
+    def bench_login(self, count: int):
+        params = {"users": count}
+        path = os.path.join(self.workdir, f"users_{count}.json")
+        synthetic.write_users(path, synthetic.make_users(count, seed=self.seed))
+        last = count - 1
+        old_path = auth.USERS_PATH
+        auth.USERS_PATH = path
+        try:
+            ok, _ = auth.verify_user(f"trainer{last:07d}", f"pw{last}")
+            if not ok:
+                raise RuntimeError("synthetic login failed")
+            stats = measure(
+                lambda: auth.verify_user(f"trainer{last:07d}", f"pw{last}"),
+                self.repeat if count <= 100_000 else 1,
+            )
+            self.record("login", params, stats, bytes=os.path.getsize(path))
+        finally:
+            auth.USERS_PATH = old_path
+            os.remove(path)
+
+    # ---------------- Sprites ----------------
+    def bench_sprites(self):
+        sprite_dir = os.path.join(ROOT, "assets", "sprites")
+        files = sorted(os.path.join(sprite_dir, f) for f in os.listdir(sprite_dir) if f.endswith(".png"))
+        params = {"sprites": len(files)}
+        try:
+            sprites._pil()
+        except ImportError:
+            self.skip("sprite_cold", params, "PIL not installed")
+            return
+
+        cache = {}
+
+        def cold():
+            cache.clear()
+            for path in files:
+                cache[path] = sprites.decode_sprite(path, (60, 60))
+
+        def warm():
+            for path in files:
+                cache[path]
+
+        self.record("sprite_cold", params, measure(cold, self.repeat))
+        self.record("sprite_warm", params, measure(warm, self.repeat))
+
+        # one oversized user sprite (e.g. from Downloads) shown in a 60x60 slot
+        Image, _ = sprites._pil()
+        big = os.path.join(self.workdir, "oversized.png")
+        Image.radial_gradient("L").resize((2400, 2400)).convert("RGBA").save(big)
+        params = {"source_px": 2400}
+        self.record(
+            "sprite_oversized_full",
+            params,
+            measure(lambda: Image.open(big).convert("RGBA").resize((60, 60), Image.Resampling.LANCZOS), self.repeat),
+        )
+        self.record("sprite_oversized_reduced", params, measure(lambda: sprites.decode_sprite(big, (60, 60)), self.repeat))
+        level = sprites.build_mipmaps(big)[60]
+        self.record("sprite_oversized_mip", params, measure(lambda: sprites.decode_sprite(level, (60, 60)), self.repeat))
+        os.remove(big)
+
+
+def parse_sizes(text: str) -> list[int]:
+    return [int(s.replace("_", "")) for s in text.split(",") if s.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the PC box benchmark suite")
+    parser.add_argument("--sizes", default="100,10000,100000", help="collection sizes (Pokémon), comma-separated")
+    parser.add_argument("--boxes", type=int, help="fixed box count (default: enough boxes to be ~90%% full)")
+    parser.add_argument("--users", default="1000,100000", help="user store sizes, comma-separated")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark (1 for sizes > 100k)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="pcbox-bench-")
+    runner = Runner(args.repeat, args.seed, workdir, boxes=args.boxes)
+    try:
+        for total in parse_sizes(args.sizes):
+            print(f"Collection of {total} Pokémon")
+            runner.bench_collection(total)
+        for count in parse_sizes(args.users):
+            print(f"User store of {count} users")
+            runner.bench_login(count)
+        print("Sprites")
+        runner.bench_sprites()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "boxes": args.boxes,
+        },
+        "results": runner.results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Several processes editing and saving one save file at the same time.
+
+Each writer loads the save, then repeatedly makes a few edits (adds a
+Pokémon with a writer-tagged uid, sometimes into a box it appends, swaps two
+slots, changes a level) and saves.
+When another writer got there first, save_player raises SaveConflict and the
+writer rebases (storage.rebase_player) before carrying on. At the end the
+save is checked for lost updates: every added Pokémon must be present
+exactly once.
+
+    python -m benchmarks.save_contention --writers 4 --rounds 50
+    python -m benchmarks.save_contention --format pcbox --size 20000
+
+Also times uncontended saves with and without the lock/version check, to
+show what the check costs a single user, and replays one fixed race: a
+writer appends a box, another saves first, the first rebases; the appended
+box and its Pokémon must survive.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import storage
+from benchmarks.synthetic import make_player, make_pokemon
+from models.box import PCBox
+from models.player import Player
+
+
+def edit(player, rng, writer: int, n: int) -> str:
+    """One random edit. Returns the uid of an added Pokémon, if any."""
+    roll = rng.random()
+    if roll < 0.02:
+        player.boxes.append(PCBox(f"w{writer} box {n}"))
+        mon = make_pokemon(rng)
+        mon.uid = f"w{writer}-{n}"
+        player.set_slot(("box", len(player.boxes) - 1, 0), mon)
+        return mon.uid
+    index = rng.randrange(len(player.boxes))
+    box = player.boxes[index]
+    if roll < 0.5:
+        free = [i for i, mon in enumerate(box.pokemon) if mon is None]
+        if free:
+            mon = make_pokemon(rng)
+            mon.uid = f"w{writer}-{n}"
+            player.set_slot(("box", index, rng.choice(free)), mon)
+            return mon.uid
+    elif roll < 0.8:
+        player.swap_slots(("box", index, rng.randrange(30)), ("box", index, rng.randrange(30)))
+    else:
+        mons = [mon for mon in box.pokemon if mon]
+        if mons:
+            rng.choice(mons).level = rng.randint(1, 100)
+    return None
+
+
+def writer(path: str, index: int, rounds: int, edits: int, seed: int, barrier, results):
+    rng = random.Random(seed * 1000 + index)
+    player = Player()
+    storage.load_player(player, path)
+    added, latencies = [], []
+    conflicts = rebases = 0
+    barrier.wait()
+    for r in range(rounds):
+        for e in range(edits):
+            uid = edit(player, rng, index, r * edits + e)
+            if uid:
+                added.append(uid)
+        start = time.perf_counter()
+        try:
+            storage.save_player(player, path)
+        except storage.SaveConflict:
+            rebases += 1
+            conflicts += len(storage.rebase_player(player, path))
+        latencies.append(time.perf_counter() - start)
+    storage.close_player(player)
+    results.put({"writer": index, "added": added, "rebases": rebases, "conflicts": conflicts, "latencies": latencies})
+
+
+def check(path: str, added: list[str]) -> dict:
+    player = Player()
+    storage.load_player(player, path)
+    counts = Counter(mon.uid for *_, mon in player.iter_pokemon())
+    storage.close_player(player)
+    return {
+        "lost": sorted(uid for uid in added if counts[uid] == 0),
+        "duplicated": sorted(uid for uid, n in counts.items() if uid and n > 1),
+        "version": storage.read_version(path),
+    }
+
+
+def solo(path: str, repeat: int) -> tuple[float, float]:
+    """Median seconds per save: storage.save_player vs. the same write without lock or version check."""
+    player = Player()
+    storage.load_player(player, path)
+    checked, unchecked = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        storage.save_player(player, path)
+        checked.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        storage._write(player, path, player.save_version + 1)
+        unchecked.append(time.perf_counter() - start)
+    storage.close_player(player)
+    return statistics.median(checked), statistics.median(unchecked)
+
+
+def appended_box_race(path: str) -> bool:
+    """A appends a box and fills a slot in it, B saves first, A rebases: A's box must be in the result."""
+    a, b = Player(), Player()
+    storage.load_player(a, path)
+    storage.load_player(b, path)
+    boxes_before = len(a.boxes)
+    src = next(("box", i, s) for _, i, s, _ in a.iter_pokemon() if i is not None)
+    mon = a.set_slot(src, None)
+    moved = mon.uid = "race-moved"
+    box = PCBox("A's new box")
+    box.add_pokemon(mon, 0)
+    a.boxes.append(box)
+    b.set_slot(next(("box", i, s) for _, i, s, _ in b.iter_pokemon() if i is not None and (i, s) != src[1:]), None)
+    storage.save_player(b, path)
+    try:
+        storage.save_player(a, path)
+    except storage.SaveConflict:
+        storage.rebase_player(a, path)
+    storage.close_player(a)
+    storage.close_player(b)
+
+    result = Player()
+    storage.load_player(result, path)
+    count = len(result.boxes)
+    found = [(i, s) for _, i, s, mon in result.iter_pokemon() if mon.uid == moved]
+    storage.close_player(result)
+    return count == boxes_before + 1 and found == [(boxes_before, 0)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent writers on one save")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=50, help="saves per writer")
+    parser.add_argument("--edits", type=int, default=3, help="edits between saves")
+    parser.add_argument("--size", type=int, default=2000, help="Pokémon in the starting save")
+    parser.add_argument("--format", choices=("json", "pcbox"), default="json")
+    parser.add_argument("--repeat", type=int, default=50, help="uncontended saves to time")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="pcbox-contention-")
+    try:
+        path = os.path.join(workdir, f"save.{args.format}")
+        storage.save_player(make_player(args.size, seed=args.seed), path)
+
+        checked, unchecked = solo(path, args.repeat)
+        print(f"uncontended save: {checked * 1000:.2f} ms with lock + version check, "
+              f"{unchecked * 1000:.2f} ms without ({(checked / unchecked - 1) * 100:+.1f}%)")
+        race_kept = appended_box_race(path)
+        print(f"box appended during a concurrent save: {'kept' if race_kept else 'LOST'}")
+
+        barrier = multiprocessing.Barrier(args.writers)
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=writer, args=(path, i, args.rounds, args.edits, args.seed, barrier, results))
+            for i in range(args.writers)
+        ]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        outcomes = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        added = [uid for o in outcomes for uid in o["added"]]
+        latencies = sorted(t for o in outcomes for t in o["latencies"])
+        result = check(path, added)
+        saves = args.writers * args.rounds
+        print(f"{args.writers} writers × {args.rounds} saves in {elapsed:.2f}s ({saves / elapsed:.0f} saves/s)")
+        print(f"save latency: p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+        print(f"rebases: {sum(o['rebases'] for o in outcomes)}, merge conflicts: {sum(o['conflicts'] for o in outcomes)}, "
+              f"final version {result['version']}")
+        print(f"added {len(added)}: {len(result['lost'])} lost, {len(result['duplicated'])} duplicated")
+        return 1 if result["lost"] or result["duplicated"] or not race_kept else 0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
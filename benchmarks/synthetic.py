@@ -0,0 +1,83 @@
+"""
+Deterministic synthetic data for benchmarks: players with large collections
+and user stores with many accounts. The same seed always gives the same data.
+"""
+import json
+import os
+import random
+
+from models.pokemon import Pokemon
+from models.box import PCBox
+from models.player import Player
+
+SPECIES = [
+    "Bulbasaur", "Venusaur", "Charizard", "Sylveon", "Zoroark", "Latios",
+    "Regigigas", "Dondozo", "Urshifu", "Aegislash", "Garchomp", "Gengar",
+    "Dragonite", "Tyranitar", "Metagross", "Salamence", "Lucario", "Togekiss",
+]
+TYPES = [
+    "Normal", "Fire", "Water", "Grass", "Electric", "Ice", "Fighting", "Poison", "Ground",
+    "Flying", "Psychic", "Bug", "Rock", "Ghost", "Dragon", "Dark", "Steel", "Fairy",
+]
+MOVES = [
+    "Earthquake", "Protect", "Dragon Dance", "Swords Dance", "Recover", "Ice Beam",
+    "Thunderbolt", "Flamethrower", "Shadow Ball", "Moonblast", "Close Combat",
+    "Stealth Rock", "U-turn", "Knock Off", "Hyper Voice", "Nasty Plot",
+]
+ITEMS = [None, "Leftovers", "Choice Scarf", "Life Orb", "Focus Sash", "Charizardite X", "Latiosite"]
+
+
+def make_pokemon(rng: random.Random) -> Pokemon:
+    """Return a random Pokémon using only the built-in sprite naming scheme."""
+    name = rng.choice(SPECIES)
+    ptype = rng.choice(TYPES)
+    if rng.random() < 0.4:
+        ptype += "," + rng.choice(TYPES)
+    return Pokemon(
+        name,
+        rng.randint(1, 100),
+        ptype,
+        moves=rng.sample(MOVES, rng.randint(1, 4)),
+        item=rng.choice(ITEMS),
+    )
+
+
+def make_player(total: int, boxes: int | None = None, seed: int = 0, fill: float = 0.9) -> Player:
+    """
+    Return a Player holding `total` Pokémon spread across the boxes.
+    If boxes is None, just enough boxes are created for each to be ~fill full.
+    """
+    rng = random.Random(seed)
+    capacity = 30
+    if boxes is None:
+        boxes = max(3, -(-total // max(1, int(capacity * fill))))
+    slots = boxes * capacity
+    if total > slots:
+        raise ValueError(f"{total} Pokémon do not fit in {boxes} boxes")
+
+    player = Player()
+    player.boxes = [PCBox(f"Box {i + 1}") for i in range(boxes)]
+    for i in range(min(4, total)):
+        player.party[i] = make_pokemon(rng)
+    for index in sorted(rng.sample(range(slots), total - min(4, total))):
+        player.boxes[index // capacity].add_pokemon(make_pokemon(rng), index % capacity)
+    return player
+
+
+def make_users(count: int, seed: int = 0) -> dict:
+    """Return a user map { username -> stored hash } with count users."""
+    import auth
+
+    rng = random.Random(seed)
+    users = {}
+    for i in range(count):
+        name = f"trainer{i:07d}"
+        # one real hash is enough; the rest only need plausible values
+        users[name] = auth._hash_password(f"pw{i}") if i == count - 1 else "%064x" % rng.getrandbits(256)
+    return users
+
+
+def write_users(path: str, users: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(users, f, indent=2)
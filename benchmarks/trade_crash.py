@@ -0,0 +1,157 @@
+"""
+Crash checks for trade.py: a process dies at each point of a transfer and
+recover() must leave every Pokémon in exactly one save.
+
+  prepare       dies after writing the first side file: rolled back, both
+                saves unchanged, no side files left
+  roll-forward  dies after renaming the first side file over its save:
+                rolled forward, the trade completes
+  stale-read    recover() reads a "prepared" journal, then waits for the
+                locks while the owner commits and dies mid roll-forward:
+                recover() must roll forward, not back
+
+Exits non-zero if any check fails.
+
+    python -m benchmarks.trade_crash
+    python -m benchmarks.trade_crash --format pcbox
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import storage
+import trade
+from benchmarks.synthetic import make_player
+from benchmarks.trade_stress import read_uids
+from models.pokemon import new_uid
+from savelock import SaveLock
+
+CRASHED = 3  # exit code of a child that died where it was told to
+
+
+def make_saves(workdir: str, fmt: str, size: int) -> list[str]:
+    paths = []
+    for u in range(2):
+        player = make_player(size, seed=u)
+        for *_, mon in player.iter_pokemon():
+            mon.uid = new_uid()
+        path = os.path.join(workdir, f"user{u}.{fmt}")
+        storage.save_player(player, path)
+        storage.close_player(player)
+        paths.append(path)
+    return paths
+
+
+def crashing_transfer(paths, uids, journal_dir, where):
+    """Run in a child: a transfer that dies at `where` without cleaning up."""
+    if where == "prepare":
+        prepare, calls = trade._prepare, []
+
+        def dying_prepare(*args):
+            if calls:
+                os._exit(CRASHED)
+            calls.append(args)
+            prepare(*args)
+        trade._prepare = dying_prepare
+    elif where == "roll-forward":
+        def dying_roll_forward(journal):
+            path, prepared = journal["files"][0]
+            os.replace(prepared, path)
+            os._exit(CRASHED)
+        trade._roll_forward = dying_roll_forward
+    else:   # commit: die just before the commit point
+        write = trade._write_journal
+
+        def dying_write(journal_dir, journal):
+            if journal["state"] == "committed":
+                os._exit(CRASHED)
+            write(journal_dir, journal)
+        trade._write_journal = dying_write
+    trade.transfer([trade.Trade(paths[0], paths[1], uids)], journal_dir)
+
+
+def crash(paths, uids, journal_dir, where):
+    child = multiprocessing.Process(target=crashing_transfer, args=(paths, uids, journal_dir, where))
+    child.start()
+    child.join()
+    if child.exitcode != CRASHED:
+        raise RuntimeError(f"transfer did not crash at {where} (exit code {child.exitcode})")
+
+
+def stale_read(paths, uids, journal_dir):
+    """Leave a prepared transaction, then commit it while recover() waits for the locks."""
+    crash(paths, uids, journal_dir, "commit")
+    [journal_path] = glob.glob(os.path.join(journal_dir, "*.json"))
+    journal = trade._read_journal(journal_path)
+    with ExitStack() as locks:
+        for path in sorted(paths):
+            locks.enter_context(SaveLock(path))
+        recoverer = threading.Thread(target=trade.recover, args=(journal_dir,))
+        recoverer.start()
+        time.sleep(0.3)     # recover() has read "prepared" and is blocked on the locks
+        journal["state"] = "committed"
+        trade._write_journal(journal_dir, journal)
+        path, prepared = journal["files"][0]
+        os.replace(prepared, path)
+    recoverer.join()
+
+
+def check(name, fmt, size, expect_moved) -> bool:
+    workdir = tempfile.mkdtemp(prefix="pcbox-trade-crash-")
+    try:
+        paths = make_saves(workdir, fmt, size)
+        journal_dir = os.path.join(workdir, "trades")
+        before = [read_uids(path) for path in paths]
+        uids = before[0][:3]
+        if name == "stale-read":
+            stale_read(paths, uids, journal_dir)
+        else:
+            crash(paths, uids, journal_dir, name)
+            trade.recover(journal_dir)
+
+        after = [read_uids(path) for path in paths]
+        counts = Counter(uid for uids_in in after for uid in uids_in)
+        moved = all(uid in after[1] and uid not in after[0] for uid in uids)
+        kept = all(uid in after[0] and uid not in after[1] for uid in uids)
+        problems = []
+        if any(n > 1 for n in counts.values()) or set(counts) != {u for b in before for u in b}:
+            problems.append("Pokémon lost or duplicated")
+        if not (moved if expect_moved else kept):
+            problems.append("trade " + ("not completed" if expect_moved else "not rolled back"))
+        leftovers = glob.glob(os.path.join(workdir, "*.trade-*")) + glob.glob(os.path.join(journal_dir, "*"))
+        if leftovers:
+            problems.append(f"left behind: {', '.join(os.path.basename(p) for p in leftovers)}")
+        print(f"{name:<13} {'ok' if not problems else 'FAILED: ' + '; '.join(problems)}")
+        return not problems
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crash a trade at each step and check recovery")
+    parser.add_argument("--format", choices=("json", "pcbox"), default="json")
+    parser.add_argument("--size", type=int, default=200, help="Pokémon per user")
+    args = parser.parse_args(argv)
+
+    results = [
+        check("prepare", args.format, args.size, expect_moved=False),
+        check("roll-forward", args.format, args.size, expect_moved=True),
+        check("stale-read", args.format, args.size, expect_moved=True),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Concurrent trades between many users' saves (trade.py).
+
+Each worker process repeatedly picks a batch of random trades among the
+users (random givers and receivers, a few Pokémon each) and runs it as one
+transaction. Batches overlap on saves in every order, so without ordered
+locking they would deadlock; a LockTimeout is counted as one. A trade
+naming a Pokémon another worker already moved away fails as a whole
+(TradeError) and is counted as stale.
+
+At the end every uid must still exist exactly once across all saves, and
+the number of Pokémon must be unchanged.
+
+    python -m benchmarks.trade_stress --users 8 --workers 4 --batch 1 5 20
+    python -m benchmarks.trade_stress --format pcbox --size 2000
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import storage
+import trade
+from benchmarks.synthetic import make_player
+from models.player import Player
+from models.pokemon import new_uid
+from savelock import LockTimeout
+
+
+def read_uids(path: str) -> list[str]:
+    player = Player()
+    storage.load_player(player, path)
+    uids = [mon.uid for *_, mon in player.iter_pokemon()]
+    storage.close_player(player)
+    return uids
+
+
+def worker(paths, journal_dir, index, transactions, batch, per_trade, seed, barrier, results):
+    rng = random.Random(seed * 1000 + index)
+    known = {path: read_uids(path) for path in paths}
+    latencies = []
+    moved = stale = timeouts = 0
+    barrier.wait()
+    for _ in range(transactions):
+        trades = []
+        for _ in range(batch):
+            giver, receiver = rng.sample(paths, 2)
+            pool = known[giver]
+            uids = rng.sample(pool, min(per_trade, len(pool)))
+            for uid in uids:
+                pool.remove(uid)        # don't pick it twice in one batch
+            trades.append(trade.Trade(giver, receiver, uids))
+        start = time.perf_counter()
+        try:
+            moved += trade.transfer(trades, journal_dir)
+        except trade.TradeError:
+            stale += 1
+        except LockTimeout:
+            timeouts += 1
+        latencies.append(time.perf_counter() - start)
+        for path in {p for t in trades for p in (t.giver, t.receiver)}:
+            known[path] = read_uids(path)
+    results.put({"latencies": latencies, "moved": moved, "stale": stale, "timeouts": timeouts})
+
+
+def census(paths) -> Counter:
+    return Counter(uid for path in paths for uid in read_uids(path))
+
+
+def run(args, batch: int) -> dict:
+    workdir = tempfile.mkdtemp(prefix="pcbox-trades-")
+    try:
+        paths = []
+        for u in range(args.users):
+            player = make_player(args.size, seed=args.seed + u)
+            for *_, mon in player.iter_pokemon():
+                mon.uid = new_uid()
+            path = os.path.join(workdir, f"user{u}.{args.format}")
+            storage.save_player(player, path)
+            storage.close_player(player)
+            paths.append(path)
+        journal_dir = os.path.join(workdir, "trades")
+        before = census(paths)
+
+        # same number of trades whatever the batch size
+        transactions = max(1, args.trades // batch)
+        barrier = multiprocessing.Barrier(args.workers)
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=worker, args=(
+                paths, journal_dir, i, transactions, batch, args.per_trade, args.seed, barrier, results))
+            for i in range(args.workers)
+        ]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        outcomes = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        after = census(paths)
+        latencies = sorted(t for o in outcomes for t in o["latencies"])
+        committed = len(latencies) - sum(o["stale"] + o["timeouts"] for o in outcomes)
+        return {
+            "batch": batch,
+            "transactions": len(latencies),
+            "committed": committed,
+            "stale": sum(o["stale"] for o in outcomes),
+            "timeouts": sum(o["timeouts"] for o in outcomes),
+            "moved": sum(o["moved"] for o in outcomes),
+            "seconds": elapsed,
+            "trades_per_s": committed * batch / elapsed,
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+            "lost": sorted(set(before) - set(after)),
+            "duplicated": sorted(uid for uid, n in after.items() if n > 1),
+            "conserved": sum(before.values()) == sum(after.values()),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent batched trades between users")
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--trades", type=int, default=200, help="trades per worker")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 5, 20], help="trades per transaction")
+    parser.add_argument("--per-trade", type=int, default=2, help="Pokémon per trade")
+    parser.add_argument("--size", type=int, default=500, help="Pokémon per user")
+    parser.add_argument("--format", choices=("json", "pcbox"), default="json")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for batch in args.batch:
+        r = run(args, batch)
+        print(f"batch {batch:>3}: {r['committed']}/{r['transactions']} transactions committed in {r['seconds']:.2f}s, "
+              f"{r['trades_per_s']:.0f} trades/s, p50 {r['p50_ms']:.1f} ms, p99 {r['p99_ms']:.1f} ms; "
+              f"{r['stale']} stale, {r['timeouts']} lock timeouts")
+        print(f"           {r['moved']} Pokémon moved: {len(r['lost'])} lost, {len(r['duplicated'])} duplicated, "
+              f"count {'conserved' if r['conserved'] else 'CHANGED'}")
+        failed |= bool(r["lost"] or r["duplicated"] or not r["conserved"] or r["timeouts"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
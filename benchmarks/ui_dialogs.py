@@ -0,0 +1,85 @@
+"""
+Open latency of the Pokémon info/editor windows: rebuilding a window per
+click (how show_pokemon/edit_pokemon used to work, sprites decoded each time)
+versus re-binding the pooled window with cached previews.
+
+    python -m benchmarks.ui_dialogs --repeat 50
+
+Needs a display (use xvfb-run on headless machines).
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tkinter as tk
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import main as app_module
+from models.player import Player
+from models.pokemon import Pokemon
+from panels import PokemonEditorPanel, PokemonInfoPanel
+
+
+def timed_opens(app, open_once, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        open_once()
+        app.update_idletasks()
+        times.append(time.perf_counter() - start)
+    return {"median_ms": statistics.median(times) * 1000, "max_ms": max(times) * 1000}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure info/editor window open latency")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    save_path = os.path.join(tempfile.mkdtemp(prefix="pcbox-ui-"), "save.json")
+    try:
+        app = app_module.PCApp(Player(), save_path=save_path)
+    except tk.TclError as e:
+        print(f"skipped: no display ({e})")
+        return 1
+    app.load_assets()
+    mon = Pokemon(
+        "Venusaur", 80, "Grass,Poison", sprite="assets/sprites/venusaur.png", moves=["Giga Drain"],
+        alt_form_name="Gigantamax", alt_sprite="assets/sprites/venusaur-gigantamax.png",
+    )
+
+    def rebuild(cls, *extra):
+        def open_once():
+            app.preview_cache.clear()
+            panel = cls(app, *extra)
+            panel.show(mon)
+            panel.close()
+            panel.destroy()
+        return open_once
+
+    def pooled(panel):
+        def open_once():
+            panel.show(mon)
+            panel.close()
+        return open_once
+
+    app.build_panels()
+    limits = (app_module.MIN_LEVEL, app_module.MAX_LEVEL)
+    results = {
+        "info rebuilt per click": timed_opens(app, rebuild(PokemonInfoPanel), args.repeat),
+        "info pooled": timed_opens(app, pooled(app.info_panel), args.repeat),
+        "editor rebuilt per click": timed_opens(app, rebuild(PokemonEditorPanel, *limits), args.repeat),
+        "editor pooled": timed_opens(app, pooled(app.editor_panel), args.repeat),
+    }
+    for name, r in results.items():
+        print(f"{name:<26}median {r['median_ms']:8.2f} ms   max {r['max_ms']:8.2f} ms")
+    app.destroy()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
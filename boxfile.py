@@ -0,0 +1,502 @@
+"""
+Random-access binary save format (.pcbox) for very large collections.
+
+The file is memory-mapped; opening it reads only the fixed header, and a box
+is decoded the first time it is accessed. Every slot is a fixed-size record,
+so changing one slot rewrites just that record.
+
+Layout (little-endian):
+    header       64 bytes  magic, version, box count, capacity, record size,
+                           party slots, current box, box table offset,
+                           save version (bumped by every save, see storage.py),
+                           offset and length of the metadata blob (0 = none),
+                           dead bytes (heap and old box tables nothing points to)
+    party        party_slots * RECORD_SIZE
+    box segment  NAME_SIZE bytes of box name + capacity * RECORD_SIZE   (one per box)
+    box table    box_count * u64 segment offsets
+    heap         overflow payloads for records larger than a slot, and the
+                 metadata blob: compact JSON of save-wide settings ({"smart_boxes": [...]})
+
+A payload that no longer fits its old heap extent is appended, leaving the
+old copy dead; sync() rewrites the file without them once they pass
+COMPACT_RATIO of it.
+
+Each record is [u8 kind][pad][u16 length][payload]: kind 0 is an empty slot,
+1 an inline compact-JSON Pokémon, 2 a (u64 offset, u32 length) pointer into the heap.
+
+    python boxfile.py convert data/saves/maro.json      # -> data/saves/maro.pcbox
+    python boxfile.py export data/saves/maro.pcbox out.json
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+
+from models.pokemon import Pokemon
+from models.box import PCBox
+
+MAGIC = b"PCBOX\x00\x00\x01"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIIIIIQ")
+HEADER_SIZE = 64
+RECORD_SIZE = 512
+NAME_SIZE = 32
+PARTY_SLOTS = 6
+RECORD_HEAD = struct.Struct("<BxH")
+POINTER = struct.Struct("<QI")
+TABLE_ENTRY = struct.Struct("<Q")
+SAVE_VERSION = struct.Struct("<Q")  # right after HEADER; zero in files written before it existed
+META = struct.Struct("<QI")         # after SAVE_VERSION: metadata blob (offset, length); zero if none
+META_AT = HEADER.size + SAVE_VERSION.size
+DEAD = struct.Struct("<I")          # after META: bytes no longer referenced; zero in older files
+DEAD_AT = META_AT + META.size
+COMPACT_RATIO = 0.25                # sync() compacts once this share of the file is dead
+COMPACT_MIN = 64 * 1024             # ... and it is at least this many bytes
+
+EMPTY, INLINE, OVERFLOW = 0, 1, 2
+INLINE_MAX = RECORD_SIZE - RECORD_HEAD.size
+
+
+def encode(mon) -> bytes | None:
+    """Compact JSON payload for a Pokémon (None for an empty slot)."""
+    if not mon:
+        return None
+    return json.dumps(mon.__dict__, separators=(",", ":")).encode()
+
+
+def decode(payload: bytes | None):
+    return Pokemon.from_dict(json.loads(payload)) if payload else None
+
+
+def _encode_name(name: str) -> bytes:
+    return name.encode()[:NAME_SIZE].ljust(NAME_SIZE, b"\x00")
+
+
+class MappedSave:
+    """An open .pcbox file. Reads and writes go straight through the memory map."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._open()
+
+    def _open(self):
+        path = self.path
+        self.f = open(path, "r+b")
+        self.mm = mmap.mmap(self.f.fileno(), 0)
+        magic, version, self.box_count, self.capacity, record_size, self.party_slots, self._current_box, \
+            self.table_offset = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} .pcbox save")
+        self.save_version = SAVE_VERSION.unpack_from(self.mm, HEADER.size)[0]
+        self.meta_offset, self.meta_length = META.unpack_from(self.mm, META_AT)
+        self.dead_bytes = DEAD.unpack_from(self.mm, DEAD_AT)[0]
+        self.box_size = NAME_SIZE + self.capacity * RECORD_SIZE
+
+    def close(self):
+        self.mm.close()
+        self.f.close()
+
+    def flush(self):
+        self.mm.flush()
+
+    def _write_header(self):
+        HEADER.pack_into(
+            self.mm, 0, MAGIC, FORMAT_VERSION, self.box_count, self.capacity, RECORD_SIZE,
+            self.party_slots, self._current_box, self.table_offset,
+        )
+        SAVE_VERSION.pack_into(self.mm, HEADER.size, self.save_version)
+        META.pack_into(self.mm, META_AT, self.meta_offset, self.meta_length)
+        DEAD.pack_into(self.mm, DEAD_AT, self.dead_bytes)
+
+    @property
+    def current_box(self) -> int:
+        return self._current_box
+
+    @current_box.setter
+    def current_box(self, value: int):
+        if value != self._current_box:
+            self._current_box = value
+            self._write_header()
+
+    # ---------------- Offsets ----------------
+    def box_offset(self, box_index: int) -> int:
+        return TABLE_ENTRY.unpack_from(self.mm, self.table_offset + box_index * TABLE_ENTRY.size)[0]
+
+    def slot_offset(self, box_index: int | None, slot: int) -> int:
+        """Offset of a record; box_index None means the party."""
+        if box_index is None:
+            return HEADER_SIZE + slot * RECORD_SIZE
+        return self.box_offset(box_index) + NAME_SIZE + slot * RECORD_SIZE
+
+    # ---------------- Records ----------------
+    def read_record(self, offset: int) -> bytes | None:
+        kind, length = RECORD_HEAD.unpack_from(self.mm, offset)
+        if kind == EMPTY:
+            return None
+        start = offset + RECORD_HEAD.size
+        if kind == OVERFLOW:
+            start, length = POINTER.unpack_from(self.mm, start)
+        return self.mm[start:start + length]
+
+    def write_record(self, offset: int, payload: bytes | None) -> int:
+        """Overwrite one record in place. Returns the number of bytes written."""
+        kind, _ = RECORD_HEAD.unpack_from(self.mm, offset)
+        old_offset, old_length = POINTER.unpack_from(self.mm, offset + RECORD_HEAD.size) if kind == OVERFLOW else (0, 0)
+        if payload is None or len(payload) <= INLINE_MAX:
+            self._discard(old_length)
+        if payload is None:
+            self.mm[offset:offset + RECORD_HEAD.size] = RECORD_HEAD.pack(EMPTY, 0)
+            return RECORD_HEAD.size
+        if len(payload) <= INLINE_MAX:
+            record = RECORD_HEAD.pack(INLINE, len(payload)) + payload
+            self.mm[offset:offset + len(record)] = record
+            return len(record)
+        # too big for a slot: store it in the heap (over the old copy if it fits) and point to it
+        heap_offset = self._store(payload, old_offset, old_length)
+        record = RECORD_HEAD.pack(OVERFLOW, POINTER.size) + POINTER.pack(heap_offset, len(payload))
+        self.mm[offset:offset + len(record)] = record
+        return len(record) + len(payload)
+
+    def _store(self, data: bytes, old_offset: int, old_length: int) -> int:
+        """Put data in the heap extent it replaces if it fits, else append it. Returns its offset."""
+        if old_length and len(data) <= old_length:
+            self.mm[old_offset:old_offset + len(data)] = data
+            self._discard(old_length - len(data))
+            return old_offset
+        self._discard(old_length)
+        return self._append(data)
+
+    def _discard(self, length: int):
+        """Count length bytes of the file as no longer referenced."""
+        if length:
+            self.dead_bytes += length
+            DEAD.pack_into(self.mm, DEAD_AT, self.dead_bytes)
+
+    def _append(self, data: bytes) -> int:
+        """Append data at the end of the file and remap. Returns its offset."""
+        self.mm.flush()
+        self.f.seek(0, os.SEEK_END)
+        offset = self.f.tell()
+        self.f.write(data)
+        self.f.flush()
+        self.mm.close()
+        self.mm = mmap.mmap(self.f.fileno(), 0)
+        return offset
+
+    # ---------------- Boxes ----------------
+    def read_party(self) -> list[bytes | None]:
+        return [self.read_record(self.slot_offset(None, i)) for i in range(self.party_slots)]
+
+    def read_box_name(self, box_index: int) -> str:
+        offset = self.box_offset(box_index)
+        return bytes(self.mm[offset:offset + NAME_SIZE]).rstrip(b"\x00").decode(errors="ignore")
+
+    def read_box(self, box_index: int) -> tuple[str, list[bytes | None]]:
+        name = self.read_box_name(box_index)
+        records = [self.read_record(self.slot_offset(box_index, s)) for s in range(self.capacity)]
+        return name, records
+
+    def read_meta_blob(self) -> bytes:
+        return self.mm[self.meta_offset:self.meta_offset + self.meta_length] if self.meta_length else b""
+
+    def read_meta(self) -> dict:
+        blob = self.read_meta_blob()
+        return json.loads(blob) if blob else {}
+
+    def write_meta(self, blob: bytes) -> int:
+        """Store a new metadata blob (see meta_blob) unless it is unchanged. Returns bytes written."""
+        if blob == self.read_meta_blob():
+            return 0
+        if blob:
+            self.meta_offset, self.meta_length = self._store(blob, self.meta_offset, self.meta_length), len(blob)
+        else:
+            self._discard(self.meta_length)
+            self.meta_offset, self.meta_length = 0, 0
+        self._write_header()
+        return len(blob)
+
+    def free_mask(self, box_index: int) -> int:
+        """Bitmap of a box's empty slots (bit i = slot i), from the record kinds alone."""
+        start = self.slot_offset(box_index, 0)
+        kinds = self.mm[start:start + self.capacity * RECORD_SIZE:RECORD_SIZE]
+        return sum(1 << i for i, kind in enumerate(kinds) if kind == EMPTY)
+
+    def append_box(self, name: str, payloads: list[bytes | None]) -> int:
+        """Add a box segment and a relocated box table at the end of the file."""
+        segment = bytearray(self.box_size)
+        segment[:NAME_SIZE] = _encode_name(name)
+        seg_offset = self._append(bytes(segment))
+        for slot, payload in enumerate(payloads):
+            self.write_record(seg_offset + NAME_SIZE + slot * RECORD_SIZE, payload)
+
+        table = bytes(self.mm[self.table_offset:self.table_offset + self.box_count * TABLE_ENTRY.size])
+        self.table_offset = self._append(table + TABLE_ENTRY.pack(seg_offset))
+        self._discard(len(table))
+        self.box_count += 1
+        self._write_header()
+        return self.box_count - 1
+
+    # ---------------- Compaction ----------------
+    def needs_compact(self) -> bool:
+        return self.dead_bytes >= max(COMPACT_MIN, len(self.mm) * COMPACT_RATIO)
+
+    def compact(self) -> int:
+        """
+        Rewrite the file without dead bytes, copying records as stored (no
+        decoding), and map the new file. Returns its size.
+        """
+        boxes = [self.read_box(i) for i in range(self.box_count)]
+        tmp = self.path + ".tmp"
+        size = _write_file(
+            tmp, self.read_party(), boxes, self.capacity, self._current_box, self.save_version,
+            self.read_meta_blob(),
+        )
+        # Windows can't replace a file that is open or mapped
+        self.close()
+        try:
+            os.replace(tmp, self.path)
+        except OSError:
+            os.remove(tmp)
+            raise
+        finally:
+            self._open()
+        return size
+
+
+class MappedBoxes:
+    """
+    List-like stand-in for Player.boxes backed by a MappedSave.
+    Boxes are decoded on first access; sync() writes back only records that
+    changed. Appended boxes stay in memory until sync(), which runs under the
+    save's lock after the version check, like every other change.
+    """
+
+    def __init__(self, save: MappedSave):
+        self.save = save
+        self._boxes = {}    # box index -> PCBox
+        self._stored = {}   # box index -> payloads as last read/written
+        self._unsaved = 0   # boxes appended since the last sync, after the file's box_count
+        self.party_stored = save.read_party()
+
+    def __len__(self):
+        return self.save.box_count + self._unsaved
+
+    def __getitem__(self, index: int) -> PCBox:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("box index out of range")
+        box = self._boxes.get(index)
+        if box is None:
+            name, payloads = self.save.read_box(index)
+            box = PCBox(name, self.save.capacity)
+            box.pokemon = [decode(p) for p in payloads]
+            self._boxes[index] = box
+            self._stored[index] = payloads
+        return box
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def is_loaded(self, index: int) -> bool:
+        return index in self._boxes
+
+    def loaded(self):
+        """(index, PCBox) for the boxes decoded so far."""
+        return list(self._boxes.items())
+
+    def free_mask(self, index: int) -> int:
+        """Empty slots of a box as a bitmap (see PCBox.free_mask); boxes not decoded yet stay undecoded."""
+        box = self._boxes.get(index)
+        return box.free_mask if box is not None else self.save.free_mask(index)
+
+    def append(self, box: PCBox):
+        self._boxes[len(self)] = box
+        self._unsaved += 1
+
+    def unsaved(self) -> list[PCBox]:
+        """Boxes appended since the last sync, in order."""
+        return [self._boxes[i] for i in range(self.save.box_count, len(self))]
+
+    def pending(self, party: list) -> dict:
+        """Unsaved slots as {(box_index or None, slot): (payload on disk, new payload)}."""
+        changed = {}
+        for slot, mon in enumerate(party[:self.save.party_slots]):
+            payload = encode(mon)
+            if payload != self.party_stored[slot]:
+                changed[(None, slot)] = (self.party_stored[slot], payload)
+        for index, box in self._boxes.items():
+            stored = self._stored.get(index)
+            if stored is None:
+                continue    # appended; written whole by sync()
+            for slot, mon in enumerate(box.pokemon):
+                payload = encode(mon)
+                if payload != stored[slot]:
+                    changed[(index, slot)] = (stored[slot], payload)
+        return changed
+
+    def sync(self, party: list, current_box: int, version: int | None = None, meta: bytes | None = None) -> int:
+        """Write changed party/box records, the current box, the metadata blob and the save version. Returns bytes written."""
+        written = 0
+        for box in self.unsaved():
+            payloads = [encode(mon) for mon in box.pokemon]
+            self._stored[self.save.append_box(box.name, payloads)] = payloads
+            self._unsaved -= 1
+            written += self.save.box_size
+        for (index, slot), (_, payload) in self.pending(party).items():
+            written += self.save.write_record(self.save.slot_offset(index, slot), payload)
+            (self.party_stored if index is None else self._stored[index])[slot] = payload
+        if meta is not None:
+            written += self.save.write_meta(meta)
+        self.save.current_box = current_box
+        if version is not None and version != self.save.save_version:
+            self.save.save_version = version
+            self.save._write_header()
+        self.save.flush()
+        if self.save.needs_compact():
+            try:
+                written += self.save.compact()
+            except OSError as e:
+                # the save itself is written; compaction is retried by a later save
+                print(f"⚠️ Could not compact {self.save.path}: {e}")
+        return written
+
+
+def meta_blob(player) -> bytes:
+    """The metadata blob for player's save-wide settings (empty if there are none)."""
+    smart_boxes = getattr(player, "smart_boxes", None)
+    return json.dumps({"smart_boxes": smart_boxes}, separators=(",", ":")).encode() if smart_boxes else b""
+
+
+def write_new(path: str, player, version: int = 0) -> int:
+    """Write player to a fresh .pcbox file at path. Returns the file size."""
+    boxes = [(box.name, [encode(mon) for mon in box.pokemon]) for box in player.boxes]
+    capacity = player.boxes[0].capacity if boxes else 30
+    party = [encode(mon) for mon in player.party[:PARTY_SLOTS]]
+    tmp = path + ".tmp"
+    size = _write_file(tmp, party, boxes, capacity, getattr(player, "current_box", 0), version, meta_blob(player))
+    os.replace(tmp, path)
+    return size
+
+
+def _write_file(path: str, party: list, boxes: list, capacity: int, current_box: int, version: int, meta: bytes) -> int:
+    """Write a compact .pcbox file at path from payloads: party slots and (name, slot payloads) per box."""
+    box_size = NAME_SIZE + capacity * RECORD_SIZE
+    table_offset = HEADER_SIZE + PARTY_SLOTS * RECORD_SIZE + len(boxes) * box_size
+    heap_start = table_offset + len(boxes) * TABLE_ENTRY.size
+    heap = bytearray()
+
+    def record(payload) -> bytes:
+        if payload is None:
+            rec = RECORD_HEAD.pack(EMPTY, 0)
+        elif len(payload) <= INLINE_MAX:
+            rec = RECORD_HEAD.pack(INLINE, len(payload)) + payload
+        else:
+            rec = RECORD_HEAD.pack(OVERFLOW, POINTER.size) + POINTER.pack(heap_start + len(heap), len(payload))
+            heap.extend(payload)
+        return rec.ljust(RECORD_SIZE, b"\x00")
+
+    party = list(party[:PARTY_SLOTS]) + [None] * (PARTY_SLOTS - len(party))
+    out = bytearray(HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(boxes), capacity, RECORD_SIZE, PARTY_SLOTS, current_box, table_offset,
+    ) + SAVE_VERSION.pack(version)).ljust(HEADER_SIZE, b"\x00")
+    for payload in party:
+        out += record(payload)
+    offsets = []
+    for name, payloads in boxes:
+        offsets.append(len(out))
+        out += _encode_name(name)
+        for payload in payloads:
+            out += record(payload)
+    for offset in offsets:
+        out += TABLE_ENTRY.pack(offset)
+    if meta:
+        META.pack_into(out, META_AT, heap_start + len(heap), len(meta))
+        heap.extend(meta)
+    out += heap
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(out)
+    return len(out)
+
+
+def load_player(player, path: str):
+    """Attach player to the .pcbox file at path (boxes stay on disk until accessed)."""
+    close_player(player)
+    save = MappedSave(path)
+    boxes = MappedBoxes(save)
+    player.party = [decode(p) for p in boxes.party_stored]
+    player.boxes = boxes
+    player.current_box = save.current_box
+    player.smart_boxes = save.read_meta().get("smart_boxes", [])
+
+
+def save_player(player, path: str, version: int = 0) -> int:
+    """Write player to path: in place if it is already mapped from that file, otherwise a full write."""
+    boxes = player.boxes
+    if isinstance(boxes, MappedBoxes) and os.path.abspath(boxes.save.path) == os.path.abspath(path):
+        return boxes.sync(player.party, getattr(player, "current_box", 0), version, meta_blob(player))
+    return write_new(path, player, version)
+
+
+def read_version(path: str, player=None) -> int:
+    """
+    Save version from the header of the .pcbox at path. If player has that
+    very file mapped (not one since replaced by another writer), the header
+    is read from the shared mapping instead of the file.
+    """
+    boxes = getattr(player, "boxes", None)
+    if isinstance(boxes, MappedBoxes) and not boxes.save.mm.closed:
+        if os.fstat(boxes.save.f.fileno()).st_ino == os.stat(path).st_ino:
+            return SAVE_VERSION.unpack_from(boxes.save.mm, HEADER.size)[0]
+    with open(path, "rb") as f:
+        head = f.read(HEADER_SIZE)
+    if len(head) < HEADER_SIZE or not head.startswith(MAGIC):
+        raise ValueError(f"{path} is not a .pcbox save")
+    return SAVE_VERSION.unpack_from(head, HEADER.size)[0]
+
+
+def close_player(player):
+    """Release the memory map behind player.boxes, if any."""
+    if isinstance(getattr(player, "boxes", None), MappedBoxes):
+        player.boxes.save.close()
+
+
+def main(argv=None):
+    import argparse
+    import storage
+    from models.player import Player
+
+    parser = argparse.ArgumentParser(description="Convert between JSON and .pcbox saves")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="JSON save -> .pcbox")
+    conv.add_argument("src")
+    conv.add_argument("dst", nargs="?")
+    exp = sub.add_parser("export", help=".pcbox -> JSON save")
+    exp.add_argument("src")
+    exp.add_argument("dst")
+    args = parser.parse_args(argv)
+
+    player = Player()
+    if args.command == "convert":
+        dst = args.dst or os.path.splitext(args.src)[0] + ".pcbox"
+        if not storage.load_player(player, args.src):
+            print(f"Nothing to convert in {args.src}")
+            return 1
+        size = write_new(dst, player)
+        print(f"Wrote {dst} ({len(player.boxes)} boxes, {size} bytes)")
+    else:
+        load_player(player, args.src)
+        list(player.boxes)  # decode every box
+        size = storage.save_player(player, args.dst)
+        close_player(player)
+        print(f"Wrote {args.dst} ({size} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Duplicate and near-duplicate detection across the party and every box.
+
+Each Pokémon is reduced to a fingerprint (a tuple of normalised field values)
+and bucketed in a dict in one pass over the collection, so a scan is linear
+in the number of Pokémon. Which fields go into the fingerprint decides what
+counts as a duplicate:
+
+    EXACT_FIELDS   same name, level, type, moves, item, sprite and alternate form
+    NEAR_FIELDS    same species and moveset; level (and everything else) may differ
+
+The fixes (release_extras / gather) go through Player.set_slot / swap_slots
+inside one history group, so each bulk action is a single undo step.
+
+    python dupes.py data/saves/maro.json --near
+"""
+import sys
+import tkinter as tk
+from tkinter import messagebox
+
+from models.box import PCBox
+
+EXACT_FIELDS = ("name", "level", "ptype", "moves", "item", "sprite", "alt_form_name", "alt_sprite", "alt_ptype")
+NEAR_FIELDS = ("name", "moves")
+MODES = {"exact": EXACT_FIELDS, "near": NEAR_FIELDS}
+
+
+def _norm(field, value):
+    if field == "moves":
+        return tuple(sorted(m.strip().lower() for m in value or []))
+    if isinstance(value, str):
+        value = value.strip()
+        return value.replace("\\", "/") if field.endswith("sprite") else value.lower()
+    return value
+
+
+def fingerprint(mon, fields=EXACT_FIELDS) -> tuple:
+    return tuple(_norm(f, getattr(mon, f, None)) for f in fields)
+
+
+def find_duplicates(player, fields=EXACT_FIELDS) -> list[list[tuple]]:
+    """
+    Groups of two or more Pokémon with the same fingerprint, as lists of
+    (loc, mon) in collection order (party first). Largest groups first.
+    """
+    index = {}
+    for area, box_index, slot, mon in player.iter_pokemon():
+        index.setdefault(fingerprint(mon, fields), []).append(((area, box_index, slot), mon))
+    groups = [g for g in index.values() if len(g) > 1]
+    groups.sort(key=lambda g: -len(g))
+    return groups
+
+
+def pick_keeper(group) -> int:
+    """Index of the member to keep: the highest level, earliest in the collection on ties."""
+    best = 0
+    for i, (_, mon) in enumerate(group):
+        if _level(mon) > _level(group[best][1]):
+            best = i
+    return best
+
+
+def _level(mon):
+    try:
+        return int(mon.level)
+    except (TypeError, ValueError):
+        return 0
+
+
+def release_extras(player, history, groups) -> int:
+    """Release every member of each group except its keeper. Returns how many were released."""
+    released = 0
+    with history.group("Release duplicates"):
+        for group in groups:
+            keep = pick_keeper(group)
+            for i, (loc, mon) in enumerate(group):
+                if i != keep and player.get_slot(loc) is mon:
+                    player.set_slot(loc, None)
+                    released += 1
+    return released
+
+
+def gather(player, history, groups, box_name="Duplicates") -> int:
+    """
+    Move every boxed member of the groups into box(es) at the end, group by
+    group, so they can be reviewed side by side. Party members stay put.
+    Empty boxes already at the end are filled first and new ones appended
+    only for the rest: undo moves the Pokémon back but keeps the boxes, so
+    gathering again after an undo reuses them. Returns how many were moved.
+    """
+    members = [(loc, mon) for group in groups for loc, mon in group if loc[0] == "box"]
+    if not members:
+        return 0
+    capacity = player.boxes[0].capacity if len(player.boxes) else 30
+    empty = (1 << capacity) - 1
+    first = len(player.boxes)
+    while first > 0 and player.box_free_mask(first - 1) == empty:
+        first -= 1
+    needed = (len(members) + capacity - 1) // capacity
+    for n in range(len(player.boxes) - first, needed):
+        player.boxes.append(PCBox(box_name if n == 0 else f"{box_name} {n + 1}", capacity))
+    with history.group("Gather duplicates"):
+        for i, (loc, mon) in enumerate(members):
+            if player.get_slot(loc) is mon:
+                player.swap_slots(loc, ("box", first + i // capacity, i % capacity))
+    return len(members)
+
+
+def describe(group) -> str:
+    mon = group[0][1]
+    levels = sorted({_level(m) for _, m in group})
+    level = f"Lv {levels[0]}" if len(levels) == 1 else f"Lv {levels[0]}-{levels[-1]}"
+    where = ", ".join(_where(loc) for loc, _ in group[:4]) + (", …" if len(group) > 4 else "")
+    return f"{len(group)}× {mon.name} {level} — {where}"
+
+
+def _where(loc):
+    area, box_index, slot = loc
+    return f"Party {slot + 1}" if area == "party" else f"Box {box_index + 1} #{slot + 1}"
+
+
+class DuplicatesWindow(tk.Toplevel):
+    """Reviewable list of duplicate groups with bulk release / gather."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.title("Duplicates")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.groups = []
+        self.mode = tk.StringVar(value="exact")
+
+        toolbar = tk.Frame(self, padx=8, pady=6)
+        toolbar.pack(fill="x")
+        tk.Radiobutton(toolbar, text="Exact", variable=self.mode, value="exact", command=self.scan).pack(side="left")
+        tk.Radiobutton(
+            toolbar, text="Same species + moves", variable=self.mode, value="near", command=self.scan
+        ).pack(side="left", padx=(6, 0))
+        self.status_lbl = tk.Label(toolbar, font=("Arial", 9))
+        self.status_lbl.pack(side="right")
+
+        body = tk.Frame(self, padx=8)
+        body.pack(fill="both", expand=True)
+        self.listbox = tk.Listbox(body, width=80, height=20, selectmode="extended", font=("Arial", 10))
+        self.listbox.pack(side="left", fill="both", expand=True)
+        scrollbar = tk.Scrollbar(body, orient="vertical", command=self.listbox.yview)
+        scrollbar.pack(side="right", fill="y")
+        self.listbox.config(yscrollcommand=scrollbar.set)
+
+        buttons = tk.Frame(self, padx=8, pady=6)
+        buttons.pack(fill="x")
+        tk.Button(buttons, text="Release extras (selected)", command=lambda: self.release(self.selected())).pack(side="left")
+        tk.Button(buttons, text="Release extras (all)", command=lambda: self.release(self.groups)).pack(side="left", padx=6)
+        tk.Button(buttons, text="Gather selected into one box", command=lambda: self.gather(self.selected())).pack(side="left")
+        tk.Label(buttons, text="Extras = all but the highest level", font=("Arial", 9)).pack(side="right")
+        self.scan()
+
+    def scan(self):
+        self.groups = find_duplicates(self.app.player, MODES[self.mode.get()])
+        self.listbox.delete(0, "end")
+        self.listbox.insert("end", *(describe(g) for g in self.groups))
+        extras = sum(len(g) - 1 for g in self.groups)
+        self.status_lbl.config(text=f"{len(self.groups)} groups, {extras} extras")
+
+    def selected(self):
+        return [self.groups[i] for i in self.listbox.curselection()]
+
+    def release(self, groups):
+        if not groups:
+            return
+        extras = sum(len(g) - 1 for g in groups)
+        if not messagebox.askyesno("Release duplicates", f"Release {extras} Pokémon?", parent=self):
+            return
+        self.app.release_duplicates(groups)
+        self.scan()
+
+    def gather(self, groups):
+        if groups and self.app.gather_duplicates(groups):
+            self.scan()
+
+    def close(self):
+        self.app.duplicates_window = None
+        self.destroy()
+
+
+def main(argv=None):
+    import argparse
+    import storage
+    from models.player import Player
+
+    parser = argparse.ArgumentParser(description="List duplicate Pokémon in a save")
+    parser.add_argument("save")
+    parser.add_argument("--near", action="store_true", help="group by species + moveset, ignoring level")
+    args = parser.parse_args(argv)
+
+    player = Player()
+    if not storage.load_player(player, args.save):
+        print(f"Nothing to scan in {args.save}")
+        return 1
+    groups = find_duplicates(player, NEAR_FIELDS if args.near else EXACT_FIELDS)
+    for group in groups:
+        print(describe(group))
+    print(f"{len(groups)} groups, {sum(len(g) - 1 for g in groups)} extras")
+    storage.close_player(player)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+Undo/redo for box mutations as a log of inverse-able operations.
+
+History listens to the Player (see models.player.PlayerListener) and records
+one small op per change instead of snapshotting the collection:
+
+    ("place", loc, old_mon, new_mon)        add / release / replace one slot
+    ("swap", loc_a, loc_b)                  drag between two slots
+    ("edit", mon, old_values, new_values)   field diffs from the editor
+    ("box", old_index, new_index)           box switch
+    ("group", label, [ops])                 batch that undoes as one step
+
+Undo and redo are O(size of the step). The undo log keeps at most `limit` steps.
+"""
+import json
+import os
+from collections import deque
+
+from models.player import PlayerListener
+from models.pokemon import Pokemon
+
+
+class History(PlayerListener):
+    def __init__(self, player, limit=200):
+        self.player = player
+        self.undo_stack = deque(maxlen=limit)
+        self.redo_stack = []
+        self._group = None      # ops collected by an open group()
+        self._applying = False  # True while undo/redo is replaying ops
+        player.listeners.append(self)
+
+    # ---------------- Recording ----------------
+    def record(self, op):
+        if self._applying:
+            return
+        if self._group is not None:
+            self._group[2].append(op)
+            return
+        self.undo_stack.append(op)
+        self.redo_stack.clear()
+
+    def slot_changed(self, loc, old, new):
+        if old is not new:
+            self.record(("place", loc, old, new))
+
+    def slots_swapped(self, a, b, mon_a, mon_b):
+        self.record(("swap", a, b))
+
+    def pokemon_edited(self, mon, old, new):
+        if old != new:
+            self.record(("edit", mon, old, new))
+
+    def box_switched(self, old, new):
+        self.record(("box", old, new))
+
+    def reset(self, player):
+        self.clear()
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    def group(self, label):
+        """Context manager: every op recorded inside undoes/redoes as a single step."""
+        return _Group(self, label)
+
+    # ---------------- Undo / Redo ----------------
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self):
+        """Reverts the latest step. Returns its op, or None if there was nothing to undo."""
+        if not self.undo_stack:
+            return None
+        op = self.undo_stack.pop()
+        self._replay(op, undo=True)
+        self.redo_stack.append(op)
+        return op
+
+    def redo(self):
+        """Re-applies the latest undone step. Returns its op, or None."""
+        if not self.redo_stack:
+            return None
+        op = self.redo_stack.pop()
+        self._replay(op, undo=False)
+        self.undo_stack.append(op)
+        return op
+
+    def _replay(self, op, undo):
+        self._applying = True
+        try:
+            self._apply(op, undo)
+        finally:
+            self._applying = False
+
+    def _apply(self, op, undo):
+        kind = op[0]
+        if kind == "place":
+            _, loc, old, new = op
+            self.player.set_slot(loc, old if undo else new)
+        elif kind == "swap":
+            self.player.swap_slots(op[1], op[2])
+        elif kind == "edit":
+            _, mon, old, new = op
+            self.player.edit_pokemon(mon, old if undo else new)
+        elif kind == "box":
+            _, old, new = op
+            self.player.set_current_box(old if undo else new)
+        elif kind == "group":
+            ops = reversed(op[2]) if undo else op[2]
+            for sub in ops:
+                self._apply(sub, undo)
+
+    # ---------------- Persistence ----------------
+    def to_dict(self):
+        """
+        JSON-serialisable form. Pokémon are stored once in a "mons" table; those
+        still in the collection also record their current loc so that loading
+        re-attaches ops to the live objects.
+        """
+        mons = {}
+
+        def ref(mon):
+            if mon is None:
+                return None
+            key = str(id(mon))
+            if key not in mons:
+                mons[key] = {"data": dict(mon.__dict__), "loc": None}
+            return key
+
+        def encode(op):
+            kind = op[0]
+            if kind == "place":
+                return ["place", list(op[1]), ref(op[2]), ref(op[3])]
+            if kind == "swap":
+                return ["swap", list(op[1]), list(op[2])]
+            if kind == "edit":
+                return ["edit", ref(op[1]), op[2], op[3]]
+            if kind == "box":
+                return list(op)
+            return ["group", op[1], [encode(sub) for sub in op[2]]]
+
+        undo = [encode(op) for op in self.undo_stack]
+        redo = [encode(op) for op in self.redo_stack]
+        for area, box_index, slot, mon in self._loaded_slots():
+            entry = mons.get(str(id(mon)))
+            if entry is not None:
+                entry["loc"] = [area, box_index, slot]
+        return {"limit": self.undo_stack.maxlen, "mons": mons, "undo": undo, "redo": redo}
+
+    def _loaded_slots(self):
+        """
+        Like Player.iter_pokemon, but skipping boxes a mapped save has not
+        decoded: a Pokémon the log refers to was reached through its box, so
+        that box is loaded.
+        """
+        for i, mon in enumerate(self.player.party):
+            if mon:
+                yield "party", None, i, mon
+        boxes = self.player.boxes
+        for b, box in (boxes.loaded() if hasattr(boxes, "loaded") else enumerate(boxes)):
+            for i, mon in enumerate(box.pokemon):
+                if mon:
+                    yield "box", b, i, mon
+
+    def load_dict(self, data):
+        """Replace the log with one produced by to_dict() for the same collection."""
+        objects = {}
+        for key, entry in data.get("mons", {}).items():
+            live = None
+            if entry.get("loc"):
+                try:
+                    live = self.player.get_slot(tuple(entry["loc"]))
+                except (IndexError, TypeError):
+                    live = None
+            objects[key] = live if live is not None else Pokemon.from_dict(entry["data"])
+
+        def decode(op):
+            kind = op[0]
+            if kind == "place":
+                return ("place", tuple(op[1]), objects.get(op[2]), objects.get(op[3]))
+            if kind == "swap":
+                return ("swap", tuple(op[1]), tuple(op[2]))
+            if kind == "edit":
+                return ("edit", objects[op[1]], op[2], op[3])
+            if kind == "box":
+                return tuple(op)
+            return ("group", op[1], [decode(sub) for sub in op[2]])
+
+        self.undo_stack = deque((decode(op) for op in data.get("undo", [])), maxlen=self.undo_stack.maxlen)
+        self.redo_stack = [decode(op) for op in data.get("redo", [])]
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        """Load a persisted log; silently keeps an empty log if the file is missing or bad."""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r") as f:
+                self.load_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Failed to load undo history: {e}")
+            self.clear()
+
+
+def history_path(save_path):
+    """Undo log stored next to a save file."""
+    return save_path + ".history.json"
+
+
+class _Group:
+    def __init__(self, history, label):
+        self.history = history
+        self.label = label
+        self.outer = None
+
+    def __enter__(self):
+        self.outer = self.history._group
+        if self.outer is None:
+            self.history._group = ("group", self.label, [])
+        return self
+
+    def __exit__(self, *exc):
+        if self.outer is None:
+            op = self.history._group
+            self.history._group = None
+            if op[2]:
+                self.history.record(op)
+        return False
@@ -1,25 +1,84 @@
+import time
+_T_START = time.perf_counter()
+
 import tkinter as tk
 from tkinter import messagebox, simpledialog, filedialog
-from PIL import Image, ImageTk, ImageDraw
-import json, os
+_T_TK_IMPORTED = time.perf_counter()
+import argparse, os, sys
 
-from models.pokemon import Pokemon
+from models.pokemon import MAX_LEVEL, MIN_LEVEL, Pokemon, new_uid
 from models.box import PCBox
 from models.player import Player
 import auth
+import metrics
+import savediff
+import sprites
+import storage
+import trade
+from backup import Backups, BackupStore, BackupsWindow, backup_dir, to_player
+from dupes import DuplicatesWindow, gather, release_extras
+from history import History, history_path
+from overview import BoxOverview
+from panels import PokemonEditorPanel, PokemonInfoPanel
+from selection import Selection, apply_move, plan_move
+from session import Recorder
+from smartbox import SmartBoxes, SmartBoxesWindow
+from stats import CollectionStats, StatsPanel
+_T_IMPORTS_DONE = time.perf_counter()
 
 # Default save path when no user is specified (backward compatibility)
 DEFAULT_SAVE_PATH = "data/save.json"
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 SPRITE_DIR = "assets/sprites/"
+SELECTED_BG = "#ffd6d6"  # highlight for multi-selected slots
+
+
+class StartupProfile:
+    """Records how long each startup phase took (enabled by --profile-startup)."""
+
+    def __init__(self):
+        self.phases = [
+            ("import tkinter", _T_TK_IMPORTED - _T_START),
+            ("import app modules", _T_IMPORTS_DONE - _T_TK_IMPORTED),
+        ]
+        self.last = _T_IMPORTS_DONE
+
+    def begin(self):
+        """Start timing a new window (ignores time spent waiting on the user)."""
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self, title):
+        print(f"--- Startup profile: {title} ---")
+        for phase, secs in self.phases:
+            print(f"  {phase:<28}{secs * 1000:9.1f} ms")
+        total = sum(secs for _, secs in self.phases)
+        print(f"  {'total':<28}{total * 1000:9.1f} ms")
+        print(f"  PIL imported: {'yes' if 'PIL' in sys.modules else 'no'}")
+        self.phases = []
+
 
-# Level bounds (change if desired)
-MIN_LEVEL = 1
-MAX_LEVEL = 100
+# Set by --profile-startup
+STARTUP_PROFILE = None
+
+# Set by --persist-undo: keep the undo log next to the save across restarts
+PERSIST_HISTORY = False
+
+# Set by --record: append every action to this script (see session.py)
+RECORD_PATH = None
+
+
+def mark_startup(phase):
+    if STARTUP_PROFILE:
+        STARTUP_PROFILE.mark(phase)
 
 
 class PCApp(tk.Tk):
-    def __init__(self, player, save_path=None, username=None):
+    def __init__(self, player, save_path=None, username=None, persist_history=False, recorder=None):
         super().__init__()
         self.save_path = save_path or os.path.join(BASE_DIR, DEFAULT_SAVE_PATH)
         self.username = username
@@ -30,42 +89,80 @@ class PCApp(tk.Tk):
         self.geometry("900x700")
         self.resizable(False, False)
         self.configure(bg=LOGIN_WHITE)
+        mark_startup("PCApp Tk init")
 
         self.player = player
-        self.drag_data = {"widget": None, "pokemon": None, "origin_index": None, "origin_area": None, "floating": None}
-
-        # --- Load images ---
-        bg_path = os.path.join(BASE_DIR, "assets", "bg", "box_bg.png")
-        try:
-            bg_raw = Image.open(bg_path).resize((650, 550))
-            self.bg_image = ImageTk.PhotoImage(bg_raw)
-        except Exception:
-            # fallback plain background
-            tmp = Image.new("RGBA", (650, 550), (255, 255, 255, 255))
-            self.bg_image = ImageTk.PhotoImage(tmp)
-
-        add_icon_path = os.path.join(BASE_DIR, "assets", "icons", "add_icon.png")
-        if os.path.exists(add_icon_path):
-            self.add_icon = ImageTk.PhotoImage(Image.open(add_icon_path).resize((60, 60)))
-        else:
-            # Draw a fallback plus icon so app still runs if missing
-            temp_img = Image.new("RGBA", (60, 60), (240, 240, 240, 255))
-            draw = ImageDraw.Draw(temp_img)
-            draw.line((30, 8, 30, 52), fill=(200, 0, 0), width=6)
-            draw.line((8, 30, 52, 30), fill=(200, 0, 0), width=6)
-            self.add_icon = ImageTk.PhotoImage(temp_img)
+        self.history = History(player)
+        self.stats = CollectionStats(player)
+        self.selection = Selection(player)
+        self.smart = SmartBoxes(player)
+        self.smart_view = None  # index of the smart box shown in the grid instead of a box (see smartbox.py)
+        self.smart_page = 0
+        self.band = None  # rubber-band selection in progress: (x0, y0, rectangle item)
+        self.persist_history = persist_history
+        self.recorder = recorder
+        self.editing_at = None  # (area, index) of the Pokémon open in the editor
+        self.drag_data = {"widget": None, "pokemon": None, "origin_index": None, "origin_area": None, "floating": None, "group": None}
+
+        # --- Images ---
+        # Blank placeholders keep the layout stable; the real images are
+        # decoded in load_assets() once the window has been drawn.
+        self.bg_image = tk.PhotoImage(width=650, height=550)
+        self.add_icon = tk.PhotoImage(width=60, height=60)
 
         # Sprite cache
         self.sprite_cache = {}
 
+        # "All Boxes", stats and duplicates windows (see open_overview etc.)
+        self.overview = None
+        self.stats_panel = None
+        self.duplicates_window = None
+        self.backups_window = None
+        self.smart_window = None
+
+        # Automatic deduplicated backups (see backup.py); attached before loading so it sees the reset
+        self.backups = Backups(player, BackupStore(backup_dir(self.save_path)))
+
+        # Pooled info/editor windows (see build_panels) and their preview images
+        self.info_panel = None
+        self.editor_panel = None
+        self.preview_cache = {}
+
         # Ensure player has 3 boxes (backwards-safe)
         while len(player.boxes) < 3:
             player.boxes.append(PCBox(f"Box {len(player.boxes) + 1}"))
 
         self.create_widgets()
+        mark_startup("PCApp widgets")
+        # Finish any trade a crash interrupted before reading the save (see trade.py)
+        try:
+            trade.recover()
+        except OSError as e:
+            print("⚠️ Trade recovery failed:", e)
         self.load_game()
-        self.update_display()
+        mark_startup("load_game")
         self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after_idle(self.load_assets)
+
+        # Debug overlay / metrics dump (only with --metrics)
+        self.debug_overlay = None
+        if metrics.enabled():
+            self.bind("<F12>", lambda e: self.toggle_debug_overlay())
+            if metrics.DUMP_PATH:
+                self.after(int(metrics.DUMP_INTERVAL * 1000), self._dump_metrics)
+
+    def load_assets(self):
+        """Decode background, add icon and sprites after the first paint."""
+        mark_startup("PCApp first paint")
+        self.bg_image = sprites.load_background(self)
+        self.box_canvas.itemconfig(self.bg_item, image=self.bg_image)
+        self.add_icon = sprites.load_add_icon(self)
+        self.update_display()
+        mark_startup("assets + sprites")
+        if STARTUP_PROFILE:
+            STARTUP_PROFILE.report("PC box")
+        self.after_idle(self.build_panels)
+        self.after_idle(self.back_up)
 
     # ---------------- Widgets ----------------
     def create_widgets(self):
@@ -87,6 +184,62 @@ class PCApp(tk.Tk):
             font=("Arial", 10, "bold"),
             cursor="hand2",
         ).pack(side="right", padx=10, pady=6)
+        for text, command in (("Undo", self.undo), ("Redo", self.redo), ("Duplicates", self.open_duplicates), ("Merge…", self.merge_save), ("Backups", self.open_backups)):
+            tk.Button(
+                top_bar,
+                text=text,
+                command=command,
+                bg=LOGIN_RED,
+                fg="#2d1b0e",
+                activebackground="#f28b8b",
+                relief="raised",
+                bd=2,
+                highlightthickness=1,
+                highlightbackground="#2d1b0e",
+                padx=10,
+                pady=4,
+                font=("Arial", 10, "bold"),
+                cursor="hand2",
+            ).pack(side="left", padx=(10, 0), pady=6)
+        self.bind("<Control-z>", lambda e: self.undo())
+        self.bind("<Control-y>", lambda e: self.redo())
+        self.bind("<Control-Z>", lambda e: self.redo())
+        self.bind("<Escape>", lambda e: self.clear_selection())
+
+        tk.Button(
+            top_bar,
+            text="Move selected…",
+            command=self.move_selection,
+            bg=LOGIN_RED,
+            fg="#2d1b0e",
+            activebackground="#f28b8b",
+            relief="raised",
+            bd=2,
+            highlightthickness=1,
+            highlightbackground="#2d1b0e",
+            padx=10,
+            pady=4,
+            font=("Arial", 10, "bold"),
+            cursor="hand2",
+        ).pack(side="left", padx=(10, 0), pady=6)
+        tk.Button(
+            top_bar,
+            text="Trade…",
+            command=self.trade_selection,
+            bg=LOGIN_RED,
+            fg="#2d1b0e",
+            activebackground="#f28b8b",
+            relief="raised",
+            bd=2,
+            highlightthickness=1,
+            highlightbackground="#2d1b0e",
+            padx=10,
+            pady=4,
+            font=("Arial", 10, "bold"),
+            cursor="hand2",
+        ).pack(side="left", padx=(10, 0), pady=6)
+        self.selection_lbl = tk.Label(top_bar, text="", bg=LOGIN_RED, fg="#2d1b0e", font=("Arial", 10))
+        self.selection_lbl.pack(side="left", padx=(8, 0))
 
         # Decorative frame bars (to encase the interface)
         bottom_bar = tk.Frame(self, bg=LOGIN_RED, height=14)
@@ -123,6 +276,8 @@ class PCApp(tk.Tk):
             lbl.pack(pady=5)
             # binds
             lbl.bind("<Button-1>", lambda e, i=i: self.start_drag(e, "party", i))
+            lbl.bind("<Control-Button-1>", lambda e, i=i: self.toggle_select("party", i))
+            lbl.bind("<Shift-Button-1>", lambda e, i=i: self.range_select("party", i))
             lbl.bind("<ButtonRelease-1>", self.end_drag)
             lbl.bind("<Button-3>", lambda e, i=i: self.right_click("party", i))
             self.party_labels.append(lbl)
@@ -149,7 +304,7 @@ class PCApp(tk.Tk):
             bg=LOGIN_BLUE,
         )
         self.box_canvas.pack()
-        self.box_canvas.create_image(0, 0, anchor="nw", image=self.bg_image)
+        self.bg_item = self.box_canvas.create_image(0, 0, anchor="nw", image=self.bg_image)
 
         # 30 slot labels (used like buttons)
         self.slot_buttons = []
@@ -162,11 +317,19 @@ class PCApp(tk.Tk):
             btn = tk.Label(self.box_canvas, image=self.add_icon, bd=2, relief="raised", bg="#ffffff", compound="top")
             self.box_canvas.create_window(x, y, anchor="nw", window=btn)
             btn.bind("<Button-1>", lambda e, i=i: self.start_drag(e, "box", i))
+            btn.bind("<Control-Button-1>", lambda e, i=i: self.toggle_select("box", i))
+            btn.bind("<Shift-Button-1>", lambda e, i=i: self.range_select("box", i))
             btn.bind("<ButtonRelease-1>", self.end_drag)
             btn.bind("<Button-3>", lambda e, i=i: self.right_click("box", i))
             self.slot_buttons.append(btn)
             self.slot_positions.append((x, y))
 
+        # Rubber-band selection: drag across the box background (Ctrl adds to the selection)
+        self.box_canvas.bind("<Button-1>", lambda e: self.start_band(e, additive=False))
+        self.box_canvas.bind("<Control-Button-1>", lambda e: self.start_band(e, additive=True))
+        self.box_canvas.bind("<B1-Motion>", self.drag_band)
+        self.box_canvas.bind("<ButtonRelease-1>", self.end_band)
+
         # Navigation buttons
         nav_frame = tk.Frame(self.box_frame, bg=LOGIN_BLUE)
         nav_frame.pack(pady=10)
@@ -200,55 +363,187 @@ class PCApp(tk.Tk):
             font=("Arial", 10, "bold"),
             cursor="hand2",
         ).grid(row=0, column=2, padx=10)
+        tk.Button(
+            nav_frame,
+            text="All Boxes",
+            command=self.open_overview,
+            bg=LOGIN_BLUE,
+            fg=LOGIN_WHITE,
+            activebackground="#87b6d8",
+            relief="raised",
+            bd=2,
+            highlightthickness=1,
+            highlightbackground="#2d1b0e",
+            font=("Arial", 10, "bold"),
+            cursor="hand2",
+        ).grid(row=0, column=3, padx=10)
+        tk.Button(
+            nav_frame,
+            text="Stats",
+            command=self.open_stats,
+            bg=LOGIN_BLUE,
+            fg=LOGIN_WHITE,
+            activebackground="#87b6d8",
+            relief="raised",
+            bd=2,
+            highlightthickness=1,
+            highlightbackground="#2d1b0e",
+            font=("Arial", 10, "bold"),
+            cursor="hand2",
+        ).grid(row=0, column=4, padx=10)
+        tk.Button(
+            nav_frame,
+            text="Smart Boxes",
+            command=self.open_smart_boxes,
+            bg=LOGIN_BLUE,
+            fg=LOGIN_WHITE,
+            activebackground="#87b6d8",
+            relief="raised",
+            bd=2,
+            highlightthickness=1,
+            highlightbackground="#2d1b0e",
+            font=("Arial", 10, "bold"),
+            cursor="hand2",
+        ).grid(row=0, column=5, padx=10)
 
     # ---------------- Save/Load ----------------
     def save_game(self):
-        data = {
-            "party": [mon.__dict__ if mon else None for mon in self.player.party],
-            "boxes": [
-                [mon.__dict__ if mon else None for mon in box.pokemon]
-                for box in self.player.boxes
-            ],
-            "current_box": getattr(self.player, "current_box", 0),
-        }
-        os.makedirs(os.path.dirname(self.save_path), exist_ok=True)
         try:
-            with open(self.save_path, "w") as f:
-                json.dump(data, f, indent=2)
+            try:
+                storage.save_player(self.player, self.save_path)
+            except storage.SaveConflict:
+                self.rebase_save()
+            if self.persist_history:
+                self.history.save(history_path(self.save_path))
         except Exception as e:
             print("⚠️ Failed to save:", e)
+            return
+        self.back_up()
+
+    def back_up(self, now=False):
+        """Take an automatic backup if one is due (see backup.BACKUP_INTERVAL), or with now=True if anything changed."""
+        try:
+            if now:
+                self.backups.snapshot()
+            else:
+                self.backups.maybe_snapshot()
+        except OSError as e:
+            print("⚠️ Backup failed:", e)
+
+    def rebase_save(self):
+        """The save was written elsewhere (another window or tool): merge its changes with ours."""
+        conflicts = storage.rebase_player(self.player, self.save_path)
+        self.player.notify_reset()
+        self.history.clear()
+        self.update_display()
+        if conflicts:
+            shown = "\n".join(conflicts[:10]) + (f"\n… and {len(conflicts) - 10} more" if len(conflicts) > 10 else "")
+            messagebox.showwarning(
+                "Save changed elsewhere",
+                f"This save was changed in another window. Both sets of changes were kept; "
+                f"where they clashed, this window's version won:\n\n{shown}",
+            )
+
+    # ---------------- Undo / Redo ----------------
+    def undo(self):
+        if self.history.undo():
+            self.record("undo")
+            self.update_display()
+            self.save_game()
+
+    def redo(self):
+        if self.history.redo():
+            self.record("redo")
+            self.update_display()
+            self.save_game()
+
+    def record(self, action, **fields):
+        if self.recorder:
+            self.recorder.record(action, **fields)
 
     def load_game(self):
-        if not os.path.exists(self.save_path):
+        storage.load_player(self.player, self.save_path)
+        self.player.notify_reset()
+        if self.persist_history:
+            self.history.load(history_path(self.save_path))
+
+    def merge_save(self):
+        """Merge another copy of this save (e.g. from a second machine) into it."""
+        theirs = filedialog.askopenfilename(
+            title="Merge another copy of this save",
+            filetypes=[("Saves", "*.json *.pcbox"), ("All files", "*.*")],
+        )
+        if not theirs:
             return
+        base = None
+        if messagebox.askyesno(
+            "Merge",
+            "Do you have the copy both saves started from?\n\n"
+            "Yes = pick it for a three-way merge\nNo = keep everything from both copies",
+        ):
+            base = filedialog.askopenfilename(title="Common ancestor") or None
+
+        self.save_game()
         try:
-            with open(self.save_path, "r") as f:
-                content = f.read().strip()
-                if not content:
-                    print("⚠️ Empty save file, starting fresh.")
-                    return
-                data = json.loads(content)
-        except (json.JSONDecodeError, OSError) as e:
-            print(f"⚠️ Failed to load save: {e}")
-            return
-
-        # party
-        self.player.party = [
-            Pokemon(**mon) if mon else None for mon in data.get("party", [])
-        ]
+            data, conflicts = savediff.merge_files(base, self.save_path, theirs)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Merge failed", str(e))
+            return
+        merged = Player()
+        storage.apply_save(merged, data)
+        if not self.replace_save(merged, "Merge failed"):
+            return
+
+        if conflicts:
+            shown = "\n".join(conflicts[:10]) + (f"\n… and {len(conflicts) - 10} more" if len(conflicts) > 10 else "")
+            messagebox.showwarning("Merged with conflicts", f"Kept this copy's version where both changed:\n\n{shown}")
+        else:
+            messagebox.showinfo("Merged", "Saves merged without conflicts.")
+
+    def replace_save(self, player, title):
+        """
+        Make player's collection the open save (after a merge or restore).
+        player must be based on the save as it is now: if another writer saved
+        since, nothing is written and the open save is rebased onto theirs.
+        Returns whether the save was replaced; on failure the error is shown.
+        """
+        try:
+            storage.replace_player(player, self.save_path, self.player)
+        except storage.SaveConflict:
+            self.rebase_save()
+            messagebox.showerror(title, "This save was changed in another window meanwhile, so nothing was replaced. Please try again.")
+            return False
+        except OSError as e:
+            # the old save may already be unmapped; it was saved just before, so reopen it
+            self.load_game()
+            self.update_display()
+            messagebox.showerror(title, f"Could not write the save: {e}")
+            return False
+        self.load_game()
+        self.history.clear()
+        self.update_display()
+        self.back_up(now=True)
+        return True
 
-        # boxes
-        for i, box_data in enumerate(data.get("boxes", [])):
-            if i < len(self.player.boxes):
-                self.player.boxes[i].pokemon = [
-                    Pokemon(**mon) if mon else None for mon in box_data
-                ]
+    def open_backups(self):
+        if self.backups_window:
+            self.backups_window.lift()
+            return
+        self.backups_window = BackupsWindow(self)
 
-        # current box index
-        self.player.current_box = data.get("current_box", 0)
+    def restore_backup(self, backup_id):
+        """Replace the collection with a backup; the current state is backed up first."""
+        self.save_game()
+        self.back_up(now=True)
+        self.replace_save(to_player(self.backups.store.restore(backup_id)), "Restore failed")
 
     def on_close(self):
         self.save_game()
+        self.back_up(now=True)
+        storage.close_player(self.player)
+        metrics.dump()
+        if self.recorder:
+            self.recorder.close()
         self.destroy()
 
     def logout(self):
@@ -257,53 +552,95 @@ class PCApp(tk.Tk):
             return
 
         self.save_game()
+        self.back_up(now=True)
+        storage.close_player(self.player)
+        metrics.dump()
+        if self.recorder:
+            self.recorder.close()
         self.destroy()
         login = LoginWindow()
         login.mainloop()
 
+    # ---------------- Debug metrics ----------------
+    def toggle_debug_overlay(self):
+        """F12: show/hide live timers and counters over the window."""
+        if self.debug_overlay:
+            self.debug_overlay.destroy()
+            self.debug_overlay = None
+            return
+        self.debug_overlay = tk.Label(
+            self, justify="left", anchor="nw", font=("Courier", 9), bg="#1e1e1e", fg="#7CFC00", padx=6, pady=4
+        )
+        self.debug_overlay.place(x=20, y=50)
+        self._refresh_debug_overlay()
+
+    def _refresh_debug_overlay(self):
+        if not self.debug_overlay:
+            return
+        self.debug_overlay.config(text=metrics.format_snapshot())
+        self.debug_overlay.lift()
+        self.after(500, self._refresh_debug_overlay)
+
+    def _dump_metrics(self):
+        metrics.dump()
+        self.after(int(metrics.DUMP_INTERVAL * 1000), self._dump_metrics)
+
     # ---------------- Sprite Loader ----------------
     def get_sprite(self, pokemon, size=(60, 60)):
         if not pokemon:
             return self.add_icon
         key = f"{pokemon.name}_{size[0]}x{size[1]}"
         if key in self.sprite_cache:
+            metrics.incr("sprite.hit")
             return self.sprite_cache[key]
+        metrics.incr("sprite.miss")
         try:
-            img_path = pokemon.get_sprite_path(show_alt=False)
-            # if path is relative, make absolute relative to BASE_DIR
-            if not os.path.isabs(img_path):
-                img_path = os.path.join(BASE_DIR, img_path)
-            if not os.path.exists(img_path):
-                # try default sprite path
-                alt = os.path.join(BASE_DIR, "assets", "sprites", f"{pokemon.name.lower()}.png")
-                if os.path.exists(alt):
-                    img_path = alt
-                else:
-                    print(f"⚠️ Sprite not found for {pokemon.name}: {img_path}")
-                    return self.add_icon
-            img_raw = Image.open(img_path).convert("RGBA")
-            img_raw = img_raw.resize(size, Image.Resampling.LANCZOS)
-            img = ImageTk.PhotoImage(img_raw)
+            img_path = sprites.resolve_sprite_path(pokemon.get_sprite_path(show_alt=False), pokemon.name)
+            if img_path is None:
+                print(f"⚠️ Sprite not found for {pokemon.name}: {pokemon.get_sprite_path()}")
+                # cache the miss too, so redraws (e.g. scrolling the overview) don't look it up again
+                self.sprite_cache[key] = self.add_icon
+                return self.add_icon
+            with metrics.timer("sprite.decode"):
+                img = sprites.load_sprite(img_path, size)
             self.sprite_cache[key] = img
             return img
         except Exception as e:
             print(f"⚠️ Failed to load sprite for {pokemon.name}: {e}")
+            self.sprite_cache[key] = self.add_icon
             return self.add_icon
 
-    def get_display_sprite(self, mon, size=(96, 96), use_alt=False):
+    def forget_sprite_miss(self, mon):
+        """Drop cached misses for mon's name, so a sprite just chosen for it shows up."""
+        prefix = f"{mon.name}_"
+        for key in [k for k, img in self.sprite_cache.items() if img is self.add_icon and k.startswith(prefix)]:
+            del self.sprite_cache[key]
+
+    def get_display_sprite(self, mon, size=(96, 96), use_alt=False, path=None):
         """
-        Returns a Tkinter PhotoImage for the Pokémon.
+        Returns a cached Tkinter PhotoImage for the Pokémon, or None if the sprite can't be loaded.
         If use_alt is True and mon.alt_sprite exists, returns the alternate sprite.
+        path overrides the sprite file (e.g. an alt sprite not saved yet).
         """
-        from PIL import Image, ImageTk
-
-        path = mon.alt_sprite if use_alt and mon.alt_sprite else getattr(mon, "sprite", None)
+        if path is None:
+            path = mon.alt_sprite if use_alt and mon.alt_sprite else getattr(mon, "sprite", None)
         if not path:
-            raise FileNotFoundError("No sprite available")
-        img = Image.open(path).resize(size, Image.Resampling.LANCZOS)
-        return ImageTk.PhotoImage(img)
+            return None
+        key = (path, size)
+        if key in self.preview_cache:
+            return self.preview_cache[key]
+        img = None
+        full_path = sprites.find_sprite_file(path)
+        if full_path:
+            try:
+                img = sprites.load_sprite(full_path, size)
+            except Exception as e:
+                print(f"⚠️ Failed to load sprite {path}: {e}")
+        self.preview_cache[key] = img
+        return img
 
     # ---------------- Update Display ----------------
+    @metrics.timed("update_display")
     def update_display(self):
         # Party
         for i, mon in enumerate(self.player.party):
@@ -314,18 +651,42 @@ class PCApp(tk.Tk):
                 self.party_labels[i].config(text=mon.name, image=sprite_img)
             else:
                 self.party_labels[i].config(text="(empty)", image=sprite_img)
-
-        # Box
-        box = self.player.get_current_box()
-        if box:
-            self.box_name_lbl.config(text=box.name)
-            for i, mon in enumerate(box.pokemon):
-                sprite_img = self.get_sprite(mon)
-                self.slot_buttons[i].image = sprite_img
-                if mon:
-                    self.slot_buttons[i].config(text=mon.name, image=sprite_img)
-                else:
-                    self.slot_buttons[i].config(text="", image=sprite_img)
+            self.mark_selected(self.party_labels[i], ("party", None, i), LOGIN_WHITE)
+
+        # Box, or a page of a smart box
+        if self.smart_view is not None and self.smart_view >= len(self.smart):
+            self.smart_view = None
+        if self.smart_view is not None:
+            pages = self.smart.page_count(self.smart_view)
+            self.smart_page = min(self.smart_page, pages - 1)
+            locs = self.smart.page(self.smart_view, self.smart_page)
+            self.box_name_lbl.config(text=f"★ {self.smart.name(self.smart_view)} ({self.smart_page + 1}/{pages})")
+            for i in range(len(self.slot_buttons)):
+                loc = locs[i] if i < len(locs) else None
+                self.show_slot(i, self.player.get_slot(loc) if loc else None, loc)
+        else:
+            box = self.player.get_current_box()
+            if box:
+                self.box_name_lbl.config(text=box.name)
+                for i, mon in enumerate(box.pokemon):
+                    self.show_slot(i, mon, ("box", self.player.current_box, i))
+        self.selection_lbl.config(text=f"{len(self.selection)} selected" if len(self.selection) else "")
+
+        if self.overview:
+            self.overview.refresh()
+        if self.stats_panel:
+            self.stats_panel.refresh()
+        if self.smart_window:
+            self.smart_window.refresh()
+
+    def show_slot(self, i, mon, loc):
+        sprite_img = self.get_sprite(mon)
+        self.slot_buttons[i].image = sprite_img
+        if mon:
+            self.slot_buttons[i].config(text=mon.name, image=sprite_img)
+        else:
+            self.slot_buttons[i].config(text="", image=sprite_img)
+        self.mark_selected(self.slot_buttons[i], loc, "#ffffff")
 
     def ask_field(self, title, prompt, required=False, to_int=False, min_val=None, max_val=None, **kwargs):
         """
@@ -444,353 +805,98 @@ class PCApp(tk.Tk):
                 if not sprite_path_candidate.lower().endswith(".png"):
                     messagebox.showerror("Invalid file", "Sprite must be a .png image.")
                 else:
-                    custom_sprite_path = sprite_path_candidate
+                    # copy into the managed sprite store so the save doesn't depend on this path
+                    try:
+                        custom_sprite_path = sprites.ingest_sprite(sprite_path_candidate)
+                    except (OSError, ValueError) as e:
+                        messagebox.showerror("Invalid file", f"Could not import sprite:\n{e}")
 
         sprite_path = custom_sprite_path or os.path.join("assets", "sprites", f"{name.lower()}.png")
-        new_mon = Pokemon(name, level, ptype, sprite=sprite_path, moves=moves, item=item)
-        if area == "box":
-            box = self.player.get_current_box()
-            if box:
-                box.add_pokemon(new_mon, index)
-        else:
+        new_mon = Pokemon(name, level, ptype, sprite=sprite_path, moves=moves, item=item, uid=new_uid())
+        self.place_pokemon(area, index, new_mon)
+
+    def place_pokemon(self, area, index, mon):
+        """Put a new Pokémon in a slot, then redraw and save (add_pokemon without the dialogs)."""
+        if area == "party":
             while len(self.player.party) < 6:
                 self.player.party.append(None)
-            self.player.party[index] = new_mon
-
+        self.player.set_slot(self.player.locate(area, index), mon)
+        self.forget_sprite_miss(mon)
+        self.record("add", at=[area, index], pokemon={k: v for k, v in mon.__dict__.items() if k != "uid"})
         self.update_display()
         self.save_game()
 
     def remove_pokemon(self, index, area="box"):
-        if area == "box":
-            box = self.player.get_current_box()
-            mon = box.pokemon[index]
-            if not mon:
-                return
-            confirm = messagebox.askyesno("Remove Pokémon", f"Release {mon.name}?")
-            if confirm:
-                box.remove_pokemon(index)
-        else:
-            mon = self.player.party[index]
-            if not mon:
-                return
-            confirm = messagebox.askyesno("Remove Pokémon", f"Release {mon.name}?")
-            if confirm:
-                self.player.party[index] = None
+        mon = self.player.get_slot(self.player.locate(area, index))
+        if not mon:
+            return
+        if messagebox.askyesno("Remove Pokémon", f"Release {mon.name}?"):
+            self.release_pokemon(area, index)
+
+    def release_pokemon(self, area, index):
+        """Empty a slot, then redraw and save (remove_pokemon without the confirmation)."""
+        loc = self.player.locate(area, index)
+        if self.player.get_slot(loc) is None:
+            return
+        self.player.set_slot(loc, None)
+        self.record("remove", at=[area, index])
         self.update_display()
         self.save_game()
 
-    # ---------------- Info (view only) ----------------
+    # ---------------- Info / Edit windows ----------------
+    def build_panels(self):
+        """Create the pooled info and editor windows (hidden until first used)."""
+        if self.info_panel is None:
+            self.info_panel = PokemonInfoPanel(self)
+            self.editor_panel = PokemonEditorPanel(self, MIN_LEVEL, MAX_LEVEL)
+
     def show_pokemon(self, area, index):
         mon = self.player.party[index] if area == "party" else self.player.get_current_box().pokemon[index]
         if not mon:
             messagebox.showinfo("Empty Slot", "No Pokémon here!")
             return
+        self.build_panels()
+        self.info_panel.show(mon, index if area == "party" else None)
 
-        # Ensure alt attributes exist (safe for old saves)
-        if not hasattr(mon, "alt_form_name"):
-            mon.alt_form_name = None
-        if not hasattr(mon, "alt_sprite"):
-            mon.alt_sprite = None
-        if not hasattr(mon, "alt_ptype"):
-            mon.alt_ptype = None
-
-        win = tk.Toplevel(self)
-        win.title(f"{mon.name} Info")
-        win.resizable(False, False)
-
-        # ---- Basic Info ----
-        basic_frame = tk.Frame(win, padx=10, pady=8)
-        basic_frame.pack(fill="x")
-
-        tk.Label(basic_frame, text="Name:", font=("Arial", 10, "bold")).grid(row=0, column=0, sticky="w")
-        tk.Label(basic_frame, text=mon.name).grid(row=0, column=1, sticky="w", padx=6)
-
-        tk.Label(basic_frame, text="Level:", font=("Arial", 10, "bold")).grid(row=1, column=0, sticky="w")
-        tk.Label(basic_frame, text=str(mon.level)).grid(row=1, column=1, sticky="w", padx=6)
-
-        tk.Label(basic_frame, text="Type:", font=("Arial", 10, "bold")).grid(row=2, column=0, sticky="w")
-        type_value_lbl = tk.Label(basic_frame, text=mon.ptype)
-        type_value_lbl.grid(row=2, column=1, sticky="w", padx=6)
-
-        # ---- Sprite Preview (BASE + ALT toggle) ----
-        sprite_frame = tk.Frame(win, padx=10, pady=6)
-        sprite_frame.pack(fill="x")
-        tk.Label(sprite_frame, text="Sprite Preview:", font=("Arial", 10, "bold")).pack(anchor="w")
-
-        show_alt = tk.BooleanVar(value=False)
-        sprite_label = tk.Label(sprite_frame)
-        sprite_label.pack(pady=4)
-
-        def update_preview():
-            use_alt = show_alt.get() and mon.alt_sprite
-            sprite_path = mon.alt_sprite if use_alt else mon.sprite
-            display_type = mon.alt_ptype if use_alt and mon.alt_ptype else mon.ptype
-            type_value_lbl.config(text=display_type)
-
-            # Normalize sprite path
-            if sprite_path:
-                if not os.path.isabs(sprite_path):
-                    if not os.path.exists(sprite_path):
-                        sprite_path = os.path.join(SPRITE_DIR, os.path.basename(sprite_path))
-
-            try:
-                from PIL import Image, ImageTk
-                img = Image.open(sprite_path).resize((96, 96), Image.Resampling.LANCZOS)
-                tk_img = ImageTk.PhotoImage(img)
-                sprite_label.config(image=tk_img, text="")
-                sprite_label.image = tk_img
-            except Exception:
-                sprite_label.config(text="[Sprite not found]", image="")
-                sprite_label.image = None
-
-        # Initial load
-        update_preview()
-
-        if mon.alt_sprite:
-            tk.Checkbutton(
-                sprite_frame,
-                text=f"Show {mon.alt_form_name}",
-                variable=show_alt,
-                command=update_preview
-            ).pack()
-
-        # ---- Moves ----
-        moves_frame = tk.Frame(win, padx=10, pady=6)
-        moves_frame.pack(fill="x")
-        tk.Label(moves_frame, text="Moves:", font=("Arial", 10, "bold")).pack(anchor="w")
-
-        if mon.moves:
-            for mv in mon.moves:
-                tk.Label(moves_frame, text=f"• {mv}").pack(anchor="w")
-        else:
-            tk.Label(moves_frame, text="(No moves)").pack(anchor="w")
-
-        # ---- Held Item ----
-        item_frame = tk.Frame(win, padx=10, pady=6)
-        item_frame.pack(fill="x")
-        tk.Label(item_frame, text="Held Item:", font=("Arial", 10, "bold")).pack(anchor="w")
-        tk.Label(item_frame, text=mon.item if mon.item else "(None)").pack(anchor="w")
-
-        # ---- Close Button ----
-        btn_frame = tk.Frame(win, pady=10)
-        btn_frame.pack(fill="x")
-        tk.Button(btn_frame, text="Close", command=win.destroy).pack()
-
-        win.transient(self)
-        win.grab_set()
-        self.wait_window(win)
-
-    # ---------------- Edit popup (single-window editor) ----------------
     def edit_pokemon(self, area, index):
         mon = self.player.party[index] if area == "party" else self.player.get_current_box().pokemon[index]
         if not mon:
             messagebox.showinfo("Empty Slot", "No Pokémon here!")
             return
+        self.build_panels()
+        self.editing_at = (area, index)
+        self.editor_panel.show(mon)
+
+    def apply_edit(self, mon, changes):
+        """Apply the editor's field changes to mon, then redraw and save."""
+        self.player.edit_pokemon(mon, changes)
+        self.forget_sprite_miss(mon)
+        if self.editing_at:
+            self.record("edit", at=list(self.editing_at), changes=changes)
+            self.editing_at = None
+        self.update_display()
+        self.save_game()
 
-        # Ensure alt attributes exist (safe for old saves)
-        if not hasattr(mon, "alt_form_name"):
-            mon.alt_form_name = None
-        if not hasattr(mon, "alt_sprite"):
-            mon.alt_sprite = None
-        if not hasattr(mon, "alt_ptype"):
-            mon.alt_ptype = None
-
-        # Create edit window
-        win = tk.Toplevel(self)
-        win.title(f"Edit {mon.name}")
-        win.resizable(False, False)
-
-        # =====================
-        # Basic info frame
-        # =====================
-        basic_frame = tk.Frame(win, padx=10, pady=8)
-        basic_frame.pack(fill="x")
-
-        tk.Label(basic_frame, text="Name:").grid(row=0, column=0, sticky="w")
-        name_entry = tk.Entry(basic_frame)
-        name_entry.insert(0, mon.name)
-        name_entry.grid(row=0, column=1, sticky="ew", padx=6)
-
-        tk.Label(basic_frame, text="Level:").grid(row=1, column=0, sticky="w")
-        level_entry = tk.Entry(basic_frame)
-        level_entry.insert(0, str(mon.level))
-        level_entry.grid(row=1, column=1, sticky="ew", padx=6)
-
-        tk.Label(basic_frame, text="Type:").grid(row=2, column=0, sticky="w")
-        type_entry = tk.Entry(basic_frame)
-        type_entry.insert(0, mon.ptype)
-        type_entry.grid(row=2, column=1, sticky="ew", padx=6)
-
-        basic_frame.columnconfigure(1, weight=1)
-
-        # =====================
-        # Sprite preview (BASE + ALT toggle)
-        # =====================
-        sprite_frame = tk.Frame(win, padx=10, pady=6)
-        sprite_frame.pack(fill="x")
-        tk.Label(sprite_frame, text="Sprite Preview:").pack(anchor="w")
-        preview_type_label = tk.Label(sprite_frame, text=f"Displayed Type: {mon.ptype}")
-        preview_type_label.pack(anchor="w")
-
-        show_alt = tk.BooleanVar(value=False)
-
-        def update_preview():
-            use_alt = show_alt.get() and mon.alt_sprite
-            sprite_path = mon.alt_sprite if use_alt else mon.sprite
-            display_type = mon.alt_ptype if use_alt and mon.alt_ptype else mon.ptype
-            preview_type_label.config(text=f"Displayed Type: {display_type}")
-
-            # Normalize the path
-            if not os.path.isabs(sprite_path):
-                if os.path.exists(sprite_path):
-                    # already a valid relative path
-                    full_path = sprite_path
-                else:
-                    # prepend sprites folder
-                    full_path = os.path.join(SPRITE_DIR, os.path.basename(sprite_path))
-            else:
-                full_path = sprite_path
-
-            try:
-                from PIL import Image, ImageTk
-                img = Image.open(full_path).resize((96, 96), Image.Resampling.LANCZOS)
-                tk_img = ImageTk.PhotoImage(img)
-                sprite_label.config(image=tk_img, text="")
-                sprite_label.image = tk_img
-            except FileNotFoundError:
-                sprite_label.config(text="[Sprite not found]", image="")
-            except Exception as e:
-                sprite_label.config(text=f"[Error: {e}]", image="")
-
-        # Initial preview
-        sprite_label = tk.Label(sprite_frame)
-        sprite_label.pack(pady=4)
-        update_preview()
-
-        if mon.alt_sprite:
-            tk.Checkbutton(
-                sprite_frame,
-                text=f"Show {mon.alt_form_name}",
-                variable=show_alt,
-                command=update_preview
-            ).pack()
-
-        # =====================
-        # Alternate Form Editor (NEW)
-        # =====================
-        alt_frame = tk.LabelFrame(win, text="Alternate Form", padx=10, pady=6)
-        alt_frame.pack(fill="x", padx=10, pady=4)
-
-        tk.Label(alt_frame, text="Form Name:").grid(row=0, column=0, sticky="w")
-        alt_name_entry = tk.Entry(alt_frame)
-        alt_name_entry.insert(0, mon.alt_form_name or "")
-        alt_name_entry.grid(row=0, column=1, sticky="ew", padx=6)
-
-        tk.Label(alt_frame, text="Alt Type(s):").grid(row=1, column=0, sticky="w")
-        alt_type_entry = tk.Entry(alt_frame)
-        alt_type_entry.insert(0, mon.alt_ptype or "")
-        alt_type_entry.grid(row=1, column=1, sticky="ew", padx=6)
-
-        def choose_alt_sprite():
-            filename = filedialog.askopenfilename(
-                title="Select alternate sprite PNG",
-                filetypes=[("PNG images", "*.png")],
-                parent=win,
-            )
-            if not filename:
-                return
-            if not filename.lower().endswith(".png"):
-                messagebox.showerror("Invalid file", "Alternate sprite must be a .png image.")
-                return
-            mon.alt_sprite = filename
-            mon.alt_form_name = alt_name_entry.get().strip() or "Alternate Form"
-            show_alt.set(True)
-            update_preview()
-
-        tk.Button(
-            alt_frame,
-            text="Set Alt Sprite",
-            command=choose_alt_sprite
-        ).grid(row=2, column=0, columnspan=2, pady=4)
-
-        alt_frame.columnconfigure(1, weight=1)
-
-        # =====================
-        # Moves editor
-        # =====================
-        moves_frame = tk.Frame(win, padx=10, pady=6)
-        moves_frame.pack(fill="x")
-        tk.Label(moves_frame, text="Moves (up to 4):").pack(anchor="w")
-
-        move_entries = []
-        while len(mon.moves) < 4:
-            mon.moves.append("")
-
-        for i in range(4):
-            ent = tk.Entry(moves_frame, width=30)
-            ent.insert(0, mon.moves[i])
-            ent.pack(pady=2)
-            move_entries.append(ent)
-
-        # =====================
-        # Held item
-        # =====================
-        item_frame = tk.Frame(win, padx=10, pady=6)
-        item_frame.pack(fill="x")
-        tk.Label(item_frame, text="Held Item:").pack(anchor="w")
-        item_entry = tk.Entry(item_frame, width=30)
-        item_entry.insert(0, mon.item if getattr(mon, "item", None) else "")
-        item_entry.pack(pady=4)
-
-        # =====================
-        # Buttons
-        # =====================
-        btn_frame = tk.Frame(win, pady=8)
-        btn_frame.pack(fill="x")
-
-        def on_save():
-            new_name = name_entry.get().strip()
-            if new_name:
-                mon.name = new_name
-
-            try:
-                lvl_val = int(level_entry.get().strip())
-            except ValueError:
-                messagebox.showerror("Invalid Level", "Level must be an integer.")
-                return
-
-            if not (MIN_LEVEL <= lvl_val <= MAX_LEVEL):
-                messagebox.showerror("Invalid Level", f"Level must be {MIN_LEVEL}–{MAX_LEVEL}.")
-                return
-
-            mon.level = lvl_val
-
-            new_type = type_entry.get().strip()
-            if not new_type:
-                messagebox.showerror("Invalid Type", "You must enter at least one type.")
-                return
-            mon.ptype = new_type
-
-            mon.moves = [e.get().strip() for e in move_entries if e.get().strip()]
-            mon.item = item_entry.get().strip() or None
-            mon.alt_form_name = alt_name_entry.get().strip() or mon.alt_form_name
-            mon.alt_ptype = alt_type_entry.get().strip() or None
-
-            self.update_display()
-            self.save_game()
-            win.destroy()
-
-        tk.Button(btn_frame, text="Save", command=on_save, bg="#4CAF50", fg="white").pack(side="left", padx=8)
-        tk.Button(btn_frame, text="Cancel", command=win.destroy).pack(side="right", padx=8)
-
-        win.transient(self)
-        win.grab_set()
-        self.wait_window(win)
+    def edit_at(self, area, index, changes):
+        """Apply field changes to the Pokémon in a slot (the editor without the window)."""
+        mon = self.player.get_slot(self.player.locate(area, index))
+        if mon:
+            self.editing_at = (area, index)
+            self.apply_edit(mon, changes)
 
     # ---------------- Drag and Drop ----------------
     def start_drag(self, event, area, index):
+        if area == "box" and self.smart_view is not None:
+            self.reveal_smart_slot(index)
+            return
         widget = event.widget
         mon = self.player.party[index] if area == "party" else self.player.get_current_box().pokemon[index]
+        loc = self.player.locate(area, index)
+        group = None
+        if loc in self.selection and len(self.selection) > 1:
+            group = self.selection.occupied()
+        elif len(self.selection):
+            self.clear_selection()
         if not mon:
             self.add_pokemon(index, area)
             return
@@ -810,7 +916,8 @@ class PCApp(tk.Tk):
             "pokemon": mon,
             "origin_index": index,
             "origin_area": area,
-            "floating": floating
+            "floating": floating,
+            "group": group,
         }
 
         self.bind("<Motion>", self.on_motion)
@@ -823,6 +930,7 @@ class PCApp(tk.Tk):
         y_root = self.winfo_pointery() - 30
         floating.geometry(f"+{x_root}+{y_root}")
 
+    @metrics.timed("end_drag")
     def end_drag(self, event):
         floating = self.drag_data.get("floating")
         if not floating:
@@ -851,28 +959,208 @@ class PCApp(tk.Tk):
                     target_area = "box"
                     break
 
+        if target_area == "box" and self.smart_view is not None:
+            target_area = None  # a smart box only shows Pokémon; it has no slots of its own to drop into
+
         origin_area = self.drag_data["origin_area"]
         origin_index = self.drag_data["origin_index"]
         mon = self.drag_data["pokemon"]
 
-        if target_area is not None:
-            if target_area == "party":
-                target_list = self.player.party
-            else:
-                target_list = self.player.get_current_box().pokemon
-            if origin_area == "party":
-                origin_list = self.player.party
-            else:
-                origin_list = self.player.get_current_box().pokemon
-            target_list[target_index], origin_list[origin_index] = origin_list[origin_index], target_list[target_index]
-
+        group = self.drag_data.get("group")
         floating.destroy()
-        self.drag_data = {"widget": None, "pokemon": None, "origin_index": None, "origin_area": None, "floating": None}
+        self.drag_data = {"widget": None, "pokemon": None, "origin_index": None, "origin_area": None, "floating": None, "group": None}
         self.unbind("<Motion>")
+
+        if group and target_area is not None:
+            # dropping a multi-selection fills free slots from the drop target onwards
+            box_index = self.player.current_box if target_area == "box" else None
+            self.warn_unplaced(self.batch_move(group, box_index, target_index, target_area)[1])
+        elif target_area is not None:
+            self.move_slot(origin_area, origin_index, target_area, target_index)
+        else:
+            self.update_display()
+
+    def move_slot(self, origin_area, origin_index, target_area, target_index):
+        """Swap two slots of the party / current box, then redraw and save (the drop half of a drag)."""
+        if (target_area, target_index) != (origin_area, origin_index):
+            self.player.swap_slots(
+                self.player.locate(origin_area, origin_index),
+                self.player.locate(target_area, target_index),
+            )
+            self.record("drag", **{"from": [origin_area, origin_index], "to": [target_area, target_index]})
+        self.update_display()
+        self.save_game()
+
+    def swap_locs(self, a, b):
+        """Swap two slots anywhere in the collection (a drag in the All Boxes overview), then redraw and save."""
+        self.player.swap_slots(a, b)
+        self.record("swap", a=list(a), b=list(b))
+        self.update_display()
+        self.save_game()
+
+    def deposit(self, index):
+        """Send a party member to the first free box slot ("Send to PC" in its info window), then redraw and save."""
+        src = ("party", None, index)
+        if self.player.get_slot(src) is None:
+            return
+        dst = self.player.first_free_slot()
+        if dst is None:
+            messagebox.showwarning("Not enough room", "Every box is full.")
+            return
+        self.player.swap_slots(src, dst)
+        self.record("deposit", index=index)
+        self.update_display()
+        self.save_game()
+
+    # ---------------- Multi-select ----------------
+    def mark_selected(self, widget, loc, bg):
+        if loc in self.selection:
+            widget.config(bg=SELECTED_BG, relief="sunken")
+        else:
+            widget.config(bg=bg, relief="raised")
+
+    def toggle_select(self, area, index):
+        loc = self.grid_loc(area, index)
+        if loc is not None:
+            self.selection.toggle(loc)
+        self.update_display()
+
+    def range_select(self, area, index):
+        if area == "box" and self.smart_view is not None:
+            # a range of the smart box page as shown, not of the boxes behind it
+            locs = self.smart.page(self.smart_view, self.smart_page)
+            anchor = self.selection.anchor
+            start = locs.index(anchor) if anchor in locs else index
+            for loc in locs[min(start, index):max(start, index) + 1]:
+                self.selection.add(loc)
+            if anchor in locs:
+                self.selection.anchor = anchor
+        else:
+            self.selection.select_range(self.player.locate(area, index))
+        self.update_display()
+
+    def clear_selection(self):
+        if len(self.selection):
+            self.selection.clear()
+            self.update_display()
+
+    def start_band(self, event, additive):
+        if self.smart_view is not None:
+            return
+        if not additive:
+            self.selection.clear()
+        rect = self.box_canvas.create_rectangle(event.x, event.y, event.x, event.y, outline="#2d1b0e", dash=(3, 2))
+        self.band = (event.x, event.y, rect)
+
+    def drag_band(self, event):
+        if self.band:
+            x0, y0, rect = self.band
+            self.box_canvas.coords(rect, x0, y0, event.x, event.y)
+
+    def end_band(self, event):
+        if not self.band:
+            return
+        x0, y0, rect = self.band
+        self.band = None
+        self.box_canvas.delete(rect)
+        left, right = sorted((x0, event.x))
+        top, bottom = sorted((y0, event.y))
+        for i, (x, y) in enumerate(self.slot_positions):
+            btn = self.slot_buttons[i]
+            if x < right and x + btn.winfo_width() > left and y < bottom and y + btn.winfo_height() > top:
+                self.selection.add(("box", self.player.current_box, i))
+        self.update_display()
+
+    def batch_move(self, locs, box_index=None, start=0, area="box"):
+        """
+        Move several Pokémon to free slots as one undo step, then redraw and
+        save once. Returns (number moved, locs that found no free slot).
+        """
+        with metrics.timer("batch_move"):
+            moves, unplaced = plan_move(self.player, locs, box_index, start, area)
+            new_locs = apply_move(self.player, self.history, moves) if moves else []
+        if moves:
+            self.record("batch_move", locs=[list(loc) for loc in locs], box=box_index, start=start, area=area)
+            self.selection.clear()
+            for loc in new_locs:
+                self.selection.add(loc)
         self.update_display()
+        if moves:
+            self.save_game()
+        return len(moves), unplaced
+
+    def warn_unplaced(self, unplaced):
+        if unplaced:
+            messagebox.showwarning("Not enough room", f"{len(unplaced)} Pokémon stayed where they were (no free slots).")
+
+    def move_selection(self):
+        locs = self.selection.occupied()
+        if not locs:
+            messagebox.showinfo("Move", "Select Pokémon first (Ctrl+click, Shift+click or drag a box around them).")
+            return
+        answer = self.ask_field(
+            "Move selected",
+            f"Move {len(locs)} Pokémon to box number (1-{len(self.player.boxes)}),\n"
+            "or leave blank for the first free slots:",
+            required=False,
+        )
+        if answer is None:
+            return
+        box_index = None
+        if answer.strip():
+            try:
+                box_index = int(answer) - 1
+            except ValueError:
+                box_index = -1
+            if not 0 <= box_index < len(self.player.boxes):
+                messagebox.showerror("Move", f"There is no box {answer}.")
+                return
+        self.warn_unplaced(self.batch_move(locs, box_index)[1])
+
+    def trade_selection(self):
+        """Send the selected Pokémon to another user's save (see trade.py)."""
+        locs = self.selection.occupied()
+        if not locs:
+            messagebox.showinfo("Trade", "Select the Pokémon to trade first (Ctrl+click, Shift+click or drag a box around them).")
+            return
+        username = self.ask_field("Trade", f"Send {len(locs)} Pokémon to which user?", required=True)
+        if username is None:
+            return
+        stored = auth.find_user(username)
+        if stored is None:
+            messagebox.showerror("Trade", f"There is no user named {username!r}.")
+            return
+        receiver = auth.get_save_path_for_user(stored)
+        if os.path.abspath(receiver) == os.path.abspath(self.save_path):
+            messagebox.showerror("Trade", "That's this save.")
+            return
+        if not messagebox.askyesno("Trade", f"Send {len(locs)} Pokémon to {stored}?\n\nThis can't be undone."):
+            return
+
+        mons = [self.player.get_slot(loc) for loc in locs]
+        for mon in mons:
+            if not mon.uid:
+                mon.uid = new_uid()
         self.save_game()
+        try:
+            moved = trade.transfer([trade.Trade(self.save_path, receiver, [mon.uid for mon in mons])])
+        except (trade.TradeError, OSError) as e:
+            messagebox.showerror("Trade failed", str(e))
+            return
+        storage.close_player(self.player)
+        self.load_game()
+        self.history.clear()
+        self.update_display()
+        self.back_up(now=True)
+        messagebox.showinfo("Trade", f"Sent {moved} Pokémon to {stored}.")
 
     def right_click(self, area, index):
+        if area == "box" and self.smart_view is not None:
+            loc = self.grid_loc(area, index)
+            if loc is not None:
+                self.build_panels()
+                self.info_panel.show(self.player.get_slot(loc))
+            return
         mon = self.player.party[index] if area == "party" else self.player.get_current_box().pokemon[index]
         if mon:
             choice = messagebox.askquestion(
@@ -890,13 +1178,135 @@ class PCApp(tk.Tk):
                 self.edit_pokemon(area, index)
 
     # ---------------- Box Navigation ----------------
+    def open_overview(self):
+        if self.overview:
+            self.overview.lift()
+            return
+        self.overview = BoxOverview(self)
+
+    def open_stats(self):
+        if self.stats_panel:
+            self.stats_panel.lift()
+            return
+        self.stats_panel = StatsPanel(self)
+
+    def open_duplicates(self):
+        if self.duplicates_window:
+            self.duplicates_window.lift()
+            return
+        self.duplicates_window = DuplicatesWindow(self)
+
+    def release_duplicates(self, groups):
+        """Release all but the keeper of each duplicate group (see dupes.py) as one undo step and save. Returns how many."""
+        released = release_extras(self.player, self.history, groups)
+        if released:
+            self.record("release_dupes", groups=[[list(loc) for loc, _ in group] for group in groups])
+            self.update_display()
+            self.save_game()
+        return released
+
+    def gather_duplicates(self, groups):
+        """Move the boxed members of duplicate groups into box(es) at the end and save. Returns how many moved."""
+        moved = gather(self.player, self.history, groups)
+        if moved:
+            self.record("gather_dupes", groups=[[list(loc) for loc, _ in group] for group in groups])
+            self.update_display()
+            self.save_game()
+        return moved
+
     def next_box(self):
-        self.player.current_box = (self.player.current_box + 1) % len(self.player.boxes)
+        if self.smart_view is not None:
+            self.turn_smart_page(+1)
+            return
+        self.player.set_current_box((self.player.current_box + 1) % len(self.player.boxes))
+        self.record("next_box")
         self.update_display()
         self.save_game()
 
     def prev_box(self):
-        self.player.current_box = (self.player.current_box - 1) % len(self.player.boxes)
+        if self.smart_view is not None:
+            self.turn_smart_page(-1)
+            return
+        self.player.set_current_box((self.player.current_box - 1) % len(self.player.boxes))
+        self.record("prev_box")
+        self.update_display()
+        self.save_game()
+
+    def goto_box(self, index):
+        """Show box index (double-click in the All Boxes overview)."""
+        self.player.set_current_box(index)
+        self.record("goto_box", index=index)
+        self.update_display()
+        self.save_game()
+
+    def add_box(self):
+        """Append an empty box and save. Returns its index."""
+        self.player.boxes.append(PCBox(f"Box {len(self.player.boxes) + 1}"))
+        self.record("add_box")
+        self.update_display()
+        self.save_game()
+        return len(self.player.boxes) - 1
+
+    # ---------------- Smart boxes ----------------
+    def open_smart_boxes(self):
+        if self.smart_window:
+            self.smart_window.lift()
+            return
+        self.smart_window = SmartBoxesWindow(self)
+
+    def open_smart_box(self, index):
+        """Show a smart box in the grid; Prev/Next then page through it."""
+        self.smart_view = index
+        self.smart_page = 0
+        self.record("smart_open", index=index)
+        self.update_display()
+
+    def close_smart_box(self):
+        if self.smart_view is not None:
+            self.smart_view = None
+            self.record("smart_close")
+            self.update_display()
+
+    def turn_smart_page(self, step):
+        self.smart_page = (self.smart_page + step) % self.smart.page_count(self.smart_view)
+        self.record("smart_page", step=step)
+        self.update_display()
+
+    def add_smart_box(self, name, query):
+        """Define a smart box and save. Returns its index; raises ValueError for a bad query."""
+        index = self.smart.add(name, query)
+        self.record("smart_add", name=name, query=query)
+        self.save_game()
+        return index
+
+    def delete_smart_box(self, index):
+        self.smart.remove(index)
+        self.record("smart_delete", index=index)
+        if self.smart_view == index:
+            self.smart_view = None
+        elif self.smart_view is not None and self.smart_view > index:
+            self.smart_view -= 1
+        self.save_game()
+        self.update_display()
+
+    def grid_loc(self, area, index):
+        """loc behind a party slot or a grid slot (a slot of the current box, or a smart box member)."""
+        if area == "box" and self.smart_view is not None:
+            locs = self.smart.page(self.smart_view, self.smart_page)
+            return locs[index] if index < len(locs) else None
+        return self.player.locate(area, index)
+
+    def reveal_smart_slot(self, index):
+        """Leave the smart box for the box the Pokémon in this grid slot lives in, with it selected."""
+        loc = self.grid_loc("box", index)
+        if loc is None:
+            return
+        self.smart_view = None
+        if loc[0] == "box":
+            self.player.set_current_box(loc[1])
+        self.record("reveal", index=index)
+        self.selection.clear()
+        self.selection.add(loc)
         self.update_display()
         self.save_game()
 
@@ -908,12 +1318,15 @@ LOGIN_WHITE = "#FFFFFF"
 LOGIN_OFF_WHITE = "#F5F5F5"
 LOGIN_DARK_BLUE = "#5B8FB9" # softer blue for labels
 
+AUTH_POLL_MS = 30  # how often the login window checks on a pending auth call
+
 
 class LoginWindow(tk.Tk):
     """Sign-up / Login portal; on success launches PCApp with the user's save file."""
 
     def __init__(self):
         super().__init__()
+        mark_startup("login Tk init")
         self.title("Pokémon PC Box — Sign in")
         self.geometry("600x420")
         self.resizable(False, False)
@@ -952,11 +1365,54 @@ class LoginWindow(tk.Tk):
 
         btn_frame = tk.Frame(form, bg=LOGIN_WHITE)
         btn_frame.grid(row=2, column=0, columnspan=2, pady=(20, 0))
-        tk.Button(btn_frame, text="Log in", command=self.do_login, width=10, bg=LOGIN_RED, fg="#2d1b0e", relief="flat", padx=14, pady=6, font=("Arial", 10, "bold"), cursor="hand2").pack(side="left", padx=8)
-        tk.Button(btn_frame, text="Sign up", command=self.do_signup, width=10, bg=LOGIN_BLUE, fg=LOGIN_WHITE, relief="flat", padx=14, pady=6, font=("Arial", 10, "bold"), cursor="hand2").pack(side="left", padx=8)
+        self.login_btn = tk.Button(btn_frame, text="Log in", command=self.do_login, width=10, bg=LOGIN_RED, fg="#2d1b0e", relief="flat", padx=14, pady=6, font=("Arial", 10, "bold"), cursor="hand2")
+        self.login_btn.pack(side="left", padx=8)
+        self.signup_btn = tk.Button(btn_frame, text="Sign up", command=self.do_signup, width=10, bg=LOGIN_BLUE, fg=LOGIN_WHITE, relief="flat", padx=14, pady=6, font=("Arial", 10, "bold"), cursor="hand2")
+        self.signup_btn.pack(side="left", padx=8)
+        self.status_label = tk.Label(form, text="", bg=LOGIN_WHITE, fg=LOGIN_DARK_BLUE, font=("Arial", 9))
+        self.status_label.grid(row=3, column=0, columnspan=2, pady=(10, 0))
+        self.pending = None  # auth future in flight
+        mark_startup("login widgets")
+        if STARTUP_PROFILE:
+            self.after_idle(self._report_first_paint)
+
+    def _report_first_paint(self):
+        mark_startup("login first paint")
+        STARTUP_PROFILE.report("login window")
+
+    # Password hashing is slow on purpose, so auth runs on auth's worker pool
+    # and the result is polled from the Tk loop.
+    def run_auth(self, future, on_done, status):
+        self.pending = future
+        self.set_busy(True, status)
+        self._poll_auth(on_done)
+
+    def _poll_auth(self, on_done):
+        if not self.pending.done():
+            self.after(AUTH_POLL_MS, self._poll_auth, on_done)
+            return
+        future, self.pending = self.pending, None
+        self.set_busy(False)
+        try:
+            ok, msg = future.result()
+        except Exception as e:
+            ok, msg = False, f"Unexpected error: {e}"
+        on_done(ok, msg)
+
+    def set_busy(self, busy, status=""):
+        state = "disabled" if busy else "normal"
+        self.login_btn.config(state=state)
+        self.signup_btn.config(state=state)
+        self.status_label.config(text=status)
+        self.config(cursor="watch" if busy else "")
 
     def do_login(self):
-        ok, msg = auth.verify_user(self.username_var.get(), self.password_var.get())
+        if self.pending:
+            return
+        future = auth.verify_user_async(self.username_var.get(), self.password_var.get())
+        self.run_auth(future, self.finish_login, "Signing in…")
+
+    def finish_login(self, ok, msg):
         if ok:
             save_path = auth.get_save_path_for_user(msg)
             self.launch_app(save_path, msg)
@@ -964,22 +1420,69 @@ class LoginWindow(tk.Tk):
             messagebox.showerror("Login failed", msg)
 
     def do_signup(self):
-        ok, msg = auth.register_user(self.username_var.get(), self.password_var.get())
+        if self.pending:
+            return
+        username = self.username_var.get().strip()
+        future = auth.register_user_async(username, self.password_var.get())
+        self.run_auth(future, lambda ok, msg: self.finish_signup(ok, msg, username), "Creating account…")
+
+    def finish_signup(self, ok, msg, username):
         if ok:
             messagebox.showinfo("Account created", msg)
-            save_path = auth.get_save_path_for_user(self.username_var.get().strip())
-            self.launch_app(save_path, self.username_var.get().strip())
+            save_path = auth.get_save_path_for_user(username)
+            self.launch_app(save_path, username)
         else:
             messagebox.showerror("Sign up failed", msg)
 
     def launch_app(self, save_path, username):
         self.destroy()
+        if STARTUP_PROFILE:
+            STARTUP_PROFILE.begin()
         player = Player()
-        app = PCApp(player, save_path=save_path, username=username)
+        recorder = Recorder(RECORD_PATH) if RECORD_PATH else None
+        app = PCApp(player, save_path=save_path, username=username, persist_history=PERSIST_HISTORY, recorder=recorder)
         app.mainloop()
 
 
+def main(argv=None):
+    global STARTUP_PROFILE, PERSIST_HISTORY, RECORD_PATH
+    parser = argparse.ArgumentParser(description="Pokémon PC Box simulator")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print import time and time-to-first-window for each startup phase",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="collect timers/counters for hot paths (F12 toggles the debug overlay)",
+    )
+    parser.add_argument("--metrics-file", help="append a JSON-lines metrics snapshot to this file periodically (implies --metrics)")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="seconds between metrics snapshots")
+    parser.add_argument("--cprofile", metavar="PATH", help="run the session under cProfile and write stats to PATH on close")
+    parser.add_argument("--persist-undo", action="store_true", help="keep the undo history across restarts")
+    parser.add_argument("--record", metavar="PATH", help="record this session's actions as a replay script (see session.py)")
+    args = parser.parse_args(argv)
+    PERSIST_HISTORY = args.persist_undo
+    RECORD_PATH = args.record
+    if args.profile_startup:
+        STARTUP_PROFILE = StartupProfile()
+    if args.metrics or args.metrics_file:
+        metrics.enable()
+        metrics.DUMP_PATH = args.metrics_file
+        metrics.DUMP_INTERVAL = args.metrics_interval
+
+    profiler = metrics.SessionProfiler(args.cprofile) if args.cprofile else None
+    if profiler:
+        profiler.start()
+    try:
+        login = LoginWindow()
+        login.mainloop()
+    finally:
+        if profiler:
+            profiler.stop()
+
+
 # --- MAIN ---
 if __name__ == "__main__":
-    login = LoginWindow()
-    login.mainloop()
+    main()
@@ -0,0 +1,172 @@
+"""
+Opt-in timers and counters for the app's hot paths.
+Everything is a no-op until enable() is called; when disabled, each
+instrumented call costs one flag check.
+
+    metrics.incr("sprite.hit")
+    with metrics.timer("sprite.decode"):
+        ...
+    @metrics.timed("save_game")
+    def save_game(...): ...
+"""
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+
+_enabled = False
+_lock = threading.Lock()
+_counters = {}
+_timers = {}  # name -> [count, total seconds, max seconds]
+
+# Periodic JSON-lines dump (set from the command line)
+DUMP_PATH = None
+DUMP_INTERVAL = 10.0
+
+
+def enable(flag: bool = True):
+    global _enabled
+    _enabled = flag
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _timers.clear()
+
+
+def incr(name: str, n: int = 1):
+    """Add n to counter name."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def observe(name: str, seconds: float):
+    """Record one duration for timer name."""
+    if not _enabled:
+        return
+    with _lock:
+        stat = _timers.get(name)
+        if stat is None:
+            _timers[name] = [1, seconds, seconds]
+        else:
+            stat[0] += 1
+            stat[1] += seconds
+            if seconds > stat[2]:
+                stat[2] = seconds
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str):
+    """Context manager that records how long its block took."""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def timed(name: str):
+    """Decorator that records every call's duration under name."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def snapshot() -> dict:
+    """Return current counters and timer summaries (durations in milliseconds)."""
+    with _lock:
+        timers = {
+            name: {
+                "count": count,
+                "total_ms": total * 1000,
+                "mean_ms": total * 1000 / count,
+                "max_ms": peak * 1000,
+            }
+            for name, (count, total, peak) in _timers.items()
+        }
+        return {"counters": dict(_counters), "timers": timers}
+
+
+def format_snapshot(snap: dict | None = None) -> str:
+    """Human-readable multi-line summary for the debug overlay."""
+    snap = snap or snapshot()
+    lines = []
+    for name, t in sorted(snap["timers"].items()):
+        lines.append(f"{name:<20}{t['count']:>6}x {t['mean_ms']:8.2f} ms  max {t['max_ms']:8.2f}")
+    for name, value in sorted(snap["counters"].items()):
+        lines.append(f"{name:<20}{value:>8}")
+    return "\n".join(lines) or "(no metrics yet)"
+
+
+def dump(path: str | None = None):
+    """Append one JSON line with a timestamped snapshot to path (default DUMP_PATH)."""
+    path = path or DUMP_PATH
+    if not path:
+        return
+    record = {"time": time.time(), **snapshot()}
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"⚠️ Failed to write metrics: {e}")
+
+
+class SessionProfiler:
+    """Runs cProfile for the whole session and writes the stats on stop()."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        try:
+            self.profile.dump_stats(self.path)
+            print(f"Profile written to {self.path} (view with: python -m pstats {self.path})")
+        except OSError as e:
+            print(f"⚠️ Failed to write profile: {e}")
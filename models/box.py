@@ -1,3 +1,11 @@
+def first_free(mask, start=0):
+    """
+    Lowest slot at or after start whose bit is set in a free-slot bitmap, or None.
+    """
+    mask = mask >> start << start
+    return (mask & -mask).bit_length() - 1 if mask else None
+
+
 class PCBox:
     def __init__(self, name="Box 1", capacity=30):
         """
@@ -7,12 +15,36 @@ class PCBox:
         self.capacity = capacity
         self.pokemon = [None] * capacity  # 30 slots by default
 
+    @property
+    def pokemon(self):
+        return self._pokemon
+
+    @pokemon.setter
+    def pokemon(self, slots):
+        """
+        Replaces every slot at once. Write single slots through
+        add_pokemon / remove_pokemon so free_mask stays right.
+        """
+        self._pokemon = slots
+        # bit i set = slot i is empty
+        self.free_mask = sum(1 << i for i, mon in enumerate(slots) if mon is None)
+
+    def first_free(self, start=0):
+        """
+        Returns the first empty slot at or after start, or None if there is none.
+        """
+        return first_free(self.free_mask, start)
+
     def add_pokemon(self, pokemon, slot):
         """
         Adds a Pokémon to a specific slot in the box.
         """
         if 0 <= slot < self.capacity:
-            self.pokemon[slot] = pokemon
+            self._pokemon[slot] = pokemon
+            if pokemon is None:
+                self.free_mask |= 1 << slot
+            else:
+                self.free_mask &= ~(1 << slot)
         else:
             raise IndexError("Invalid box slot number.")
 
@@ -21,4 +53,5 @@ class PCBox:
         Removes a Pokémon from a specific slot.
         """
         if 0 <= slot < self.capacity:
-            self.pokemon[slot] = None
\ No newline at end of file
+            self._pokemon[slot] = None
+            self.free_mask |= 1 << slot
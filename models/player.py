@@ -1,4 +1,6 @@
-from .box import PCBox
+import heapq
+
+from .box import PCBox, first_free
 
 class Player:
     def __init__(self):
@@ -9,8 +11,190 @@ class Player:
         self.boxes = [PCBox(f"Box {i+1}") for i in range(3)]  # 3 boxes for now
         self.current_box = 0     # Which box the player is currently viewing
 
+        # Objects notified of every change made through the methods below
+        # (see PlayerListener). Not saved.
+        self.listeners = []
+
+        # Set by storage: the save version this player was loaded from or last
+        # wrote, and that save's JSON text (the base for rebase_player).
+        self.save_version = None
+        self.save_base = None
+
+        # Smart box definitions, {"name": ..., "query": ...} (see smartbox.py). Saved.
+        self.smart_boxes = []
+
+        # Min-heap of box indices that may have an empty slot (see first_free_slot),
+        # built on first use for the boxes list it was built for.
+        self._free_boxes = None
+        self._free_listed = set()
+        self._free_for = None
+        self._free_len = 0
+
     def get_current_box(self):
         """
         Returns the currently active PC box.
         """
-        return self.boxes[self.current_box]
\ No newline at end of file
+        return self.boxes[self.current_box]
+
+    def iter_pokemon(self):
+        """
+        Yields (area, box_index, slot, pokemon) for every occupied slot.
+        Party slots have box_index None.
+        """
+        for i, mon in enumerate(self.party):
+            if mon:
+                yield "party", None, i, mon
+        for b, box in enumerate(self.boxes):
+            for i, mon in enumerate(box.pokemon):
+                if mon:
+                    yield "box", b, i, mon
+
+    # ---------------- Slot access ----------------
+    # A slot location ("loc") is a tuple (area, box_index, slot):
+    # ("party", None, 2) or ("box", 4, 17).
+
+    def locate(self, area, index):
+        """
+        Returns the loc of a party slot or a slot in the current box.
+        """
+        if area == "party":
+            return ("party", None, index)
+        return ("box", self.current_box, index)
+
+    def get_slot(self, loc):
+        area, box_index, index = loc
+        if area == "party":
+            return self.party[index]
+        return self.boxes[box_index].pokemon[index]
+
+    def _put(self, loc, mon):
+        area, box_index, index = loc
+        if area == "party":
+            self.party[index] = mon
+        elif mon is None:
+            self.boxes[box_index].remove_pokemon(index)
+            self._slot_freed(box_index)
+        else:
+            self.boxes[box_index].add_pokemon(mon, index)
+
+    # ---------------- Free slots ----------------
+    # A box is pushed on the heap when one of its slots empties and popped
+    # (lazily, in first_free_slot) once it is found full, so finding the
+    # first free slot costs O(log n) instead of a scan of every full box.
+
+    def box_free_mask(self, box_index):
+        """
+        Bitmap of the empty slots of a box (bit i set = slot i empty).
+        """
+        mask = getattr(self.boxes, "free_mask", None)  # a mapped save reads it without decoding the box
+        return mask(box_index) if mask else self.boxes[box_index].free_mask
+
+    def first_free_slot(self):
+        """
+        Returns the loc of the first empty box slot (lowest box, then lowest slot), or None if every box is full.
+        """
+        heap = self._free_heap()
+        while heap:
+            box_index = heap[0]
+            slot = first_free(self.box_free_mask(box_index))
+            if slot is not None:
+                return ("box", box_index, slot)
+            heapq.heappop(heap)
+            self._free_listed.discard(box_index)
+        return None
+
+    def reindex_free_slots(self):
+        """
+        Forget the free-slot heap; call after writing box slots directly rather than through set_slot etc.
+        """
+        self._free_boxes = None
+
+    def _free_heap(self):
+        count = len(self.boxes)
+        if self._free_boxes is None or self._free_for is not self.boxes or count < self._free_len:
+            # every box is a candidate until looked at; range() is already a heap
+            self._free_boxes = list(range(count))
+            self._free_listed = set(self._free_boxes)
+        else:
+            for box_index in range(self._free_len, count):
+                self._slot_freed(box_index)
+        self._free_for = self.boxes
+        self._free_len = count
+        return self._free_boxes
+
+    def _slot_freed(self, box_index):
+        if self._free_boxes is not None and box_index not in self._free_listed:
+            heapq.heappush(self._free_boxes, box_index)
+            self._free_listed.add(box_index)
+
+    def set_slot(self, loc, mon):
+        """
+        Puts mon (or None to empty it) in a slot and returns the previous occupant.
+        """
+        old = self.get_slot(loc)
+        self._put(loc, mon)
+        for listener in self.listeners:
+            listener.slot_changed(loc, old, mon)
+        return old
+
+    def swap_slots(self, a, b):
+        """
+        Swaps the contents of two slots (either may be empty).
+        """
+        mon_a, mon_b = self.get_slot(a), self.get_slot(b)
+        self._put(a, mon_b)
+        self._put(b, mon_a)
+        for listener in self.listeners:
+            listener.slots_swapped(a, b, mon_a, mon_b)
+
+    def edit_pokemon(self, mon, changes):
+        """
+        Sets the given attributes on mon. Returns the previous values of those attributes.
+        """
+        old = {field: getattr(mon, field, None) for field in changes}
+        for field, value in changes.items():
+            setattr(mon, field, value)
+        for listener in self.listeners:
+            listener.pokemon_edited(mon, old, dict(changes))
+        return old
+
+    def set_current_box(self, index):
+        """
+        Switches the viewed box.
+        """
+        old = self.current_box
+        self.current_box = index
+        if old != index:
+            for listener in self.listeners:
+                listener.box_switched(old, index)
+
+    def notify_reset(self):
+        """
+        Tells listeners that party/boxes were replaced wholesale (e.g. after loading a save).
+        """
+        self.reindex_free_slots()
+        for listener in self.listeners:
+            listener.reset(self)
+
+
+class PlayerListener:
+    """
+    Base class for objects in Player.listeners; override what you need.
+    """
+
+    def slot_changed(self, loc, old, new):
+        pass
+
+    def slots_swapped(self, a, b, mon_a, mon_b):
+        # by default a swap is two slot changes
+        self.slot_changed(a, mon_a, mon_b)
+        self.slot_changed(b, mon_b, mon_a)
+
+    def pokemon_edited(self, mon, old, new):
+        pass
+
+    def box_switched(self, old, new):
+        pass
+
+    def reset(self, player):
+        pass
@@ -1,3 +1,34 @@
+import hashlib
+import json
+import inspect
+import uuid
+
+# Level bounds (change if desired)
+MIN_LEVEL = 1
+MAX_LEVEL = 100
+
+
+def new_uid():
+    """Random identity for a newly created Pokémon."""
+    return uuid.uuid4().hex[:16]
+
+
+def content_uid(data, seen):
+    """
+    Identity for a Pokémon saved without a uid (older saves): a hash of its
+    fields plus how many identical Pokémon came before it in collection order.
+    seen is a collections.Counter shared across one pass over a save.
+    """
+    digest = hashlib.sha1(json.dumps(canonical(data), sort_keys=True).encode()).hexdigest()[:16]
+    seen[digest] += 1
+    return f"{digest}-{seen[digest]}"
+
+
+def canonical(data):
+    """Attribute dict without the uid and without unset fields, for comparing saves."""
+    return {k: v for k, v in data.items() if k != "uid" and v is not None and v != [] and v != ""}
+
+
 class Pokemon:
     def __init__(
         self,
@@ -10,6 +41,7 @@ class Pokemon:
         alt_form_name=None,
         alt_sprite=None,
         alt_ptype=None,
+        uid=None,
     ):
         self.name = name
         self.level = level
@@ -26,6 +58,26 @@ class Pokemon:
         self.alt_sprite = alt_sprite            # path string or None
         self.alt_ptype = alt_ptype              # e.g. "Ground,Fire"
 
+        # Stable identity used to match this Pokémon across copies of a save
+        # (see savediff.py). Older saves get one from storage.assign_uids.
+        self.uid = uid
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a Pokémon from saved attributes. Keys this version doesn't know
+        are kept as plain attributes (so they survive a save) instead of
+        raising TypeError; raises ValueError if name, level or ptype is missing.
+        """
+        missing = [f for f in REQUIRED_FIELDS if f not in data]
+        if missing:
+            raise ValueError(f"Pokémon is missing {', '.join(missing)}")
+        mon = cls(**{k: v for k, v in data.items() if k in FIELDS})
+        for key, value in data.items():
+            if key not in FIELDS and not hasattr(cls, key):
+                setattr(mon, key, value)
+        return mon
+
     def get_sprite_path(self, show_alt=False):
         """Returns the correct sprite path based on form toggle."""
         if show_alt and self.alt_sprite:
@@ -48,3 +100,7 @@ class Pokemon:
             f"{form_info}\n"
             f"Moves:\n{move_list}"
         )
+
+
+FIELDS = tuple(inspect.signature(Pokemon.__init__).parameters)[1:]
+REQUIRED_FIELDS = ("name", "level", "ptype")
@@ -0,0 +1,231 @@
+"""
+Scrollable "All Boxes" overview drawn on a single Canvas.
+Each box is one row of 30 thumbnails. Only the rows inside the viewport
+exist as canvas items: a fixed pool of rows is shifted and re-bound to
+other boxes as the view scrolls, so 500+ boxes cost the same as 5.
+"""
+import tkinter as tk
+
+THUMB = 26              # thumbnail size (px)
+CELL = 30               # horizontal distance between slots
+ROW_H = 34              # height of one box row
+LABEL_W = 80            # width of the box-name column
+SLOTS = 30
+EDGE = 24               # auto-scroll zone while dragging (px from top/bottom)
+
+ROW_BG = "#FFFFFF"
+ROW_BG_CURRENT = "#ffd6d6"
+VIEW_BG = "#9EC5E0"
+
+
+class BoxOverview(tk.Toplevel):
+    """All-boxes grid; drag a Pokémon onto any slot of any box to swap them."""
+
+    def __init__(self, app, height=600):
+        super().__init__(app)
+        self.app = app
+        self.title("All Boxes")
+        self.resizable(False, False)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.view_w = LABEL_W + SLOTS * CELL + 4
+        self.view_h = height
+        self.top = 0            # scroll offset in pixels
+        self.drag = None        # (box_index, slot) being dragged
+        self.drag_y = 0
+        self.autoscroll_job = None
+
+        toolbar = tk.Frame(self, bg=VIEW_BG)
+        toolbar.pack(fill="x")
+        tk.Button(toolbar, text="+ Box", command=self.add_box).pack(side="left", padx=6, pady=4)
+        self.status_lbl = tk.Label(toolbar, bg=VIEW_BG, font=("Arial", 10))
+        self.status_lbl.pack(side="left", padx=6)
+        tk.Label(
+            toolbar, text="Drag to move  •  double-click a row to open it", bg=VIEW_BG, font=("Arial", 9)
+        ).pack(side="right", padx=6)
+
+        body = tk.Frame(self)
+        body.pack(fill="both", expand=True)
+        self.canvas = tk.Canvas(
+            body, width=self.view_w, height=self.view_h, bg=VIEW_BG, highlightthickness=0
+        )
+        self.canvas.pack(side="left")
+        self.scrollbar = tk.Scrollbar(body, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+
+        # Placeholder for Pokémon whose sprite can't be loaded
+        self.missing_img = tk.PhotoImage(master=self, width=THUMB, height=THUMB)
+        self.missing_img.put("#cccccc", to=(0, 0, THUMB, THUMB))
+
+        # Fixed pool: enough rows to cover the viewport plus one partial row
+        self.pool = []
+        for r in range(self.view_h // ROW_H + 2):
+            tag = f"row{r}"
+            row = {
+                "tag": tag,
+                "box": None,
+                "y": r * ROW_H,
+                "bg": self.canvas.create_rectangle(
+                    2, r * ROW_H + 1, self.view_w - 2, (r + 1) * ROW_H - 1,
+                    fill=ROW_BG, outline="", tags=(tag, "pool"),
+                ),
+                "label": self.canvas.create_text(
+                    8, r * ROW_H + ROW_H // 2, anchor="w", font=("Arial", 9, "bold"), tags=(tag, "pool"),
+                ),
+                "cells": [
+                    self.canvas.create_image(
+                        LABEL_W + s * CELL, r * ROW_H + (ROW_H - THUMB) // 2, anchor="nw", tags=(tag, "pool"),
+                    )
+                    for s in range(SLOTS)
+                ],
+            }
+            self.pool.append(row)
+        self.drag_item = self.canvas.create_image(0, 0, state="hidden")
+
+        self.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_motion)
+        self.canvas.bind("<ButtonRelease-1>", self.on_release)
+        self.canvas.bind("<Double-Button-1>", self.on_double_click)
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll_to(self.top + (-3 if e.delta > 0 else 3) * ROW_H))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll_to(self.top - ROW_H * 3))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll_to(self.top + ROW_H * 3))
+
+        self.refresh()
+
+    # ---------------- Geometry ----------------
+    def content_height(self):
+        return len(self.app.player.boxes) * ROW_H
+
+    def hit_test(self, x, y):
+        """Return (box_index, slot) under canvas point (x, y), or None."""
+        if x < LABEL_W:
+            return None
+        slot = (x - LABEL_W) // CELL
+        box_index = int((y + self.top) // ROW_H)
+        if 0 <= slot < SLOTS and 0 <= box_index < len(self.app.player.boxes):
+            return box_index, int(slot)
+        return None
+
+    # ---------------- Rendering ----------------
+    def thumbnail(self, mon):
+        if not mon:
+            return ""
+        img = self.app.get_sprite(mon, size=(THUMB, THUMB))
+        return self.missing_img if img is self.app.add_icon else img
+
+    def bind_row(self, row, box_index):
+        """Point a pool row at box_index (and move it to that box's position)."""
+        target_y = box_index * ROW_H - self.top
+        if row["y"] != target_y:
+            self.canvas.move(row["tag"], 0, target_y - row["y"])
+            row["y"] = target_y
+        box = self.app.player.boxes[box_index]
+        current = box_index == self.app.player.current_box
+        self.canvas.itemconfig(row["tag"], state="normal")
+        self.canvas.itemconfig(row["bg"], fill=ROW_BG_CURRENT if current else ROW_BG)
+        self.canvas.itemconfig(row["label"], text=box.name)
+        for item, mon in zip(row["cells"], box.pokemon):
+            self.canvas.itemconfig(item, image=self.thumbnail(mon))
+        row["box"] = box_index
+
+    def render(self):
+        """Re-bind pool rows so they cover the boxes in the viewport."""
+        n_boxes = len(self.app.player.boxes)
+        first = int(self.top // ROW_H)
+        visible = set()
+        for box_index in range(first, min(n_boxes, first + len(self.pool))):
+            row = self.pool[box_index % len(self.pool)]
+            visible.add(id(row))
+            if row["box"] != box_index:
+                self.bind_row(row, box_index)
+        for row in self.pool:
+            if id(row) not in visible and row["box"] is not None:
+                self.canvas.itemconfig(row["tag"], state="hidden")
+                row["box"] = None
+        total = max(self.content_height(), 1)
+        self.scrollbar.set(self.top / total, min(1.0, (self.top + self.view_h) / total))
+
+    def refresh(self, box_indices=None):
+        """Redraw rows after the collection changed (all rows if box_indices is None)."""
+        for row in self.pool:
+            if row["box"] is not None and (box_indices is None or row["box"] in box_indices):
+                self.bind_row(row, row["box"])
+        self.status_lbl.config(text=f"{len(self.app.player.boxes)} boxes")
+        self.scroll_to(self.top)
+
+    def scroll_to(self, top):
+        top = int(max(0, min(top, self.content_height() - self.view_h)))
+        delta = top - self.top
+        if delta:
+            # one canvas call shifts every pooled item; rows are re-bound below
+            self.canvas.move("pool", 0, -delta)
+            for row in self.pool:
+                row["y"] -= delta
+            self.top = top
+        self.render()
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * self.content_height())
+        elif args[0] == "scroll":
+            step = self.view_h if args[2] == "pages" else ROW_H
+            self.scroll_to(self.top + int(args[1]) * step)
+
+    # ---------------- Actions ----------------
+    def close(self):
+        self.app.overview = None
+        self.destroy()
+
+    def add_box(self):
+        self.app.add_box()  # also refreshes this overview
+        self.scroll_to(self.content_height())
+
+    def on_double_click(self, event):
+        box_index = int((event.y + self.top) // ROW_H)
+        if 0 <= box_index < len(self.app.player.boxes):
+            self.app.goto_box(box_index)
+
+    def on_press(self, event):
+        hit = self.hit_test(event.x, event.y)
+        if not hit:
+            return
+        box_index, slot = hit
+        mon = self.app.player.boxes[box_index].pokemon[slot]
+        if not mon:
+            return
+        self.drag = hit
+        self.canvas.itemconfig(self.drag_item, image=self.thumbnail(mon), state="normal")
+        self.canvas.coords(self.drag_item, event.x, event.y)
+        self.canvas.tag_raise(self.drag_item)
+
+    def on_motion(self, event):
+        if not self.drag:
+            return
+        self.canvas.coords(self.drag_item, event.x, event.y)
+        self.drag_y = event.y
+        if (event.y < EDGE or event.y > self.view_h - EDGE) and not self.autoscroll_job:
+            self.autoscroll()
+
+    def autoscroll(self):
+        """Keep scrolling while a dragged Pokémon is held near the top/bottom edge."""
+        self.autoscroll_job = None
+        if not self.drag:
+            return
+        if self.drag_y < EDGE:
+            self.scroll_to(self.top - ROW_H // 2)
+        elif self.drag_y > self.view_h - EDGE:
+            self.scroll_to(self.top + ROW_H // 2)
+        else:
+            return
+        self.autoscroll_job = self.after(30, self.autoscroll)
+
+    def on_release(self, event):
+        if not self.drag:
+            return
+        origin = self.drag
+        self.drag = None
+        self.canvas.itemconfig(self.drag_item, state="hidden", image="")
+        target = self.hit_test(event.x, event.y)
+        if not target or target == origin:
+            return
+        self.app.swap_locs(("box", *origin), ("box", *target))  # also refreshes this overview
@@ -0,0 +1,323 @@
+"""
+Reusable Pokémon info and editor windows.
+Each window is built once and then re-bound to whichever Pokémon is opened
+by updating its widget values; closing only hides it. Sprite previews come
+from PCApp.get_display_sprite, which caches the base and alternate images.
+"""
+import tkinter as tk
+from tkinter import filedialog, messagebox
+
+import metrics
+import sprites
+
+EMPTY_PREVIEW = "[Sprite not found]"
+
+
+def ensure_alt_fields(mon):
+    """Ensure alt attributes exist (safe for old saves)."""
+    if not hasattr(mon, "alt_form_name"):
+        mon.alt_form_name = None
+    if not hasattr(mon, "alt_sprite"):
+        mon.alt_sprite = None
+    if not hasattr(mon, "alt_ptype"):
+        mon.alt_ptype = None
+
+
+def set_entry(entry, value):
+    entry.delete(0, "end")
+    entry.insert(0, value)
+
+
+class _PooledWindow(tk.Toplevel):
+    """Toplevel that hides instead of closing, so it can be shown again instantly."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.withdraw()
+        self.resizable(False, False)
+        self.transient(app)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+    def open(self):
+        self.deiconify()
+        self.lift()
+        self.grab_set()
+        self.update_idletasks()
+
+    def close(self):
+        self.grab_release()
+        self.withdraw()
+
+
+class PokemonInfoPanel(_PooledWindow):
+    """View-only details for one Pokémon."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.mon = None
+        self.party_index = None     # set while showing a party member, which can be sent to the PC
+        self.show_alt = tk.BooleanVar(value=False)
+
+        # ---- Basic Info ----
+        basic_frame = tk.Frame(self, padx=10, pady=8)
+        basic_frame.pack(fill="x")
+        tk.Label(basic_frame, text="Name:", font=("Arial", 10, "bold")).grid(row=0, column=0, sticky="w")
+        self.name_lbl = tk.Label(basic_frame)
+        self.name_lbl.grid(row=0, column=1, sticky="w", padx=6)
+        tk.Label(basic_frame, text="Level:", font=("Arial", 10, "bold")).grid(row=1, column=0, sticky="w")
+        self.level_lbl = tk.Label(basic_frame)
+        self.level_lbl.grid(row=1, column=1, sticky="w", padx=6)
+        tk.Label(basic_frame, text="Type:", font=("Arial", 10, "bold")).grid(row=2, column=0, sticky="w")
+        self.type_lbl = tk.Label(basic_frame)
+        self.type_lbl.grid(row=2, column=1, sticky="w", padx=6)
+
+        # ---- Sprite Preview (BASE + ALT toggle) ----
+        sprite_frame = tk.Frame(self, padx=10, pady=6)
+        sprite_frame.pack(fill="x")
+        tk.Label(sprite_frame, text="Sprite Preview:", font=("Arial", 10, "bold")).pack(anchor="w")
+        self.sprite_lbl = tk.Label(sprite_frame)
+        self.sprite_lbl.pack(pady=4)
+        self.alt_check = tk.Checkbutton(sprite_frame, variable=self.show_alt, command=self.update_preview)
+
+        # ---- Moves ----
+        moves_frame = tk.Frame(self, padx=10, pady=6)
+        moves_frame.pack(fill="x")
+        tk.Label(moves_frame, text="Moves:", font=("Arial", 10, "bold")).pack(anchor="w")
+        self.moves_lbl = tk.Label(moves_frame, justify="left")
+        self.moves_lbl.pack(anchor="w")
+
+        # ---- Held Item ----
+        item_frame = tk.Frame(self, padx=10, pady=6)
+        item_frame.pack(fill="x")
+        tk.Label(item_frame, text="Held Item:", font=("Arial", 10, "bold")).pack(anchor="w")
+        self.item_lbl = tk.Label(item_frame)
+        self.item_lbl.pack(anchor="w")
+
+        # ---- Close Button ----
+        btn_frame = tk.Frame(self, pady=10)
+        btn_frame.pack(fill="x")
+        self.close_btn = tk.Button(btn_frame, text="Close", command=self.close)
+        self.close_btn.pack()
+        self.deposit_btn = tk.Button(btn_frame, text="Send to PC", command=self.deposit)
+
+    def deposit(self):
+        """Move the party member shown to the first free box slot."""
+        index = self.party_index
+        self.close()
+        self.app.deposit(index)
+
+    def update_preview(self):
+        mon = self.mon
+        use_alt = bool(self.show_alt.get() and mon.alt_sprite)
+        self.type_lbl.config(text=mon.alt_ptype if use_alt and mon.alt_ptype else mon.ptype)
+        img = self.app.get_display_sprite(mon, use_alt=use_alt)
+        if img:
+            self.sprite_lbl.config(image=img, text="")
+        else:
+            self.sprite_lbl.config(image="", text=EMPTY_PREVIEW)
+
+    def show(self, mon, party_index=None):
+        """Re-bind the window to mon and show it. party_index: mon's party slot, if it is in the party."""
+        with metrics.timer("ui.show_pokemon"):
+            ensure_alt_fields(mon)
+            self.mon = mon
+            self.party_index = party_index
+            self.title(f"{mon.name} Info")
+            self.name_lbl.config(text=mon.name)
+            self.level_lbl.config(text=str(mon.level))
+            self.show_alt.set(False)
+            self.update_preview()
+            if mon.alt_sprite:
+                self.alt_check.config(text=f"Show {mon.alt_form_name}")
+                self.alt_check.pack()
+            else:
+                self.alt_check.pack_forget()
+            self.moves_lbl.config(text="\n".join(f"• {mv}" for mv in mon.moves) if mon.moves else "(No moves)")
+            self.item_lbl.config(text=mon.item if mon.item else "(None)")
+            if party_index is None:
+                self.deposit_btn.pack_forget()
+            else:
+                self.deposit_btn.pack(before=self.close_btn, pady=(0, 6))
+            self.open()
+
+
+class PokemonEditorPanel(_PooledWindow):
+    """Single-window editor for one Pokémon; Save hands the changed fields to app.apply_edit."""
+
+    def __init__(self, app, min_level, max_level):
+        super().__init__(app)
+        self.min_level = min_level
+        self.max_level = max_level
+        self.mon = None
+        self.pending_alt_sprite = None
+        self.show_alt = tk.BooleanVar(value=False)
+
+        # =====================
+        # Basic info frame
+        # =====================
+        basic_frame = tk.Frame(self, padx=10, pady=8)
+        basic_frame.pack(fill="x")
+        tk.Label(basic_frame, text="Name:").grid(row=0, column=0, sticky="w")
+        self.name_entry = tk.Entry(basic_frame)
+        self.name_entry.grid(row=0, column=1, sticky="ew", padx=6)
+        tk.Label(basic_frame, text="Level:").grid(row=1, column=0, sticky="w")
+        self.level_entry = tk.Entry(basic_frame)
+        self.level_entry.grid(row=1, column=1, sticky="ew", padx=6)
+        tk.Label(basic_frame, text="Type:").grid(row=2, column=0, sticky="w")
+        self.type_entry = tk.Entry(basic_frame)
+        self.type_entry.grid(row=2, column=1, sticky="ew", padx=6)
+        basic_frame.columnconfigure(1, weight=1)
+
+        # =====================
+        # Sprite preview (BASE + ALT toggle)
+        # =====================
+        sprite_frame = tk.Frame(self, padx=10, pady=6)
+        sprite_frame.pack(fill="x")
+        tk.Label(sprite_frame, text="Sprite Preview:").pack(anchor="w")
+        self.preview_type_lbl = tk.Label(sprite_frame)
+        self.preview_type_lbl.pack(anchor="w")
+        self.sprite_lbl = tk.Label(sprite_frame)
+        self.sprite_lbl.pack(pady=4)
+        self.alt_check = tk.Checkbutton(sprite_frame, variable=self.show_alt, command=self.update_preview)
+
+        # =====================
+        # Alternate Form Editor
+        # =====================
+        alt_frame = tk.LabelFrame(self, text="Alternate Form", padx=10, pady=6)
+        alt_frame.pack(fill="x", padx=10, pady=4)
+        tk.Label(alt_frame, text="Form Name:").grid(row=0, column=0, sticky="w")
+        self.alt_name_entry = tk.Entry(alt_frame)
+        self.alt_name_entry.grid(row=0, column=1, sticky="ew", padx=6)
+        tk.Label(alt_frame, text="Alt Type(s):").grid(row=1, column=0, sticky="w")
+        self.alt_type_entry = tk.Entry(alt_frame)
+        self.alt_type_entry.grid(row=1, column=1, sticky="ew", padx=6)
+        tk.Button(alt_frame, text="Set Alt Sprite", command=self.choose_alt_sprite).grid(
+            row=2, column=0, columnspan=2, pady=4
+        )
+        alt_frame.columnconfigure(1, weight=1)
+
+        # =====================
+        # Moves editor
+        # =====================
+        moves_frame = tk.Frame(self, padx=10, pady=6)
+        moves_frame.pack(fill="x")
+        tk.Label(moves_frame, text="Moves (up to 4):").pack(anchor="w")
+        self.move_entries = []
+        for _ in range(4):
+            ent = tk.Entry(moves_frame, width=30)
+            ent.pack(pady=2)
+            self.move_entries.append(ent)
+
+        # =====================
+        # Held item
+        # =====================
+        item_frame = tk.Frame(self, padx=10, pady=6)
+        item_frame.pack(fill="x")
+        tk.Label(item_frame, text="Held Item:").pack(anchor="w")
+        self.item_entry = tk.Entry(item_frame, width=30)
+        self.item_entry.pack(pady=4)
+
+        # =====================
+        # Buttons
+        # =====================
+        btn_frame = tk.Frame(self, pady=8)
+        btn_frame.pack(fill="x")
+        tk.Button(btn_frame, text="Save", command=self.on_save, bg="#4CAF50", fg="white").pack(side="left", padx=8)
+        tk.Button(btn_frame, text="Cancel", command=self.close).pack(side="right", padx=8)
+
+    def alt_sprite(self):
+        return self.pending_alt_sprite or self.mon.alt_sprite
+
+    def update_preview(self):
+        mon = self.mon
+        alt_sprite = self.alt_sprite()
+        use_alt = bool(self.show_alt.get() and alt_sprite)
+        display_type = mon.alt_ptype if use_alt and mon.alt_ptype else mon.ptype
+        self.preview_type_lbl.config(text=f"Displayed Type: {display_type}")
+        if use_alt:
+            img = self.app.get_display_sprite(mon, use_alt=True, path=alt_sprite)
+        else:
+            img = self.app.get_display_sprite(mon)
+        if img:
+            self.sprite_lbl.config(image=img, text="")
+        else:
+            self.sprite_lbl.config(image="", text=EMPTY_PREVIEW)
+        if alt_sprite:
+            form_name = self.alt_name_entry.get().strip() or mon.alt_form_name or "Alternate Form"
+            self.alt_check.config(text=f"Show {form_name}")
+            self.alt_check.pack()
+        else:
+            self.alt_check.pack_forget()
+
+    def choose_alt_sprite(self):
+        filename = filedialog.askopenfilename(
+            title="Select alternate sprite PNG",
+            filetypes=[("PNG images", "*.png")],
+            parent=self,
+        )
+        if not filename:
+            return
+        if not filename.lower().endswith(".png"):
+            messagebox.showerror("Invalid file", "Alternate sprite must be a .png image.", parent=self)
+            return
+        try:
+            self.pending_alt_sprite = sprites.ingest_sprite(filename)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Invalid file", f"Could not import sprite:\n{e}", parent=self)
+            return
+        self.show_alt.set(True)
+        self.update_preview()
+
+    def show(self, mon):
+        """Re-bind the editor to mon and show it."""
+        with metrics.timer("ui.edit_pokemon"):
+            ensure_alt_fields(mon)
+            self.mon = mon
+            self.pending_alt_sprite = None
+            self.title(f"Edit {mon.name}")
+            set_entry(self.name_entry, mon.name)
+            set_entry(self.level_entry, str(mon.level))
+            set_entry(self.type_entry, mon.ptype)
+            set_entry(self.alt_name_entry, mon.alt_form_name or "")
+            set_entry(self.alt_type_entry, mon.alt_ptype or "")
+            moves = list(mon.moves) + [""] * (4 - len(mon.moves))
+            for ent, mv in zip(self.move_entries, moves):
+                set_entry(ent, mv)
+            set_entry(self.item_entry, mon.item if getattr(mon, "item", None) else "")
+            self.show_alt.set(False)
+            self.update_preview()
+            self.open()
+            self.name_entry.focus_set()
+
+    def on_save(self):
+        mon = self.mon
+        try:
+            lvl_val = int(self.level_entry.get().strip())
+        except ValueError:
+            messagebox.showerror("Invalid Level", "Level must be an integer.", parent=self)
+            return
+        if not (self.min_level <= lvl_val <= self.max_level):
+            messagebox.showerror("Invalid Level", f"Level must be {self.min_level}–{self.max_level}.", parent=self)
+            return
+        new_type = self.type_entry.get().strip()
+        if not new_type:
+            messagebox.showerror("Invalid Type", "You must enter at least one type.", parent=self)
+            return
+
+        changes = {
+            "name": self.name_entry.get().strip() or mon.name,
+            "level": lvl_val,
+            "ptype": new_type,
+            "moves": [e.get().strip() for e in self.move_entries if e.get().strip()],
+            "item": self.item_entry.get().strip() or None,
+            "alt_ptype": self.alt_type_entry.get().strip() or None,
+        }
+        alt_name = self.alt_name_entry.get().strip()
+        if self.pending_alt_sprite:
+            changes["alt_sprite"] = self.pending_alt_sprite
+            changes["alt_form_name"] = alt_name or "Alternate Form"
+        else:
+            changes["alt_form_name"] = alt_name or mon.alt_form_name
+        self.close()
+        self.app.apply_edit(mon, changes)
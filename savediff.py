@@ -0,0 +1,403 @@
+"""
+Slot-level diff and three-way merge of save files.
+
+Pokémon are matched across saves by their uid; saves written before uids
+existed fall back to models.pokemon.content_uid (a field hash plus an
+occurrence count), which is also what storage.assign_uids gives them on load.
+
+Saves are read with a streaming parser that yields one slot at a time, so a
+diff holds only the first save's slots in memory and never builds Pokemon
+objects or a Player. Both JSON and .pcbox saves are accepted.
+
+    python savediff.py diff old.json new.json
+    python savediff.py merge base.json mine.json theirs.json -o merged.json
+"""
+import json
+import os
+import re
+import sys
+from collections import Counter
+
+import boxfile
+from models.pokemon import Pokemon, canonical, content_uid
+
+CHUNK = 1 << 16
+WHITESPACE = re.compile(r"[ \t\r\n]*")
+PARTY_SLOTS = 6
+BOX_SLOTS = 30
+
+
+# ---------------- Streaming readers ----------------
+class _JSONStream:
+    """Just enough of an incremental JSON reader to walk a save's arrays."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        data = self.f.read(CHUNK)
+        if not data:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+
+    def peek(self) -> str:
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self._fill()
+
+    def take(self, ch: str):
+        if self.peek() != ch:
+            raise ValueError(f"expected {ch!r} at offset {self.pos} of the buffered save")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # a value running up to the end of the buffer may continue (e.g. a number)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def items(self):
+        """Iterate over the elements of an array, leaving each one to the caller."""
+        self.take("[")
+        while self.peek() != "]":
+            yield
+            if self.peek() == ",":
+                self.take(",")
+        self.take("]")
+
+
+def iter_save(path: str):
+    """
+    Yield the contents of a save in collection order as
+        ("box", box_index, None)     at the start of every box
+        ("slot", loc, data)          for every slot (data is None when empty)
+        ("meta", key, value)         for other top-level values (current_box, smart_boxes)
+    """
+    if path.endswith(".pcbox"):
+        yield from _iter_mapped(path)
+        return
+    with open(path, "r") as f:
+        stream = _JSONStream(f)
+        if not stream.peek():
+            return
+        stream.take("{")
+        while stream.peek() != "}":
+            key = stream.value()
+            stream.take(":")
+            if key == "party":
+                for i, _ in enumerate(stream.items()):
+                    yield "slot", ("party", None, i), stream.value()
+            elif key == "boxes":
+                for b, _ in enumerate(stream.items()):
+                    yield "box", b, None
+                    for i, _ in enumerate(stream.items()):
+                        yield "slot", ("box", b, i), stream.value()
+            else:
+                yield "meta", key, stream.value()
+            if stream.peek() == ",":
+                stream.take(",")
+
+
+def _iter_mapped(path: str):
+    save = boxfile.MappedSave(path)
+    try:
+        yield "meta", "current_box", save.current_box
+        for key, value in save.read_meta().items():
+            yield "meta", key, value
+        for i, payload in enumerate(save.read_party()):
+            yield "slot", ("party", None, i), json.loads(payload) if payload else None
+        for b in range(save.box_count):
+            yield "box", b, None
+            _, payloads = save.read_box(b)
+            for i, payload in enumerate(payloads):
+                yield "slot", ("box", b, i), json.loads(payload) if payload else None
+    finally:
+        save.close()
+
+
+def iter_data(data: dict):
+    """Same events as iter_save, for save data already in memory."""
+    for key, value in data.items():
+        if key not in ("party", "boxes"):
+            yield "meta", key, value
+    for i, slot in enumerate(data.get("party", [])):
+        yield "slot", ("party", None, i), slot
+    for b, box in enumerate(data.get("boxes", [])):
+        yield "box", b, None
+        for i, slot in enumerate(box):
+            yield "slot", ("box", b, i), slot
+
+
+def iter_identified(path: str, meta: dict | None = None):
+    """Yield (uid, loc, data) for every occupied slot; fills meta with box count etc."""
+    return _identify(iter_save(path), meta)
+
+
+def _identify(events, meta: dict | None):
+    seen = Counter()
+    boxes = 0
+    for kind, key, value in events:
+        if kind == "box":
+            boxes = key + 1
+        elif kind == "meta":
+            if meta is not None:
+                meta[key] = value
+        elif value:
+            uid = value.get("uid") or content_uid(Pokemon.from_dict(value).__dict__, seen)
+            yield uid, key, value
+    if meta is not None:
+        meta["boxes"] = boxes
+
+
+def index_save(path: str) -> tuple[dict, dict]:
+    """Returns ({uid: (loc, data)}, meta)."""
+    meta = {}
+    mons = {uid: (loc, data) for uid, loc, data in iter_identified(path, meta)}
+    return mons, meta
+
+
+def index_data(data: dict) -> tuple[dict, dict]:
+    """index_save for save data already in memory."""
+    meta = {}
+    mons = {uid: (loc, slot) for uid, loc, slot in _identify(iter_data(data), meta)}
+    return mons, meta
+
+
+# ---------------- Diff ----------------
+class SaveDiff:
+    def __init__(self):
+        self.moved = []     # (uid, name, old_loc, new_loc)
+        self.added = []     # (uid, loc, data)
+        self.removed = []   # (uid, loc, data)
+        self.edited = []    # (uid, loc, {field: (old, new)})
+
+    def __bool__(self):
+        return bool(self.moved or self.added or self.removed or self.edited)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.removed)} removed, "
+            f"{len(self.moved)} moved, {len(self.edited)} edited"
+        )
+
+    def lines(self):
+        for uid, loc, data in self.added:
+            yield f"+ {data.get('name')} at {format_loc(loc)}"
+        for uid, loc, data in self.removed:
+            yield f"- {data.get('name')} from {format_loc(loc)}"
+        for uid, name, old, new in self.moved:
+            yield f"> {name}: {format_loc(old)} -> {format_loc(new)}"
+        for uid, loc, fields in self.edited:
+            changes = ", ".join(f"{k}: {old!r} -> {new!r}" for k, (old, new) in fields.items())
+            yield f"~ {format_loc(loc)}: {changes}"
+
+
+def field_changes(old: dict, new: dict) -> dict:
+    if old == new:
+        return {}
+    a, b = canonical(old), canonical(new)
+    return {k: (a.get(k), b.get(k)) for k in a.keys() | b.keys() if a.get(k) != b.get(k)}
+
+
+def diff_files(old_path: str, new_path: str) -> SaveDiff:
+    """Changes from old_path to new_path. Holds only old_path's slots in memory."""
+    old, _ = index_save(old_path)
+    diff = SaveDiff()
+    for uid, loc, data in iter_identified(new_path):
+        before = old.pop(uid, None)
+        if before is None:
+            diff.added.append((uid, loc, data))
+            continue
+        old_loc, old_data = before
+        if old_loc != loc:
+            diff.moved.append((uid, data.get("name"), old_loc, loc))
+        fields = field_changes(old_data, data)
+        if fields:
+            diff.edited.append((uid, loc, fields))
+    diff.removed = [(uid, loc, data) for uid, (loc, data) in old.items()]
+    return diff
+
+
+def format_loc(loc) -> str:
+    area, box_index, slot = loc
+    return f"party {slot + 1}" if area == "party" else f"box {box_index + 1} slot {slot + 1}"
+
+
+# ---------------- Merge ----------------
+def merge(base: dict | None, ours: dict, theirs: dict, current_box: int = 0, box_count: int = 0):
+    """
+    Three-way merge of indexes from index_save(). With base None it is a
+    two-way union. Returns (save_data, conflicts); on a conflict "ours" wins
+    and the conflict is described in the list.
+    """
+    conflicts = []
+    result = {}     # uid -> (wanted loc, data)
+    base = base if base is not None else {}
+
+    for uid in ours.keys() | theirs.keys() | base.keys():
+        b, o, t = base.get(uid), ours.get(uid), theirs.get(uid)
+        if b is None:
+            # added on one or both sides
+            if o and t and field_changes(o[1], t[1]):
+                conflicts.append(f"{o[1].get('name')}: added differently on both sides")
+            result[uid] = o or t
+            continue
+        if o is None and t is None:
+            continue
+        if o is None or t is None:
+            kept = o or t
+            if field_changes(b[1], kept[1]) or b[0] != kept[0]:
+                conflicts.append(f"{kept[1].get('name')}: released on one side, changed on the other (kept)")
+                result[uid] = kept
+            continue
+        data, loc = _merge_fields(b[1], o[1], t[1], conflicts), o[0]
+        if o[0] == b[0]:
+            loc = t[0]
+        elif t[0] != b[0] and t[0] != o[0]:
+            conflicts.append(f"{data.get('name')}: moved to {format_loc(o[0])} and {format_loc(t[0])}")
+        result[uid] = (loc, data)
+
+    return _layout(result, conflicts, current_box, box_count), conflicts
+
+
+def _merge_fields(base: dict, ours: dict, theirs: dict, conflicts: list) -> dict:
+    merged = dict(ours)
+    for field, (_, their_value) in field_changes(base, theirs).items():
+        if ours.get(field) == base.get(field):
+            merged[field] = their_value
+        elif ours.get(field) != their_value:
+            conflicts.append(f"{ours.get('name')}: {field} is {ours.get(field)!r} here, {their_value!r} there")
+    return merged
+
+
+def _layout(result: dict, conflicts: list, current_box: int, box_count: int) -> dict:
+    """Place merged Pokémon in their slots; ones whose slot is taken go to the first free slot."""
+    party = [None] * PARTY_SLOTS
+    boxes = [[None] * BOX_SLOTS for _ in range(box_count)]
+    homeless = []
+    for uid, (loc, data) in sorted(result.items(), key=lambda kv: _loc_key(kv[1][0])):
+        data = dict(data, uid=uid)
+        area, box_index, slot = loc
+        if area == "box":
+            while len(boxes) <= box_index:
+                boxes.append([None] * BOX_SLOTS)
+        row = party if area == "party" else boxes[box_index]
+        if slot < len(row) and row[slot] is None:
+            row[slot] = data
+        else:
+            homeless.append(data)
+    for data in homeless:
+        conflicts.append(f"{data.get('name')}: slot taken on both sides, moved to a free slot")
+        _place_free(boxes, data)
+    return {"party": party, "boxes": boxes, "current_box": current_box}
+
+
+def _loc_key(loc):
+    area, box_index, slot = loc
+    return (area != "party", box_index or 0, slot)
+
+
+def _place_free(boxes: list, data: dict):
+    for row in boxes:
+        for i, slot in enumerate(row):
+            if slot is None:
+                row[i] = data
+                return
+    boxes.append([data] + [None] * (BOX_SLOTS - 1))
+
+
+def merge_smart_boxes(base: list | None, ours: list | None, theirs: list | None) -> list:
+    """
+    Three-way merge of smart box definitions (see smartbox.py), matched by
+    name: a definition added, changed or deleted on one side is taken from
+    that side; where both sides changed one, ours wins. With base None
+    it is a union.
+    """
+    base = {d.get("name"): d for d in base or []}
+    ours = {d.get("name"): d for d in ours or []}
+    theirs = {d.get("name"): d for d in theirs or []}
+    merged = []
+    for name in list(ours) + [n for n in theirs if n not in ours]:
+        b, o, t = base.get(name), ours.get(name), theirs.get(name)
+        if o is None:
+            if b is None:
+                merged.append(t)    # added there
+            continue                # else deleted here
+        if t is None and b is not None and b == o:
+            continue                # deleted there, unchanged here
+        merged.append(t if b is not None and o == b and t is not None else o)
+    return merged
+
+
+def merge_files(base_path: str | None, ours_path: str, theirs_path: str):
+    """Merge three saves on disk. Returns (save_data, conflicts)."""
+    ours, meta = index_save(ours_path)
+    theirs, their_meta = index_save(theirs_path)
+    base, base_meta = index_save(base_path) if base_path else (None, {})
+    box_count = max(meta.get("boxes", 0), their_meta.get("boxes", 0))
+    data, conflicts = merge(base, ours, theirs, meta.get("current_box", 0), box_count)
+    smart = merge_smart_boxes(
+        base_meta.get("smart_boxes") if base_path else None, meta.get("smart_boxes"), their_meta.get("smart_boxes")
+    )
+    if smart:
+        data["smart_boxes"] = smart
+    return data, conflicts
+
+
+def write_save(path: str, data: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Diff or merge Pokémon PC Box saves")
+    sub = parser.add_subparsers(dest="command", required=True)
+    d = sub.add_parser("diff", help="slot-level changes from OLD to NEW")
+    d.add_argument("old")
+    d.add_argument("new")
+    d.add_argument("--summary", action="store_true", help="only print the counts")
+    m = sub.add_parser("merge", help="three-way merge (base may be '-' for a two-way union)")
+    m.add_argument("base")
+    m.add_argument("ours")
+    m.add_argument("theirs")
+    m.add_argument("-o", "--out", required=True)
+    args = parser.parse_args(argv)
+
+    if args.command == "diff":
+        diff = diff_files(args.old, args.new)
+        if not args.summary:
+            for line in diff.lines():
+                print(line)
+        print(diff.summary())
+        return 0 if not diff else 1
+
+    data, conflicts = merge_files(None if args.base == "-" else args.base, args.ours, args.theirs)
+    write_save(args.out, data)
+    for conflict in conflicts:
+        print(f"⚠️ {conflict}")
+    print(f"Wrote {args.out} ({len(conflicts)} conflicts)")
+    return 1 if conflicts else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
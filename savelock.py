@@ -0,0 +1,122 @@
+"""
+Advisory locks that keep several processes from writing one save at once.
+
+The lock is taken on a sidecar "<save>.lock" file rather than the save
+itself, because JSON saves are replaced atomically (a lock on the old inode
+would be lost) and .pcbox saves are memory-mapped. fcntl.flock is used on
+POSIX and msvcrt.locking on Windows. Locks are advisory: they only protect
+against other code that also goes through SaveLock (the app, validate.py,
+the stress benchmark).
+
+    with SaveLock(path):
+        ...read version, write save...
+
+The lock file stays open between uses (one handle per process and path),
+so an uncontended save costs one flock call. SaveLock is reentrant within a
+thread and excludes other threads of the same process too.
+"""
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_TIMEOUT = float(os.environ.get("POKEPC_LOCK_TIMEOUT", "10"))
+RETRY_SECONDS = 0.005
+
+
+class LockTimeout(OSError):
+    """Another process held the save lock for longer than the timeout."""
+
+
+class _Handle:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.f = open(path, "a+b")
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+
+
+_handles = {}   # (pid, lock path) -> _Handle; keyed by pid so forked children open their own
+_handles_lock = threading.Lock()
+
+
+def _handle(path: str) -> _Handle:
+    key = (os.getpid(), path)
+    with _handles_lock:
+        handle = _handles.get(key)
+        if handle is None:
+            handle = _handles[key] = _Handle(path)
+        return handle
+
+
+def lock_path(path: str) -> str:
+    return path + ".lock"
+
+
+def _try_lock(f, shared: bool) -> bool:
+    try:
+        if fcntl:
+            fcntl.flock(f.fileno(), (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+        else:
+            # msvcrt has no shared locks; readers take the exclusive one too
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError as e:
+        # flock says EWOULDBLOCK; msvcrt reports a held lock as EACCES / EDEADLOCK
+        if fcntl and not isinstance(e, BlockingIOError):
+            raise
+        return False
+
+
+def _unlock(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class SaveLock:
+    """
+    Context manager holding the lock for path. shared=True lets several
+    readers in at once (POSIX only; a nested SaveLock keeps the outer mode).
+    Raises LockTimeout after timeout seconds.
+    """
+
+    def __init__(self, path: str, shared: bool = False, timeout: float | None = None):
+        self.path = lock_path(os.path.abspath(path))
+        self.shared = shared
+        self.timeout = LOCK_TIMEOUT if timeout is None else timeout
+        self.handle = None
+
+    def __enter__(self):
+        handle = _handle(self.path)
+        if not handle.thread_lock.acquire(timeout=self.timeout):
+            raise LockTimeout(f"{self.path} is locked by another thread")
+        if handle.depth == 0:
+            deadline = None
+            while not _try_lock(handle.f, self.shared):
+                now = time.monotonic()
+                deadline = deadline or now + self.timeout
+                if now >= deadline:
+                    handle.thread_lock.release()
+                    raise LockTimeout(f"{self.path} is locked by another process")
+                time.sleep(RETRY_SECONDS)
+        handle.depth += 1
+        self.handle = handle
+        return self
+
+    def __exit__(self, *exc):
+        handle = self.handle
+        handle.depth -= 1
+        try:
+            if handle.depth == 0:
+                _unlock(handle.f)
+        finally:
+            handle.thread_lock.release()
@@ -0,0 +1,119 @@
+"""
+Multi-selection of slots and batch moves.
+
+A Selection is an ordered set of slot locs (see models.player), so it can
+span the party and several boxes. A batch move is planned first (every
+source paired with an empty target) and then applied inside one history
+group, which makes it a single undo step; the caller redraws and saves once.
+"""
+from models.box import first_free
+from models.player import PlayerListener
+
+
+class Selection(PlayerListener):
+    def __init__(self, player):
+        self.player = player
+        self.locs = {}      # loc -> None, insertion-ordered
+        self.anchor = None  # loc that shift-click ranges start from
+        player.listeners.append(self)
+
+    def __len__(self):
+        return len(self.locs)
+
+    def __contains__(self, loc):
+        return loc in self.locs
+
+    def __iter__(self):
+        return iter(list(self.locs))
+
+    def clear(self):
+        self.locs.clear()
+        self.anchor = None
+
+    def add(self, loc):
+        self.locs[loc] = None
+        self.anchor = loc
+
+    def toggle(self, loc):
+        if loc in self.locs:
+            del self.locs[loc]
+        else:
+            self.locs[loc] = None
+        self.anchor = loc
+
+    def select_range(self, loc):
+        """Add every slot between the anchor and loc (same party or box), inclusive."""
+        anchor = self.anchor
+        if anchor is None or anchor[:2] != loc[:2]:
+            self.add(loc)
+            return
+        lo, hi = sorted((anchor[2], loc[2]))
+        for slot in range(lo, hi + 1):
+            self.locs[(loc[0], loc[1], slot)] = None
+
+    def occupied(self):
+        """Selected locs that currently hold a Pokémon, in collection order."""
+        return sorted(
+            (loc for loc in self.locs if self.player.get_slot(loc) is not None),
+            key=lambda loc: (loc[0] != "party", loc[1] or 0, loc[2]),
+        )
+
+    # Selections point at slots, so anything that moves Pokémon wholesale drops them.
+    def reset(self, player):
+        self.clear()
+
+
+def free_slots(player, box_index=None, start=0, area="box"):
+    """
+    Yield empty slot locs: in the party, or in box_index from slot start
+    onwards. With box_index None every box is searched, from the first.
+    """
+    if area == "party":
+        for i, mon in enumerate(player.party):
+            if mon is None and i >= start:
+                yield ("party", None, i)
+        return
+    boxes = range(len(player.boxes)) if box_index is None else [box_index]
+    for n, b in enumerate(boxes):
+        # the box's free-slot bitmap skips full boxes without touching their slots;
+        # it is re-read after every yield in case the caller filled slots meanwhile
+        slot = first_free(player.box_free_mask(b), start if n == 0 else 0)
+        while slot is not None:
+            yield ("box", b, slot)
+            slot = first_free(player.box_free_mask(b), slot + 1)
+
+
+def plan_move(player, sources, box_index=None, start=0, area="box"):
+    """
+    Pair each source loc with an empty target loc. Sources already in the
+    target range stay put. Returns (moves, unplaced) where unplaced are
+    sources for which no free slot was left in the target range (the chosen
+    box, or with box_index None any box).
+    """
+    sources = [loc for loc in sources if player.get_slot(loc) is not None]
+    moving = set(sources)
+    targets = (loc for loc in free_slots(player, box_index, start, area) if loc not in moving)
+    moves = []
+    unplaced = []
+    for src in sources:
+        if area == "party" and src[0] == "party":
+            continue
+        if area == "box" and box_index is not None and src[0] == "box" and src[1] == box_index and src[2] >= start:
+            continue
+        dst = next(targets, None) if not unplaced else None
+        if dst is None:
+            unplaced.append(src)
+        else:
+            moves.append((src, dst))
+    return moves, unplaced
+
+
+def apply_move(player, history, moves, label="Move selection"):
+    """Carry out a plan from plan_move as one undo step. Returns the new locs."""
+    for src, dst in moves:
+        if player.get_slot(src) is None or player.get_slot(dst) is not None:
+            raise ValueError(f"stale move plan: {src} -> {dst}")
+    with history.group(label):
+        for src, dst in moves:
+            player.swap_slots(src, dst)
+    return [dst for _, dst in moves]
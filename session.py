@@ -0,0 +1,121 @@
+"""
+Record PCApp sessions as replayable scripts.
+
+With `python main.py --record session.jsonl` every user action that changes
+the collection is appended as one JSON line:
+
+    {"t": 0.84, "action": "drag", "from": ["box", 3], "to": ["party", 1]}
+    {"t": 2.10, "action": "next_box"}
+    {"t": 5.37, "action": "edit", "at": ["box", 12], "changes": {"level": 42}}
+
+t is seconds since recording started. Slot positions are (area, index) as
+the user saw them: the party, or a slot of the box being viewed; "swap"
+(a drag in the All Boxes overview) names full locs instead. While a
+smart box is shown (smart_open), page turns are smart_page steps and
+"reveal" leaves it for the box of the Pokémon in a grid slot.
+release_dupes / gather_dupes name each duplicate group by its members' locs.
+
+Trades, merges and backup restores are not recorded: they replace the save
+with one built from files outside the session (another user's save, a
+second copy, the backup store) that a replay against a throwaway copy
+doesn't have. A recording that contains one only replays faithfully up to
+that point.
+
+perform() replays one line against a PCApp through the same non-dialog
+methods the UI uses (move_slot, batch_move, place_pokemon, ...), so a
+replay does the same redraws and saves as the recorded session.
+See benchmarks/replay.py for the latency harness.
+"""
+import json
+import time
+
+from models.pokemon import Pokemon, new_uid
+
+ACTIONS = (
+    "drag", "swap", "deposit", "batch_move", "next_box", "prev_box", "goto_box", "add_box",
+    "add", "edit", "remove", "undo", "redo",
+    "smart_add", "smart_delete", "smart_open", "smart_page", "smart_close", "reveal",
+    "release_dupes", "gather_dupes",
+)
+
+
+class Recorder:
+    def __init__(self, path: str):
+        self.path = path
+        self.f = open(path, "w")
+        self.start = time.perf_counter()
+
+    def record(self, action: str, **fields):
+        entry = {"t": round(time.perf_counter() - self.start, 3), "action": action, **fields}
+        self.f.write(json.dumps(entry) + "\n")
+        self.f.flush()
+
+    def close(self):
+        if not self.f.closed:
+            self.f.close()
+
+
+def load_script(path: str) -> list[dict]:
+    steps = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                steps.append(json.loads(line))
+    return steps
+
+
+def perform(app, step: dict):
+    """Carry out one recorded step on app."""
+    action = step["action"]
+    if action == "drag":
+        app.move_slot(*step["from"], *step["to"])
+    elif action == "swap":
+        app.swap_locs(tuple(step["a"]), tuple(step["b"]))
+    elif action == "deposit":
+        app.deposit(step["index"])
+    elif action == "batch_move":
+        app.batch_move([tuple(loc) for loc in step["locs"]], step.get("box"), step.get("start", 0), step.get("area", "box"))
+    elif action == "next_box":
+        app.next_box()
+    elif action == "prev_box":
+        app.prev_box()
+    elif action == "goto_box":
+        app.goto_box(step["index"])
+    elif action == "add_box":
+        app.add_box()
+    elif action == "add":
+        fields = dict(step["pokemon"], uid=new_uid())
+        app.place_pokemon(*step["at"], Pokemon.from_dict(fields))
+    elif action == "edit":
+        app.edit_at(*step["at"], step["changes"])
+    elif action == "remove":
+        app.release_pokemon(*step["at"])
+    elif action == "undo":
+        app.undo()
+    elif action == "redo":
+        app.redo()
+    elif action == "smart_add":
+        app.add_smart_box(step["name"], step["query"])
+    elif action == "smart_delete":
+        app.delete_smart_box(step["index"])
+    elif action == "smart_open":
+        app.open_smart_box(step["index"])
+    elif action == "smart_page":
+        app.turn_smart_page(step["step"])
+    elif action == "smart_close":
+        app.close_smart_box()
+    elif action == "reveal":
+        app.reveal_smart_slot(step["index"])
+    elif action == "release_dupes":
+        app.release_duplicates(_groups(app.player, step["groups"]))
+    elif action == "gather_dupes":
+        app.gather_duplicates(_groups(app.player, step["groups"]))
+    else:
+        raise ValueError(f"unknown action {action!r}")
+
+
+def _groups(player, groups) -> list[list[tuple]]:
+    """Duplicate groups (see dupes.py) from recorded locs, skipping slots that are empty now."""
+    groups = [[(tuple(loc), player.get_slot(tuple(loc))) for loc in group] for group in groups]
+    return [[(loc, mon) for loc, mon in group if mon] for group in groups]
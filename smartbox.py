@@ -0,0 +1,316 @@
+"""
+Smart boxes: virtual boxes holding every Pokémon that matches a saved filter.
+
+A filter is a query of space-separated terms, all of which must match:
+
+    type:Dragon          has the type (either form)
+    level>50             also level>=, level<, level<= and level=
+    item:"Mega Stone"    held item contains the text; item:* holds anything
+    move:Surf            knows the move
+    form:Mega            alternate form name contains the text
+    name:char  or  char  name contains the text
+
+Definitions ({"name": ..., "query": ...}) are kept in the save
+(player.smart_boxes). SmartBoxes listens to the Player (see
+models.player.PlayerListener) and keeps each smart box's members as a sorted
+list of slot positions, adjusted by every change, so showing a page of a
+smart box is a slice of 30 positions, about what next_box costs for a real
+box. As in stats.CollectionStats, the first full pass happens lazily, the
+first time a smart box is read, and again after a reset (loading a save).
+"""
+import operator
+import re
+import shlex
+import tkinter as tk
+from bisect import bisect_left
+from functools import lru_cache
+from tkinter import messagebox, simpledialog
+
+from models.player import PlayerListener
+from stats import parse_types
+
+PAGE_SIZE = 30  # slots in the box grid
+TERM = re.compile(r"^(\w+)(>=|<=|[:=<>])(.*)$")
+LEVEL_OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "=": operator.eq, ":": operator.eq}
+TEXT_FIELDS = ("type", "item", "move", "form", "name")
+
+
+# ---------------- Queries ----------------
+def parse_query(query: str) -> list[tuple[str, str, str]]:
+    """(field, op, value) for each term of a query. Raises ValueError for a term it can't use."""
+    try:
+        words = shlex.split(query)
+    except ValueError as e:
+        raise ValueError(f"{query!r}: {e}") from None
+    terms = []
+    for word in words:
+        m = TERM.match(word)
+        field, op, value = (m.group(1).lower(), m.group(2), m.group(3).strip()) if m else ("name", ":", word)
+        if field == "level":
+            try:
+                int(value)
+            except ValueError:
+                raise ValueError(f"{word!r}: level must be compared with a number") from None
+        elif field not in TEXT_FIELDS:
+            raise ValueError(f"{word!r}: unknown field {field!r} (use type, level, item, move, form or name)")
+        elif op not in (":", "="):
+            raise ValueError(f"{word!r}: {field} can only be matched with ':'")
+        if not value:
+            raise ValueError(f"{word!r}: nothing to match")
+        terms.append((field, op, value))
+    return terms
+
+
+def _level(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=1024)
+def _types(ptype) -> frozenset:
+    # a collection has few distinct type strings; parse each once
+    return frozenset(parse_types(ptype))
+
+
+def _check(field: str, op: str, value: str):
+    """Predicate on a Pokémon for one term."""
+    if field == "level":
+        compare, n = LEVEL_OPS[op], int(value)
+        return lambda mon: (lvl := _level(mon.level)) is not None and compare(lvl, n)
+    if field == "type":
+        want = value.title()
+        return lambda mon: want in _types(mon.ptype) or want in _types(getattr(mon, "alt_ptype", None))
+    if field == "move":
+        want = value.lower()
+        return lambda mon: any(str(m).lower() == want for m in mon.moves or [])
+    if field == "item" and value == "*":
+        return lambda mon: bool(mon.item)
+    attr = {"item": "item", "form": "alt_form_name", "name": "name"}[field]
+    want = value.lower()
+    return lambda mon: want in str(getattr(mon, attr, None) or "").lower()
+
+
+def compile_query(query: str):
+    """A predicate matching the Pokémon a query describes. Raises ValueError like parse_query."""
+    checks = [_check(*term) for term in parse_query(query)]
+    return lambda mon: all(check(mon) for check in checks)
+
+
+def _never(mon):
+    return False
+
+
+# Members are kept as sortable slot keys: the party first, then boxes in order.
+def _key(loc):
+    area, box_index, slot = loc
+    return (area != "party", box_index or 0, slot)
+
+
+def _loc(key):
+    in_box, box_index, slot = key
+    return ("box", box_index, slot) if in_box else ("party", None, slot)
+
+
+# ---------------- Membership ----------------
+class SmartBoxes(PlayerListener):
+    def __init__(self, player):
+        self.player = player
+        self.dirty = True   # members need a full pass before use
+        self.checks = []    # compiled filter per definition
+        self.members = []   # per definition: sorted slot keys of the Pokémon it matches
+        self.where = {}     # id(Pokémon) -> slot key for the whole collection (edits only name the Pokémon)
+        player.listeners.append(self)
+
+    def __len__(self):
+        return len(self.player.smart_boxes)
+
+    def name(self, index: int) -> str:
+        return self.player.smart_boxes[index].get("name", "")
+
+    def query(self, index: int) -> str:
+        return self.player.smart_boxes[index].get("query", "")
+
+    # ---------------- Full pass ----------------
+    def recompute(self):
+        self.checks = []
+        for definition in self.player.smart_boxes:
+            try:
+                self.checks.append(compile_query(definition.get("query", "")))
+            except ValueError as e:
+                print(f"⚠️ Smart box {definition.get('name')!r}: {e}")
+                self.checks.append(_never)
+        self.members = [[] for _ in self.checks]
+        self.where = {}
+        pairs = list(zip(self.members, self.checks))
+        # iter_pokemon runs in key order, so appending keeps every list sorted
+        for area, box_index, slot, mon in self.player.iter_pokemon():
+            key = (area != "party", box_index or 0, slot)
+            self.where[id(mon)] = key
+            for members, check in pairs:
+                if check(mon):
+                    members.append(key)
+        self.dirty = False
+
+    def ensure(self):
+        if self.dirty:
+            self.recompute()
+        return self
+
+    # ---------------- Reading ----------------
+    def count(self, index: int) -> int:
+        return len(self.ensure().members[index])
+
+    def page_count(self, index: int) -> int:
+        return max(1, -(-self.count(index) // PAGE_SIZE))
+
+    def page(self, index: int, page: int) -> list:
+        """Locs of the Pokémon on one page of a smart box, in collection order."""
+        keys = self.ensure().members[index][page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+        return [_loc(key) for key in keys]
+
+    # ---------------- Definitions ----------------
+    def add(self, name: str, query: str) -> int:
+        """Add a smart box. Returns its index; raises ValueError for a bad query."""
+        check = compile_query(query)
+        self.player.smart_boxes.append({"name": name, "query": query})
+        if not self.dirty:
+            self.checks.append(check)
+            self.members.append([_key((a, b, s)) for a, b, s, mon in self.player.iter_pokemon() if check(mon)])
+        return len(self.player.smart_boxes) - 1
+
+    def remove(self, index: int):
+        del self.player.smart_boxes[index]
+        if not self.dirty:
+            del self.checks[index]
+            del self.members[index]
+
+    # ---------------- Incremental updates ----------------
+    def _remove(self, mon, key):
+        for members, check in zip(self.members, self.checks):
+            if check(mon):
+                i = bisect_left(members, key)
+                if i < len(members) and members[i] == key:
+                    del members[i]
+
+    def _insert(self, mon, key):
+        for members, check in zip(self.members, self.checks):
+            if check(mon):
+                i = bisect_left(members, key)
+                if i == len(members) or members[i] != key:
+                    members.insert(i, key)
+
+    def slot_changed(self, loc, old, new):
+        if self.dirty or old is new:
+            return
+        key = _key(loc)
+        if old is not None:
+            self.where.pop(id(old), None)
+            self._remove(old, key)
+        if new is not None:
+            self.where[id(new)] = key
+            self._insert(new, key)
+
+    def slots_swapped(self, a, b, mon_a, mon_b):
+        if self.dirty:
+            return
+        ka, kb = _key(a), _key(b)
+        for mon, key in ((mon_a, ka), (mon_b, kb)):
+            if mon is not None:
+                self._remove(mon, key)
+        for mon, key in ((mon_a, kb), (mon_b, ka)):
+            if mon is not None:
+                self.where[id(mon)] = key
+                self._insert(mon, key)
+
+    def pokemon_edited(self, mon, old, new):
+        if self.dirty:
+            return
+        key = self.where.get(id(mon))
+        if key is None:
+            return
+        for members, check in zip(self.members, self.checks):
+            i = bisect_left(members, key)
+            present = i < len(members) and members[i] == key
+            if check(mon) != present:
+                if present:
+                    del members[i]
+                else:
+                    members.insert(i, key)
+
+    def reset(self, player):
+        self.dirty = True
+
+
+# ---------------- Window ----------------
+class SmartBoxesWindow(tk.Toplevel):
+    """List of smart boxes with their sizes: create, open in the box grid, delete."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.title("Smart Boxes")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.listbox = tk.Listbox(self, width=60, height=12, font=("Arial", 10))
+        self.listbox.pack(fill="both", expand=True, padx=8, pady=(8, 0))
+        self.listbox.bind("<Double-Button-1>", lambda e: self.open())
+        buttons = tk.Frame(self, padx=8, pady=6)
+        buttons.pack(fill="x")
+        tk.Button(buttons, text="New…", command=self.new).pack(side="left")
+        tk.Button(buttons, text="Open", command=self.open).pack(side="left", padx=6)
+        tk.Button(buttons, text="Delete", command=self.delete).pack(side="left")
+        tk.Button(buttons, text="Show boxes", command=app.close_smart_box).pack(side="right")
+        self.refresh()
+
+    def refresh(self):
+        smart = self.app.smart
+        self.listbox.delete(0, "end")
+        self.listbox.insert("end", *(
+            f"{smart.name(i)}  —  {smart.query(i)}  ({smart.count(i)})" for i in range(len(smart))
+        ))
+
+    def picked(self):
+        picked = self.listbox.curselection()
+        return picked[0] if picked else None
+
+    def new(self):
+        name = simpledialog.askstring("New smart box", "Name:", parent=self)
+        if not name or not name.strip():
+            return
+        query = ""
+        while True:
+            query = simpledialog.askstring(
+                "New smart box",
+                "Filter, e.g.  type:Dragon level>50   or   item:\"Mega Stone\"\n"
+                "(fields: type, level, item, move, form, name)",
+                initialvalue=query,
+                parent=self,
+            )
+            if query is None:
+                return
+            try:
+                index = self.app.add_smart_box(name.strip(), query.strip())
+                break
+            except ValueError as e:
+                messagebox.showerror("New smart box", str(e), parent=self)
+        self.refresh()
+        self.app.open_smart_box(index)
+
+    def open(self):
+        index = self.picked()
+        if index is not None:
+            self.app.open_smart_box(index)
+
+    def delete(self):
+        index = self.picked()
+        if index is None:
+            return
+        if messagebox.askyesno("Delete smart box", f"Delete {self.app.smart.name(index)!r}? No Pokémon are touched.", parent=self):
+            self.app.delete_smart_box(index)
+            self.refresh()
+
+    def close(self):
+        self.app.smart_window = None
+        self.destroy()
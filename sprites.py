@@ -0,0 +1,332 @@
+"""
+Image loading helpers for the Pokémon PC Box simulator.
+PIL is only imported on first use so the login window can open without it.
+Resized copies of the static assets (box background, add icon) are cached
+under assets/cache/ so later launches load them with Tk's built-in PNG reader.
+
+User-chosen sprites are imported into a content-addressed store under
+assets/store/ and referenced as "store:<hash>"; identical files are kept once.
+
+Every sprite gets a small pyramid of pre-scaled copies (MIP_LEVELS: 32, 60
+and 96 px, plus the original as the native level), built once per source:
+next to the original for store sprites, under assets/cache/mip/ for anything
+else. load_sprite picks the smallest level at least as large as the widget,
+so a 60x60 slot never decodes a 2000x2000 download again. Building a level
+decodes at reduced size where the format allows it (Image.draft, JPEG) and
+box-reduces (Image.reduce) to about twice the target before the final
+LANCZOS pass.
+
+    python sprites.py migrate                 # import sprites referenced by all saves
+    python sprites.py migrate data/saves/maro.json
+"""
+import glob
+import hashlib
+import os
+import shutil
+import sys
+import tkinter as tk
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "assets", "cache")
+STORE_DIR = os.path.join(BASE_DIR, "assets", "store")
+STORE_PREFIX = "store:"
+MIP_LEVELS = (32, 60, 96)
+MIP_DIR = os.path.join(CACHE_DIR, "mip")
+BG_PATH = os.path.join(BASE_DIR, "assets", "bg", "box_bg.png")
+ADD_ICON_PATH = os.path.join(BASE_DIR, "assets", "icons", "add_icon.png")
+
+
+def _pil():
+    """Import PIL lazily and return (Image, ImageTk)."""
+    from PIL import Image, ImageTk
+    return Image, ImageTk
+
+
+def cached_resize(src: str, size: tuple[int, int], resample=None) -> str | None:
+    """
+    Return the path of a PNG copy of src resized to size, creating it if missing or stale.
+    Returns None if src does not exist or cannot be decoded.
+    """
+    if not os.path.exists(src):
+        return None
+    stem = os.path.splitext(os.path.basename(src))[0]
+    dst = os.path.join(CACHE_DIR, f"{stem}_{size[0]}x{size[1]}.png")
+    try:
+        if os.path.getmtime(dst) >= os.path.getmtime(src):
+            return dst
+    except OSError:
+        pass
+
+    Image, _ = _pil()
+    try:
+        img = Image.open(src)
+        img = img.resize(size, resample) if resample is not None else img.resize(size)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = dst + ".tmp"
+        img.save(tmp, "PNG")
+        os.replace(tmp, dst)
+    except Exception as e:
+        print(f"⚠️ Failed to cache {src}: {e}")
+        return None
+    return dst
+
+
+def load_background(master, size=(650, 550)) -> tk.PhotoImage:
+    """Box background at size; plain white if the asset is missing."""
+    path = cached_resize(BG_PATH, size)
+    if path:
+        try:
+            return tk.PhotoImage(master=master, file=path)
+        except tk.TclError:
+            pass
+    img = tk.PhotoImage(master=master, width=size[0], height=size[1])
+    img.put("#ffffff", to=(0, 0, size[0], size[1]))
+    return img
+
+
+def load_add_icon(master, size=(60, 60)) -> tk.PhotoImage:
+    """Empty-slot icon at size; a drawn red plus if the asset is missing."""
+    path = cached_resize(ADD_ICON_PATH, size)
+    if path:
+        try:
+            return tk.PhotoImage(master=master, file=path)
+        except tk.TclError:
+            pass
+    # Draw a fallback plus icon so app still runs if missing
+    w, h = size
+    img = tk.PhotoImage(master=master, width=w, height=h)
+    img.put("#f0f0f0", to=(0, 0, w, h))
+    img.put("#c80000", to=(w // 2 - 3, h * 2 // 15, w // 2 + 3, h * 13 // 15))
+    img.put("#c80000", to=(w * 2 // 15, h // 2 - 3, w * 13 // 15, h // 2 + 3))
+    return img
+
+
+def find_sprite_file(path: str) -> str | None:
+    """
+    Return an existing file for a stored sprite path, or None.
+    "store:" references map into the sprite store; relative paths are resolved
+    against BASE_DIR, then by file name inside assets/sprites/.
+    """
+    if not path:
+        return None
+    if path.startswith(STORE_PREFIX):
+        full = store_path(path)
+        return full if os.path.exists(full) else None
+    path = path.replace("\\", "/")  # saves written on Windows
+    full = path if os.path.isabs(path) else os.path.join(BASE_DIR, path)
+    if os.path.exists(full):
+        return full
+    by_name = os.path.join(BASE_DIR, "assets", "sprites", os.path.basename(path))
+    if os.path.exists(by_name):
+        return by_name
+    return None
+
+
+def resolve_sprite_path(path: str, name: str) -> str | None:
+    """
+    Return an existing file for a Pokémon's sprite path, or None.
+    Falls back to the built-in assets/sprites/<name>.png if the stored path is missing.
+    """
+    found = find_sprite_file(path)
+    if found:
+        return found
+    default = os.path.join(BASE_DIR, "assets", "sprites", f"{name.lower()}.png")
+    if os.path.exists(default):
+        return default
+    return None
+
+
+def decode_sprite(path: str, size=(60, 60)):
+    """Decode a sprite and return a PIL image resized to size."""
+    Image, _ = _pil()
+    img = Image.open(path)
+    return _downscale(img, size)
+
+
+def _downscale(img, size):
+    """
+    Resize an opened (not yet loaded) PIL image to size. Formats that can
+    decode at a reduced scale (draft) do so, and the result is box-reduced by
+    an integer factor to no less than twice size before the LANCZOS resample.
+    """
+    Image, _ = _pil()
+    img.draft("RGB", (size[0] * 2, size[1] * 2))
+    factor = min(img.width // (size[0] * 2), img.height // (size[1] * 2))
+    img = img.convert("RGBA")
+    if factor > 1:
+        img = img.reduce(factor)
+    return img.resize(size, Image.Resampling.LANCZOS)
+
+
+def mip_level(size) -> int | None:
+    """Smallest pyramid level that covers size, or None if only the original will do."""
+    need = max(size)
+    for level in MIP_LEVELS:
+        if level >= need:
+            return level
+    return None
+
+
+def mip_path(path: str, level: int) -> str:
+    """Where the level x level copy of the sprite at path lives."""
+    full = os.path.abspath(path)
+    if os.path.dirname(os.path.dirname(full)) == STORE_DIR:
+        return os.path.splitext(full)[0] + f"_{level}.png"
+    key = hashlib.sha1(full.encode()).hexdigest()[:20]
+    return os.path.join(MIP_DIR, key[:2], f"{key}_{level}.png")
+
+
+def build_mipmaps(path: str, levels=MIP_LEVELS) -> dict:
+    """
+    Write the pyramid for the sprite at path (only missing or stale levels).
+    Returns {level: file}. Raises OSError / ValueError like ingest_sprite.
+    """
+    src_mtime = os.path.getmtime(path)
+    todo = []
+    out = {}
+    for level in levels:
+        dst = mip_path(path, level)
+        out[level] = dst
+        try:
+            if os.path.getmtime(dst) >= src_mtime:
+                continue
+        except OSError:
+            pass
+        todo.append(level)
+    if not todo:
+        return out
+
+    Image, _ = _pil()
+    try:
+        img = Image.open(path)
+        base = _downscale(img, (max(todo), max(todo))) if img.width > max(todo) else img.convert("RGBA")
+    except Exception as e:
+        raise ValueError(f"{path} is not a readable image: {e}") from e
+    os.makedirs(os.path.dirname(out[todo[0]]), exist_ok=True)
+    for level in todo:
+        scaled = base if base.size == (level, level) else base.resize((level, level), Image.Resampling.LANCZOS)
+        tmp = out[level] + ".tmp"
+        scaled.save(tmp, "PNG")
+        os.replace(tmp, out[level])
+    return out
+
+
+def load_sprite(path: str, size=(60, 60)):
+    """
+    Return a PhotoImage of the sprite at size, read from the nearest pyramid
+    level. A level of exactly size is loaded directly by Tk; otherwise the
+    level (or, above the largest level, the original) is resized with PIL.
+    """
+    level = mip_level(size)
+    source = path
+    if level is not None:
+        try:
+            source = build_mipmaps(path)[level]
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not build sprite levels for {path}: {e}")
+        if source != path and size == (level, level):
+            return tk.PhotoImage(file=source)
+    _, ImageTk = _pil()
+    return ImageTk.PhotoImage(decode_sprite(source, size))
+
+
+# ---------------- Sprite store ----------------
+def store_path(ref: str, size: int | None = None) -> str:
+    """File for a "store:<hash>" reference (the original, or its size x size variant)."""
+    digest = ref[len(STORE_PREFIX):]
+    name = f"{digest}_{size}.png" if size else f"{digest}.png"
+    return os.path.join(STORE_DIR, digest[:2], name)
+
+
+def is_store_ref(path) -> bool:
+    return bool(path) and path.startswith(STORE_PREFIX)
+
+
+def ingest_sprite(src: str) -> str:
+    """
+    Copy a PNG into the sprite store and return its "store:<hash>" reference.
+    Identical files share one entry. Raises OSError if src can't be read and
+    ValueError if it isn't a decodable image.
+    """
+    with open(src, "rb") as f:
+        data = f.read()
+    ref = STORE_PREFIX + hashlib.sha256(data).hexdigest()[:32]
+    original = store_path(ref)
+    if os.path.exists(original) and all(os.path.exists(store_path(ref, n)) for n in MIP_LEVELS):
+        return ref
+
+    Image, _ = _pil()
+    try:
+        Image.open(src).verify()
+    except Exception as e:
+        raise ValueError(f"{src} is not a readable image: {e}") from e
+    os.makedirs(os.path.dirname(original), exist_ok=True)
+    if not os.path.exists(original):
+        tmp = original + ".tmp"
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, original)
+    build_mipmaps(original)
+    return ref
+
+
+def migrate_player(player) -> tuple[int, list[str]]:
+    """
+    Import every external sprite file referenced by player into the store and
+    rewrite the references. Returns (number of references rewritten, missing paths).
+    Built-in assets/sprites/ files are left as they are.
+    """
+    builtin_dir = os.path.join(BASE_DIR, "assets", "sprites")
+    rewritten = 0
+    missing = []
+    for *_, mon in player.iter_pokemon():
+        for field in ("sprite", "alt_sprite"):
+            path = getattr(mon, field, None)
+            if not path or is_store_ref(path):
+                continue
+            found = find_sprite_file(path)
+            if not found:
+                missing.append(path)
+                continue
+            if os.path.dirname(os.path.abspath(found)) == builtin_dir:
+                continue
+            try:
+                setattr(mon, field, ingest_sprite(found))
+                rewritten += 1
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not import {path}: {e}")
+    return rewritten, missing
+
+
+def main(argv=None):
+    import argparse
+    import storage
+    from models.player import Player
+
+    parser = argparse.ArgumentParser(description="Manage the sprite store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    mig = sub.add_parser("migrate", help="import sprites referenced by saves into assets/store/")
+    mig.add_argument("saves", nargs="*", help="save files (default: data/save.json and data/saves/*)")
+    args = parser.parse_args(argv)
+
+    saves = args.saves or [os.path.join(BASE_DIR, "data", "save.json")] + sorted(
+        glob.glob(os.path.join(BASE_DIR, "data", "saves", "*.json"))
+        + glob.glob(os.path.join(BASE_DIR, "data", "saves", "*.pcbox"))
+    )
+    for path in saves:
+        if path.endswith(".history.json"):
+            continue
+        player = Player()
+        if not storage.load_player(player, path):
+            continue
+        rewritten, missing = migrate_player(player)
+        if rewritten:
+            storage.save_player(player, path)
+        storage.close_player(player)
+        print(f"{path}: {rewritten} sprite reference(s) imported, {len(missing)} missing")
+        for m in missing:
+            print(f"    missing: {m}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
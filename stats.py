@@ -0,0 +1,222 @@
+"""
+Collection statistics: counts per type, level histogram, most common items
+and moves, and box fill.
+
+CollectionStats listens to the Player (see models.player.PlayerListener) and
+adjusts its counters by the difference each change makes, so keeping it up to
+date costs the same for 100 Pokémon as for 1,000,000. The first full count
+happens lazily, the first time the numbers are read; after a reset (loading a
+save) the next read counts everything again.
+"""
+import re
+import tkinter as tk
+from collections import Counter
+from itertools import chain
+
+from models.player import PlayerListener
+
+TYPE_SEPARATORS = re.compile(r"[,/]")
+TRACKED_FIELDS = ("ptype", "alt_ptype", "level", "item", "moves")
+LEVEL_BUCKET = 10
+TOP_N = 8
+
+
+def parse_types(ptype) -> list[str]:
+    """'Grass,Poison' / 'Grass/Poison' -> ['Grass', 'Poison']."""
+    if not ptype:
+        return []
+    return [t.strip().title() for t in TYPE_SEPARATORS.split(str(ptype)) if t.strip()]
+
+
+def _level(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _features(values: dict):
+    """(types, level, item, moves) counted for one Pokémon given its attribute values."""
+    types = set(parse_types(values.get("ptype"))) | set(parse_types(values.get("alt_ptype")))
+    return types, _level(values.get("level")), values.get("item") or None, values.get("moves") or []
+
+
+class CollectionStats(PlayerListener):
+    def __init__(self, player):
+        self.player = player
+        self.dirty = True   # counters need a full recount before use
+        self.total = 0
+        self.party = 0
+        self.types = Counter()
+        self.levels = Counter()
+        self.items = Counter()
+        self.moves = Counter()
+        self.box_fill = {}  # box index -> occupied slots (only boxes with at least one)
+        self.full_boxes = 0
+        player.listeners.append(self)
+
+    # ---------------- Full recount ----------------
+    def recompute(self):
+        """Count the whole collection from scratch using bulk Counter updates."""
+        mons = []
+        self.party = 0
+        self.box_fill = {}
+        self.full_boxes = 0
+        for area, box_index, _, mon in self.player.iter_pokemon():
+            mons.append(mon)
+            if area == "party":
+                self.party += 1
+            else:
+                self.box_fill[box_index] = self.box_fill.get(box_index, 0) + 1
+        for b, count in self.box_fill.items():
+            if count >= self.player.boxes[b].capacity:
+                self.full_boxes += 1
+
+        self.total = len(mons)
+        self.types = Counter(chain.from_iterable(
+            set(parse_types(m.ptype)) | set(parse_types(getattr(m, "alt_ptype", None))) for m in mons
+        ))
+        self.levels = Counter(lvl for lvl in map(_level, (m.level for m in mons)) if lvl is not None)
+        self.items = Counter(m.item for m in mons if m.item)
+        self.moves = Counter(chain.from_iterable(m.moves or [] for m in mons))
+        self.dirty = False
+
+    def ensure(self):
+        if self.dirty:
+            self.recompute()
+        return self
+
+    # ---------------- Incremental updates ----------------
+    def _count(self, values: dict, sign: int):
+        types, level, item, moves = _features(values)
+        for t in types:
+            self._bump(self.types, t, sign)
+        if level is not None:
+            self._bump(self.levels, level, sign)
+        if item:
+            self._bump(self.items, item, sign)
+        for move in moves:
+            self._bump(self.moves, move, sign)
+
+    @staticmethod
+    def _bump(counter, key, sign):
+        n = counter[key] + sign
+        if n > 0:
+            counter[key] = n
+        else:
+            del counter[key]
+
+    def _fill(self, loc, delta: int):
+        area, box_index, _ = loc
+        if area == "party":
+            self.party += delta
+            return
+        capacity = self.player.boxes[box_index].capacity
+        before = self.box_fill.get(box_index, 0)
+        after = before + delta
+        if after:
+            self.box_fill[box_index] = after
+        else:
+            self.box_fill.pop(box_index, None)
+        self.full_boxes += (after >= capacity) - (before >= capacity)
+
+    def slot_changed(self, loc, old, new):
+        if self.dirty or old is new:
+            return
+        if old is not None:
+            self._count(old.__dict__, -1)
+            self.total -= 1
+            self._fill(loc, -1)
+        if new is not None:
+            self._count(new.__dict__, +1)
+            self.total += 1
+            self._fill(loc, +1)
+
+    def slots_swapped(self, a, b, mon_a, mon_b):
+        # the same Pokémon are still in the collection; only fill can move
+        if self.dirty or (mon_a is None) == (mon_b is None):
+            return
+        self._fill(a, -1 if mon_a is not None else +1)
+        self._fill(b, -1 if mon_b is not None else +1)
+
+    def pokemon_edited(self, mon, old, new):
+        if self.dirty or not any(field in TRACKED_FIELDS for field in new):
+            return
+        before = dict(mon.__dict__)
+        before.update(old)
+        self._count(before, -1)
+        self._count(mon.__dict__, +1)
+
+    def reset(self, player):
+        self.dirty = True
+
+    # ---------------- Queries ----------------
+    def level_histogram(self, bucket=LEVEL_BUCKET) -> list[tuple[str, int]]:
+        """[('1-10', n), ('11-20', n), ...] up to the highest level present."""
+        buckets = Counter()
+        for level, n in self.ensure().levels.items():
+            buckets[max(level - 1, 0) // bucket] += n
+        if not buckets:
+            return []
+        return [(f"{b * bucket + 1}-{(b + 1) * bucket}", buckets[b]) for b in range(max(buckets) + 1)]
+
+    def fill_summary(self) -> dict:
+        self.ensure()
+        boxes = self.player.boxes
+        capacity = boxes[0].capacity if len(boxes) else 30
+        stored = sum(self.box_fill.values())
+        return {
+            "boxes": len(boxes),
+            "stored": stored,
+            "ratio": stored / (len(boxes) * capacity) if len(boxes) else 0.0,
+            "full": self.full_boxes,
+            "empty": len(boxes) - len(self.box_fill),
+            "current": self.box_fill.get(self.player.current_box, 0),
+            "capacity": capacity,
+        }
+
+
+class StatsPanel(tk.Toplevel):
+    """Collection dashboard; refresh() redraws from CollectionStats without rescanning the boxes."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.title("Collection Stats")
+        self.resizable(False, False)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.summary_lbl = tk.Label(self, justify="left", anchor="w", font=("Arial", 10, "bold"), padx=10, pady=8)
+        self.summary_lbl.pack(fill="x")
+        body = tk.Frame(self, padx=10, pady=4)
+        body.pack(fill="both")
+        self.sections = {}
+        for col, title in enumerate(("Types", "Levels", "Items", "Moves")):
+            tk.Label(body, text=title, font=("Arial", 10, "bold")).grid(row=0, column=col, sticky="w", padx=8)
+            lbl = tk.Label(body, justify="left", anchor="nw", font=("Courier", 9))
+            lbl.grid(row=1, column=col, sticky="nw", padx=8)
+            self.sections[title] = lbl
+        self.refresh()
+
+    def refresh(self):
+        stats = self.app.stats.ensure()
+        fill = stats.fill_summary()
+        self.summary_lbl.config(text=(
+            f"{stats.total} Pokémon  •  {stats.party} in party  •  "
+            f"{fill['stored']} in {fill['boxes']} boxes ({fill['ratio']:.0%} full)\n"
+            f"Full boxes: {fill['full']}  •  Empty boxes: {fill['empty']}  •  "
+            f"Current box: {fill['current']}/{fill['capacity']}"
+        ))
+        self.sections["Types"].config(text=_rows(sorted(stats.types.items(), key=lambda kv: (-kv[1], kv[0]))))
+        self.sections["Levels"].config(text=_rows(stats.level_histogram()))
+        self.sections["Items"].config(text=_rows(stats.items.most_common(TOP_N)))
+        self.sections["Moves"].config(text=_rows(stats.moves.most_common(TOP_N)))
+
+    def close(self):
+        self.app.stats_panel = None
+        self.destroy()
+
+
+def _rows(pairs) -> str:
+    lines = [f"{str(k)[:14]:<14} {n:>6}" for k, n in pairs]
+    return "\n".join(lines) or "(none)"
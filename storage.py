@@ -0,0 +1,353 @@
+"""
+Reading and writing save files for the Pokémon PC Box simulator.
+A save is a JSON object: {"version": int, "party": [6 slots], "boxes": [[30 slots], ...], "current_box": int},
+where each slot is either null or a Pokémon's attribute dict, plus "smart_boxes" (see smartbox.py) if any are defined.
+Paths ending in .pcbox use the memory-mapped format from boxfile.py instead.
+
+Several processes may open the same save. Every write takes the save's
+lock (savelock.py) and bumps its version. A player remembers the version it
+loaded or last wrote (player.save_version); if the file has moved on since,
+save_player raises SaveConflict instead of overwriting the other writer's
+changes, and rebase_player merges both sides and writes the result.
+"""
+import json
+import os
+import re
+from collections import Counter
+
+from struct import error as struct_error
+
+import boxfile
+import metrics
+import savediff
+from models.pokemon import Pokemon, content_uid
+from models.box import PCBox
+from savelock import SaveLock
+
+# JSON saves are written with "version" first, so it can be read from the first bytes
+VERSION_HEAD = re.compile(rb'\s*\{\s*"version"\s*:\s*(\d+)')
+
+
+class SaveConflict(Exception):
+    """The save on disk was written by someone else since this player loaded or saved it."""
+
+    def __init__(self, path: str, expected: int, found: int):
+        super().__init__(f"{path} is at version {found}, expected {expected}")
+        self.path = path
+        self.expected = expected
+        self.found = found
+
+
+def player_to_dict(player) -> dict:
+    """Return the JSON-serialisable save data for player."""
+    return {
+        "party": [mon.__dict__ if mon else None for mon in player.party],
+        "boxes": [
+            [mon.__dict__ if mon else None for mon in box.pokemon]
+            for box in player.boxes
+        ],
+        "current_box": getattr(player, "current_box", 0),
+        **({"smart_boxes": player.smart_boxes} if getattr(player, "smart_boxes", None) else {}),
+    }
+
+
+@metrics.timed("save_game")
+def save_player(player, path: str) -> int:
+    """
+    Write player to path. Returns the number of bytes written; raises OSError
+    on failure and SaveConflict if another writer saved since player's version.
+    """
+    with SaveLock(path):
+        found = read_version(path, player)
+        expected = getattr(player, "save_version", None)
+        if expected is not None and found is not None and found != expected:
+            metrics.incr("save.conflict")
+            raise SaveConflict(path, expected, found)
+        return _write(player, path, (found or 0) + 1)
+
+
+def replace_player(player, path: str, current) -> int:
+    """
+    Write player (a restored or merged collection) over the save at path,
+    which current has open, as the version after current's. Raises
+    SaveConflict if another writer saved since. The new save is written
+    beside the old one and current's file mapping released before the swap,
+    since Windows can't replace a mapped file; load current again afterwards.
+    """
+    with SaveLock(path):
+        found = read_version(path, current)
+        expected = getattr(current, "save_version", None)
+        if expected is not None and found is not None and found != expected:
+            metrics.incr("save.conflict")
+            raise SaveConflict(path, expected, found)
+        version = (found or 0) + 1
+        tmp = path + ".new"
+        if is_mapped_path(path):
+            written = boxfile.write_new(tmp, player, version)
+        else:
+            text = save_text(player, version)
+            with open(tmp, "w") as f:
+                f.write(text)
+            written = len(text)
+        close_player(current)
+        os.replace(tmp, path)
+    metrics.incr("save.count")
+    metrics.incr("save.bytes", written)
+    return written
+
+
+def _write(player, path: str, version: int) -> int:
+    """Write player as the given version. The caller holds the lock."""
+    if is_mapped_path(path):
+        written = boxfile.save_player(player, path, version)
+    else:
+        text = save_text(player, version)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+        player.save_base = text
+        written = len(text)
+    player.save_version = version
+    metrics.incr("save.count")
+    metrics.incr("save.bytes", written)
+    return written
+
+
+def save_text(player, version: int) -> str:
+    """The JSON save file contents for player at the given version."""
+    return json.dumps({"version": version, **player_to_dict(player)}, indent=2)
+
+
+def read_version(path: str, player=None) -> int | None:
+    """
+    Version of the save at path (0 for saves from before versions), or None
+    if there is none. Pass the player that has path open to skip a file read.
+    """
+    try:
+        if is_mapped_path(path):
+            return boxfile.read_version(path, player)
+        with open(path, "rb") as f:
+            head = f.read(64)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        return 0
+    match = VERSION_HEAD.match(head)
+    return int(match.group(1)) if match else 0
+
+
+def is_mapped_path(path: str) -> bool:
+    return path.endswith(".pcbox")
+
+
+def read_save(path: str) -> dict | None:
+    """Return the parsed save data at path, or None if missing, empty or unreadable."""
+    content = read_save_text(path)
+    return None if content is None else _parse(content)
+
+
+def read_save_text(path: str) -> str | None:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            content = f.read().strip()
+    except OSError as e:
+        print(f"⚠️ Failed to load save: {e}")
+        return None
+    metrics.incr("load.bytes", len(content))
+    if not content:
+        print("⚠️ Empty save file, starting fresh.")
+        return None
+    return content
+
+
+def apply_save(player, data: dict):
+    """Replace player's party, boxes and current box with the contents of data."""
+    # party
+    player.party = [_load_pokemon(mon) for mon in data.get("party", [])]
+
+    # boxes (grow the player's box list if the save has more boxes)
+    for i, box_data in enumerate(data.get("boxes", [])):
+        if i >= len(player.boxes):
+            player.boxes.append(PCBox(f"Box {i + 1}"))
+        player.boxes[i].pokemon = [_load_pokemon(mon) for mon in box_data]
+
+    # current box index
+    player.current_box = data.get("current_box", 0)
+    player.smart_boxes = [dict(d) for d in data.get("smart_boxes", [])]
+    player.reindex_free_slots()
+    assign_uids(player)
+
+
+def _load_pokemon(data):
+    """Pokemon for a saved slot, or None if it's empty or unusable (see validate.py)."""
+    if not data:
+        return None
+    try:
+        return Pokemon.from_dict(data)
+    except (TypeError, ValueError, AttributeError) as e:
+        print(f"⚠️ Skipping unreadable Pokémon: {e}")
+        return None
+
+
+def assign_uids(player):
+    """
+    Give every Pokémon that has no uid the content-derived one savediff would
+    compute for it, so copies of an old save agree on identities.
+    """
+    seen = Counter()
+    for *_, mon in player.iter_pokemon():
+        if not getattr(mon, "uid", None):
+            mon.uid = content_uid(mon.__dict__, seen)
+
+
+@metrics.timed("load_game")
+def load_player(player, path: str) -> bool:
+    """Load the save at path into player. Returns True if a save was loaded."""
+    player.save_version = None
+    player.save_base = None
+    if is_mapped_path(path):
+        if not os.path.exists(path):
+            return False
+        try:
+            with SaveLock(path, shared=True):
+                boxfile.load_player(player, path)
+        except (OSError, ValueError, struct_error) as e:
+            print(f"⚠️ Failed to load save: {e}")
+            return False
+        player.save_version = player.boxes.save.save_version
+        return True
+    with SaveLock(path, shared=True):
+        text = read_save_text(path)
+    data = None if text is None else _parse(text)
+    if data is None:
+        return False
+    apply_save(player, data)
+    player.save_version = data.get("version", 0)
+    player.save_base = text
+    return True
+
+
+def _parse(text: str) -> dict | None:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        print(f"⚠️ Failed to load save: {e}")
+        return None
+
+
+# ---------------- Concurrent writers ----------------
+def rebase_player(player, path: str) -> list[str]:
+    """
+    Merge what another writer saved at path with player's unsaved changes,
+    put the result in player and write it. Returns the merge conflicts (where
+    player's side was kept). Listeners are not notified; call notify_reset.
+
+    JSON saves get a three-way merge (savediff.merge) against the save as
+    this player last read or wrote it. Mapped .pcbox saves are merged slot by
+    slot: every slot this player changed is written over the new file, and
+    boxes it appended are added after the other writer's.
+    """
+    with SaveLock(path):
+        if isinstance(player.boxes, boxfile.MappedBoxes) and is_mapped_path(path):
+            conflicts = _rebase_mapped(player, path)
+        else:
+            conflicts = _rebase_data(player, path)
+        metrics.incr("save.rebase")
+        _write(player, path, (read_version(path) or 0) + 1)
+    return conflicts
+
+
+def _rebase_data(player, path: str) -> list[str]:
+    base_text = getattr(player, "save_base", None)
+    base, base_meta = savediff.index_data(json.loads(base_text)) if base_text else (None, {})
+    ours, meta = savediff.index_data(player_to_dict(player))
+    if os.path.exists(path):
+        theirs, their_meta = savediff.index_save(path)
+    else:
+        theirs, their_meta = {}, {}
+    box_count = max(meta.get("boxes", 0), their_meta.get("boxes", 0))
+    data, conflicts = savediff.merge(base, ours, theirs, player.current_box, box_count)
+    data["smart_boxes"] = savediff.merge_smart_boxes(
+        base_meta.get("smart_boxes", []), meta.get("smart_boxes"), their_meta.get("smart_boxes")
+    )
+    close_player(player)
+    if not isinstance(player.boxes, list):
+        player.boxes = [PCBox(f"Box {i + 1}") for i in range(3)]
+    apply_save(player, data)
+    return conflicts
+
+
+def _rebase_mapped(player, path: str) -> list[str]:
+    changed = player.boxes.pending(player.party)
+    added = player.boxes.unsaved()
+    current_box = player.current_box
+    base_smart = player.boxes.save.read_meta().get("smart_boxes", [])
+    our_smart = player.smart_boxes
+
+    boxfile.load_player(player, path)
+    player.smart_boxes = savediff.merge_smart_boxes(base_smart, our_smart, player.smart_boxes)
+    fresh = player.boxes
+    conflicts = []
+    ours = {mon.uid for mon in map(boxfile.decode, (p for _, p in changed.values())) if mon and mon.uid}
+    ours.update(mon.uid for box in added for mon in box.pokemon if mon and mon.uid)
+    displaced = []
+    moved_twice = set()
+    for (index, slot), (before, payload) in changed.items():
+        if index is None:
+            theirs = fresh.party_stored[slot]
+        else:
+            while index >= len(fresh):
+                fresh.append(PCBox(f"Box {len(fresh) + 1}"))
+            # a box missing on their side (e.g. restored from an older backup) is empty there
+            theirs = fresh.save.read_record(fresh.save.slot_offset(index, slot)) if index < fresh.save.box_count else None
+        if theirs != before and theirs != payload:
+            where = f"party {slot + 1}" if index is None else f"box {index + 1} slot {slot + 1}"
+            conflicts.append(f"{where}: changed on both sides (kept this one)")
+            # a Pokémon the other side put here that we don't have elsewhere must not be lost
+            mon = boxfile.decode(theirs)
+            if mon and (not mon.uid or mon.uid not in ours):
+                displaced.append(mon)
+            # both sides moved the Pokémon that was here: keep only our copy
+            mon = boxfile.decode(before)
+            if mon and mon.uid in ours:
+                moved_twice.add(mon.uid)
+        mon = boxfile.decode(payload)
+        if index is None:
+            player.party[slot] = mon
+        else:
+            player.boxes[index].add_pokemon(mon, slot)
+    first_added = len(fresh)
+    for box in added:
+        fresh.append(box)
+    if moved_twice:
+        for area, box_index, slot, mon in list(player.iter_pokemon()):
+            ours_here = (box_index, slot) in changed or (area == "box" and box_index >= first_added)
+            if mon.uid in moved_twice and not ours_here:
+                conflicts.append(f"{mon.name}: moved on both sides (kept this one's move)")
+                if area == "party":
+                    player.party[slot] = None
+                else:
+                    player.boxes[box_index].remove_pokemon(slot)
+    for mon in displaced:
+        conflicts.append(f"{mon.name}: slot taken on both sides, moved to a free slot")
+        _place_free(player, mon)
+    player.current_box = min(current_box, len(fresh) - 1)
+    return conflicts
+
+
+def _place_free(player, mon):
+    loc = player.first_free_slot()
+    if loc is None:
+        player.boxes.append(PCBox(f"Box {len(player.boxes) + 1}"))
+        loc = player.first_free_slot()
+    _, box_index, slot = loc
+    player.boxes[box_index].add_pokemon(mon, slot)
+
+
+def close_player(player):
+    """Release any file mapping held by player (only .pcbox saves hold one)."""
+    boxfile.close_player(player)
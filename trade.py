@@ -0,0 +1,257 @@
+"""
+Trading Pokémon between users' saves.
+
+A trade moves Pokémon, picked by uid (see models.pokemon), from one save to
+another. transfer() runs a batch of trades as one transaction over every
+save involved, so each save is read and written once however many trades
+touch it:
+
+  1. lock every save in sorted path order (savelock.SaveLock); two batches
+     always take their common locks in the same order, so they cannot deadlock
+  2. load each save and apply the trades in memory; received Pokémon go to
+     the first free box slot
+  3. prepare: list the new saves in a journal (data/trades/<id>.json), then
+     write each next to the real one ("<save>.trade-<id>"), fsynced
+  4. commit: mark the journal committed, which is the commit point, rename
+     every prepared file over its save, then delete the journal
+
+recover() finishes whatever a crash interrupted: committed journals are
+rolled forward, prepared ones rolled back (deleting whichever side files
+were written). recover() re-reads each journal once it holds the locks, so
+it acts on the state the owning process left. Every save written gets a new
+version, so a PCApp that has one of them open rebases onto the trade
+(see storage.py).
+
+    python trade.py alice bob <uid> [<uid> ...]
+    python trade.py --recover
+"""
+import json
+import os
+import sys
+import uuid
+from contextlib import ExitStack
+
+import auth
+import boxfile
+import storage
+from models.box import PCBox
+from models.player import Player
+from savelock import SaveLock
+
+TRADES_DIR = os.path.join(auth.BASE_DIR, "data", "trades")
+
+
+class TradeError(ValueError):
+    """A trade that cannot happen (unknown Pokémon, same save on both sides, ...)."""
+
+
+class Trade:
+    def __init__(self, giver: str, receiver: str, uids):
+        """giver and receiver are save paths; uids the Pokémon to move from giver to receiver."""
+        self.giver = os.path.abspath(giver)
+        self.receiver = os.path.abspath(receiver)
+        self.uids = list(uids)
+
+    def to_dict(self) -> dict:
+        return {"giver": self.giver, "receiver": self.receiver, "uids": self.uids}
+
+
+def user_trade(giver: str, receiver: str, uids) -> Trade:
+    """A Trade between two registered users."""
+    names = []
+    for username in (giver, receiver):
+        stored = auth.find_user(username)
+        if stored is None:
+            raise TradeError(f"No user named {username!r}")
+        names.append(stored)
+    if names[0] == names[1]:
+        raise TradeError("Can't trade with yourself")
+    return Trade(auth.get_save_path_for_user(names[0]), auth.get_save_path_for_user(names[1]), uids)
+
+
+# ---------------- Transactions ----------------
+def transfer(trades, journal_dir: str = TRADES_DIR) -> int:
+    """
+    Carry out every trade or none. Returns how many Pokémon moved; raises
+    TradeError (nothing written) if any trade is impossible.
+    """
+    trades = [t for t in trades if t.uids]
+    for t in trades:
+        if t.giver == t.receiver:
+            raise TradeError(f"{t.giver}: giver and receiver are the same save")
+    if not trades:
+        return 0
+    recover(journal_dir)
+    paths = sorted({p for t in trades for p in (t.giver, t.receiver)})
+
+    with ExitStack() as locks:
+        for path in paths:
+            locks.enter_context(SaveLock(path))
+        players = {path: _load(path) for path in paths}
+        moved = _apply(trades, players)
+        txid = uuid.uuid4().hex
+        files = [[path, f"{path}.trade-{txid}"] for path in paths]
+        journal = {"id": txid, "state": "prepared", "files": files, "trades": [t.to_dict() for t in trades]}
+        # journal first, so a crash while preparing leaves nothing recover() can't find
+        _write_journal(journal_dir, journal)
+        try:
+            for path, target in files:
+                _prepare(players[path], path, target)
+        except BaseException:
+            _roll_back(journal)
+            os.remove(_journal_path(journal_dir, txid))
+            raise
+
+        journal["state"] = "committed"
+        _write_journal(journal_dir, journal)
+        _roll_forward(journal)
+        os.remove(_journal_path(journal_dir, txid))
+    return moved
+
+
+def _load(path: str) -> Player:
+    """
+    Load path into a Player detached from the file, so nothing done to it
+    can reach the save before the commit (the new save is written whole by
+    _prepare).
+    """
+    player = Player()
+    storage.load_player(player, path)
+    if storage.is_mapped_path(path) and player.save_version is not None:
+        boxes = list(player.boxes)
+        storage.close_player(player)
+        player.boxes = boxes
+    return player
+
+
+def _apply(trades, players) -> int:
+    """Move the Pokémon between the loaded players."""
+    where = {}      # path -> {uid: loc}, built the first time a save gives something
+    moved = 0
+    for t in trades:
+        giver, receiver = players[t.giver], players[t.receiver]
+        if t.giver not in where:
+            where[t.giver] = {mon.uid: (area, b, i) for area, b, i, mon in giver.iter_pokemon() if mon.uid}
+        for uid in t.uids:
+            loc = where[t.giver].pop(uid, None)
+            if loc is None:
+                raise TradeError(f"{uid} is not in {os.path.basename(t.giver)}")
+            mon = giver.set_slot(loc, None)
+            dst = receiver.first_free_slot()
+            if dst is None:
+                receiver.boxes.append(PCBox(f"Box {len(receiver.boxes) + 1}"))
+                dst = receiver.first_free_slot()
+            receiver.set_slot(dst, mon)
+            if t.receiver in where:
+                where[t.receiver][uid] = dst
+            moved += 1
+    return moved
+
+
+def _prepare(player, path: str, target: str):
+    """Write player as path's next version into the side file target."""
+    version = (storage.read_version(path) or 0) + 1
+    if storage.is_mapped_path(path):
+        boxfile.write_new(target, player, version)
+        _fsync(target)
+    else:
+        with open(target, "w") as f:
+            f.write(storage.save_text(player, version))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _fsync(path: str):
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+
+
+def _roll_forward(journal: dict):
+    for path, prepared in journal["files"]:
+        if os.path.exists(prepared):
+            os.replace(prepared, path)
+
+
+def _roll_back(journal: dict):
+    for _, prepared in journal["files"]:
+        if os.path.exists(prepared):
+            os.remove(prepared)
+
+
+# ---------------- Journal ----------------
+def _journal_path(journal_dir: str, txid: str) -> str:
+    return os.path.join(journal_dir, f"{txid}.json")
+
+
+def _write_journal(journal_dir: str, journal: dict):
+    os.makedirs(journal_dir, exist_ok=True)
+    path = _journal_path(journal_dir, journal["id"])
+    with open(path + ".tmp", "w") as f:
+        json.dump(journal, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def _read_journal(path: str) -> dict | None:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def recover(journal_dir: str = TRADES_DIR) -> int:
+    """Finish or undo transactions a crash interrupted. Returns how many were found."""
+    if not os.path.isdir(journal_dir):
+        return 0
+    found = 0
+    for name in sorted(os.listdir(journal_dir)):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(journal_dir, name)
+        journal = _read_journal(path)
+        if journal is None:
+            continue
+        with ExitStack() as locks:
+            for save_path in sorted(p for p, _ in journal["files"]):
+                locks.enter_context(SaveLock(save_path))
+            # the owner may have committed (or finished) while we waited for the locks
+            journal = _read_journal(path)
+            if journal is None:
+                continue
+            if journal["state"] == "committed":
+                _roll_forward(journal)
+            else:
+                _roll_back(journal)
+            os.remove(path)
+            found += 1
+    return found
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Move Pokémon from one user's save to another's")
+    parser.add_argument("giver", nargs="?")
+    parser.add_argument("receiver", nargs="?")
+    parser.add_argument("uids", nargs="*")
+    parser.add_argument("--recover", action="store_true", help="finish trades interrupted by a crash")
+    args = parser.parse_args(argv)
+
+    if args.recover:
+        print(f"Recovered {recover()} interrupted trades")
+        return 0
+    if not (args.giver and args.receiver and args.uids):
+        parser.error("giver, receiver and at least one uid are required")
+    try:
+        moved = transfer([user_trade(args.giver, args.receiver, args.uids)])
+    except TradeError as e:
+        print(f"⚠️ {e}")
+        return 1
+    print(f"Moved {moved} Pokémon from {args.giver} to {args.receiver}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,425 @@
+"""
+Validate (and optionally repair) every save in data/saves in parallel.
+
+Each file is checked in a worker process for:
+    structure     party of 6 slots, boxes of 30 slots, current_box in range,
+                  smart box definitions well-formed
+    fields        required fields present, correct types; unknown fields are
+                  reported but kept (Pokemon.from_dict keeps them too)
+    levels        MIN_LEVEL <= level <= MAX_LEVEL
+    sprites       sprite / alt_sprite resolve to a file (see sprites.find_sprite_file)
+
+Sprite lookups go through a cache shared by all workers: each file collects
+its distinct sprite references, fetches what the cache already knows in one
+round trip and publishes the ones it had to resolve in another.
+
+With --repair, fixable problems are fixed and the file is rewritten
+atomically (temp file + rename). Unknown save keys and Pokémon fields are
+only removed with --strip-unknown as well. --report writes a JSON report
+with the issues and timing of every file.
+
+    python validate.py                       # check data/saves/*
+    python validate.py --repair --report validation.json
+    python validate.py data/save.json --workers 1
+"""
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+
+import boxfile
+import sprites
+import storage
+from models.player import Player
+from models.pokemon import FIELDS, MAX_LEVEL, MIN_LEVEL, REQUIRED_FIELDS
+from savelock import SaveLock
+from smartbox import parse_query
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SAVES_DIR = os.path.join(BASE_DIR, "data", "saves")
+PARTY_SLOTS = 6
+BOX_SLOTS = 30
+MIN_BOXES = 3
+OPTIONAL_STR = ("sprite", "item", "alt_form_name", "alt_sprite", "alt_ptype", "uid")
+
+_shared_cache = None    # set in each worker by _init_worker
+
+
+def _init_worker(cache):
+    global _shared_cache
+    _shared_cache = cache
+
+
+# ---------------- Reading / writing ----------------
+def read_raw(path: str) -> dict:
+    """Save contents as plain data without building Pokemon objects."""
+    with SaveLock(path, shared=True):
+        if not storage.is_mapped_path(path):
+            with open(path, "r") as f:
+                return json.load(f)
+        save = boxfile.MappedSave(path)
+        try:
+            decode = lambda p: json.loads(p) if p else None
+            return {
+                "version": save.save_version,
+                "party": [decode(p) for p in save.read_party()],
+                "boxes": [[decode(p) for p in save.read_box(b)[1]] for b in range(save.box_count)],
+                "current_box": save.current_box,
+                **save.read_meta(),
+            }
+        finally:
+            save.close()
+
+
+def write_repaired(path: str, data: dict, expected: int):
+    """
+    Write data over path as a new save version, so open apps see the change
+    (see storage.py). Raises storage.SaveConflict if the file is no longer
+    at version expected, i.e. it was saved while it was being checked.
+    """
+    with SaveLock(path):
+        found = storage.read_version(path) or 0
+        if found != expected:
+            raise storage.SaveConflict(path, expected, found)
+        version = found + 1
+        if storage.is_mapped_path(path):
+            player = Player()
+            storage.apply_save(player, data)
+            boxfile.write_new(path, player, version)
+            return
+        data = {"version": version, **{k: v for k, v in data.items() if k != "version"}}
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+
+
+# ---------------- Checks ----------------
+class FileCheck:
+    def __init__(self, path: str, strip_unknown: bool = False):
+        self.path = path
+        self.strip_unknown = strip_unknown
+        self.issues = []
+        self.pokemon = 0
+
+    def issue(self, where, problem: str, fixed: bool):
+        self.issues.append({"where": where, "problem": problem, "fixed": fixed})
+
+    def check(self, data) -> dict:
+        """Validate data, fixing what can be fixed in place. Returns the repaired data."""
+        if not isinstance(data, dict) or not ("party" in data or "boxes" in data):
+            raise ValueError("not a save file (no party or boxes)")
+        for key in list(data):
+            if key not in ("version", "party", "boxes", "current_box", "smart_boxes"):
+                self.issue("save", f"unknown key {key!r}", self.strip_unknown)
+                if self.strip_unknown:
+                    del data[key]
+
+        overflow = []
+        party = data.get("party")
+        if not isinstance(party, list):
+            self.issue("party", "missing or not a list", True)
+            party = []
+        party = [self.check_pokemon(mon, f"party {i + 1}") for i, mon in enumerate(party)]
+        if len(party) > PARTY_SLOTS:
+            overflow += [m for m in party[PARTY_SLOTS:] if m]
+            self.issue("party", f"{len(party)} slots, expected {PARTY_SLOTS}", True)
+        elif len(party) < PARTY_SLOTS:
+            self.issue("party", f"{len(party)} slots, expected {PARTY_SLOTS}", True)
+        data["party"] = (party + [None] * PARTY_SLOTS)[:PARTY_SLOTS]
+
+        boxes = data.get("boxes")
+        if not isinstance(boxes, list):
+            self.issue("boxes", "missing or not a list", True)
+            boxes = []
+        fixed_boxes = []
+        for b, box in enumerate(boxes):
+            if isinstance(box, dict) and isinstance(box.get("pokemon"), list):
+                box = box["pokemon"]
+            if not isinstance(box, list):
+                self.issue(f"box {b + 1}", "not a list of slots", True)
+                box = []
+            box = [self.check_pokemon(mon, f"box {b + 1} slot {s + 1}") for s, mon in enumerate(box)]
+            if len(box) != BOX_SLOTS:
+                self.issue(f"box {b + 1}", f"{len(box)} slots, expected {BOX_SLOTS}", True)
+                overflow += [m for m in box[BOX_SLOTS:] if m]
+            fixed_boxes.append((box + [None] * BOX_SLOTS)[:BOX_SLOTS])
+        while len(fixed_boxes) < MIN_BOXES:
+            fixed_boxes.append([None] * BOX_SLOTS)
+        for mon in overflow:
+            _place_free(fixed_boxes, mon)
+        if overflow:
+            self.issue("boxes", f"moved {len(overflow)} Pokémon from overfull slots into free slots", True)
+        data["boxes"] = fixed_boxes
+
+        current = data.get("current_box", 0)
+        if not isinstance(current, int) or not 0 <= current < len(fixed_boxes):
+            self.issue("current_box", f"{current!r} is not a valid box index", True)
+            data["current_box"] = 0
+
+        self.check_smart_boxes(data)
+
+        version = data.get("version", 0)
+        if not isinstance(version, int) or isinstance(version, bool) or version < 0:
+            self.issue("version", f"{version!r} is not a save version", True)
+            data["version"] = 0
+        return data
+
+    def check_smart_boxes(self, data):
+        """Smart box definitions (see smartbox.py): a list of {"name", "query"} with usable queries."""
+        if "smart_boxes" not in data:
+            return
+        definitions = data["smart_boxes"]
+        if not isinstance(definitions, list):
+            self.issue("smart_boxes", "not a list; removed", True)
+            del data["smart_boxes"]
+            return
+        kept = []
+        for i, d in enumerate(definitions):
+            where = f"smart box {i + 1}"
+            if not isinstance(d, dict) or not isinstance(d.get("name"), str) or not isinstance(d.get("query"), str):
+                self.issue(where, "needs a name and a query; removed", True)
+                continue
+            try:
+                parse_query(d["query"])
+            except ValueError as e:
+                self.issue(where, f"{d['name']!r}: {e}", False)
+            kept.append({"name": d["name"], "query": d["query"]})
+        data["smart_boxes"] = kept
+
+    def check_pokemon(self, mon, where):
+        if mon is None:
+            return None
+        if not isinstance(mon, dict):
+            self.issue(where, "slot is not a Pokémon object; cleared", True)
+            return None
+        for field in REQUIRED_FIELDS:
+            if field not in mon:
+                if field == "name":
+                    self.issue(where, "Pokémon has no name; cleared", True)
+                    return None
+                mon[field] = MIN_LEVEL if field == "level" else "Unknown"
+                self.issue(where, f"missing {field}; set to {mon[field]!r}", True)
+        self.pokemon += 1
+
+        for key in list(mon):
+            if key not in FIELDS:
+                self.issue(where, f"unknown field {key!r}", self.strip_unknown)
+                if self.strip_unknown:
+                    del mon[key]
+        if not isinstance(mon["name"], str) or not mon["name"].strip():
+            self.issue(where, f"invalid name {mon['name']!r}; cleared", True)
+            self.pokemon -= 1
+            return None
+        if not isinstance(mon["ptype"], str) or not mon["ptype"].strip():
+            self.issue(where, f"invalid type {mon['ptype']!r}; set to 'Unknown'", True)
+            mon["ptype"] = "Unknown"
+
+        level = mon["level"]
+        if isinstance(level, bool) or not isinstance(level, int):
+            try:
+                level = int(float(level))
+            except (TypeError, ValueError):
+                level = MIN_LEVEL
+            self.issue(where, f"level {mon['level']!r} is not an integer; set to {level}", True)
+        if not MIN_LEVEL <= level <= MAX_LEVEL:
+            clamped = min(max(level, MIN_LEVEL), MAX_LEVEL)
+            self.issue(where, f"level {level} out of range; set to {clamped}", True)
+            level = clamped
+        mon["level"] = level
+
+        moves = mon.get("moves")
+        if moves is None:
+            mon["moves"] = []
+        elif isinstance(moves, str):
+            mon["moves"] = [moves]
+            self.issue(where, "moves is a string; wrapped in a list", True)
+        elif not isinstance(moves, list) or not all(isinstance(m, str) for m in moves):
+            mon["moves"] = [m for m in moves if isinstance(m, str)] if isinstance(moves, list) else []
+            self.issue(where, "moves must be a list of names; dropped invalid entries", True)
+
+        for field in OPTIONAL_STR:
+            value = mon.get(field)
+            if value is not None and not isinstance(value, str):
+                self.issue(where, f"{field} {value!r} is not text; cleared", True)
+                mon[field] = None
+        return mon
+
+    def check_sprites(self, data: dict):
+        """Resolve every distinct sprite reference once, then fix or report the slots using it."""
+        slots = []
+        for i, mon in enumerate(data["party"]):
+            if mon:
+                slots.append((f"party {i + 1}", mon))
+        for b, box in enumerate(data["boxes"]):
+            for s, mon in enumerate(box):
+                if mon:
+                    slots.append((f"box {b + 1} slot {s + 1}", mon))
+
+        refs = set()
+        for _, mon in slots:
+            refs.add(_sprite_key(mon.get("sprite"), mon["name"]))
+            if mon.get("alt_sprite"):
+                refs.add(_sprite_key(mon["alt_sprite"], None))
+        resolved = resolve_sprites(refs)
+
+        for where, mon in slots:
+            found = resolved.get(_sprite_key(mon.get("sprite"), mon["name"]))
+            if found is None:
+                wanted = mon.get("sprite") or f"assets/sprites/{mon['name'].lower()}.png"
+                self.issue(where, f"sprite {wanted!r} not found", False)
+            elif found != mon.get("sprite"):
+                self.issue(where, f"sprite {mon.get('sprite')!r} -> {found!r}", True)
+                mon["sprite"] = found
+            if mon.get("alt_sprite"):
+                found = resolved.get(_sprite_key(mon["alt_sprite"], None))
+                if found is None:
+                    self.issue(where, f"alt_sprite {mon['alt_sprite']!r} not found", False)
+                elif found != mon["alt_sprite"]:
+                    self.issue(where, f"alt_sprite {mon['alt_sprite']!r} -> {found!r}", True)
+                    mon["alt_sprite"] = found
+
+
+def _place_free(boxes: list, mon: dict):
+    for box in boxes:
+        for i, slot in enumerate(box):
+            if slot is None:
+                box[i] = mon
+                return
+    boxes.append([mon] + [None] * (BOX_SLOTS - 1))
+
+
+def _sprite_key(path, name):
+    return f"{path or ''}\x00{(name or '').lower()}"
+
+
+def _stored_form(full: str, original: str) -> str:
+    """How a resolved sprite should be written in a save: store refs as-is, else relative to BASE_DIR."""
+    if original.startswith(sprites.STORE_PREFIX):
+        return original
+    try:
+        rel = os.path.relpath(full, BASE_DIR)
+    except ValueError:
+        return full
+    return full if rel.startswith("..") else rel.replace(os.sep, "/")
+
+
+def _resolve_one(key: str) -> str | None:
+    path, name = key.split("\x00")
+    full = sprites.resolve_sprite_path(path, name) if name else sprites.find_sprite_file(path)
+    return _stored_form(full, path) if full else None
+
+
+def resolve_sprites(keys) -> dict:
+    """Resolve sprite keys through the shared cache (one fetch, one publish per batch)."""
+    cache = _shared_cache
+    known = {}
+    if cache is not None:
+        wanted = set(keys)
+        known = {k: v for k, v in cache.copy().items() if k in wanted}
+    misses = {k: _resolve_one(k) for k in keys if k not in known}
+    if cache is not None and misses:
+        cache.update(misses)
+    known.update(misses)
+    return known
+
+
+# ---------------- Per-file task ----------------
+def validate_file(path: str, repair: bool = False, strip_unknown: bool = False) -> dict:
+    start = time.perf_counter()
+    check = FileCheck(path, strip_unknown)
+    result = {"path": path, "repaired": False}
+    try:
+        data = read_raw(path)
+        version = data.get("version", 0) if isinstance(data, dict) else 0
+        data = check.check(data)
+    except (OSError, ValueError) as e:
+        result.update(error=f"unreadable: {e}", issues=[], pokemon=0, seconds=time.perf_counter() - start)
+        return result
+    check.check_sprites(data)
+    if repair and any(i["fixed"] for i in check.issues):
+        try:
+            write_repaired(path, data, version)
+            result["repaired"] = True
+        except storage.SaveConflict as e:
+            result["error"] = f"not repaired, saved meanwhile ({e}); run again"
+    result.update(
+        issues=check.issues,
+        pokemon=check.pokemon,
+        unfixed=sum(not i["fixed"] for i in check.issues),
+        seconds=time.perf_counter() - start,
+    )
+    return result
+
+
+def save_files(paths) -> list[str]:
+    """Expand directories into the .json / .pcbox saves inside them."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(
+                os.path.join(path, f) for f in os.listdir(path)
+                if f.endswith((".json", ".pcbox")) and not f.endswith((".history.json", ".tmp"))
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def validate_all(paths, repair=False, workers=None, strip_unknown=False) -> dict:
+    files = save_files(paths)
+    start = time.perf_counter()
+    if workers == 1 or len(files) <= 1:
+        _init_worker({})
+        results = [validate_file(p, repair, strip_unknown) for p in files]
+    else:
+        with Manager() as manager:
+            cache = manager.dict()
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(cache,)) as pool:
+                results = list(pool.map(validate_file, files, [repair] * len(files), [strip_unknown] * len(files)))
+    return {
+        "files": results,
+        "total_seconds": time.perf_counter() - start,
+        "workers": workers or os.cpu_count(),
+        "repair": repair,
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validate and repair Pokémon PC Box saves")
+    parser.add_argument("paths", nargs="*", default=[SAVES_DIR], help="save files or directories (default: data/saves)")
+    parser.add_argument("--repair", action="store_true", help="fix what can be fixed and rewrite the file atomically")
+    parser.add_argument("--strip-unknown", action="store_true", help="also remove unknown save keys and Pokémon fields")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--report", metavar="PATH", help="write a JSON report to PATH")
+    parser.add_argument("--quiet", action="store_true", help="only print the per-file summary")
+    args = parser.parse_args(argv)
+
+    report = validate_all(args.paths, args.repair, args.workers, args.strip_unknown)
+    bad = 0
+    for r in report["files"]:
+        if r.get("error"):
+            bad += 1
+            print(f"✗ {r['path']}: {r['error']}")
+            continue
+        status = "repaired" if r["repaired"] else "ok" if not r["issues"] else f"{len(r['issues'])} issues"
+        print(f"{'✓' if not r['issues'] else '!'} {r['path']}: {r['pokemon']} Pokémon, {status} ({r['seconds'] * 1000:.1f} ms)")
+        if not args.quiet:
+            for issue in r["issues"]:
+                mark = "fixed" if issue["fixed"] and args.repair else "fixable" if issue["fixed"] else "manual"
+                print(f"    [{mark}] {issue['where']}: {issue['problem']}")
+        if r["unfixed"] or (r["issues"] and not r["repaired"]):
+            bad += 1
+    print(f"{len(report['files'])} files in {report['total_seconds']:.2f}s")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())